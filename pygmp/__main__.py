@@ -40,6 +40,8 @@ def build_args():
 
     parser_a = subparsers.add_parser('simple', help='A simple multicast routing daemon.')
     parser_a.add_argument('--config', default="/etc/simple.ini", help='Config file for simple multicast routing daemon.')
+    parser_a.add_argument('--single-loop', action='store_true',
+                          help='Read the routing sockets in the event loop of the REST API instead of in threads.')
     parser_a.set_defaults(daemon=simple.main)
 
     return parser.parse_args()
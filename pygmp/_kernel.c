@@ -30,17 +30,20 @@
 #include <stdlib.h>
 #include <arpa/inet.h>
 #include <linux/mroute.h>
+#include <linux/rtnetlink.h>
 #include <ifaddrs.h>
 #include <net/if.h>
 
 #include "_kernel.h"
 #include "util.h"
+#include "proc.h"
+#include "mroute.h"
 
 
 
 static PyObject *parse_igmp(unsigned char *buffer, size_t len);
-static PyObject *parse_igmp_control(unsigned char *buffer, size_t len);
-static PyObject *parse_ip_header(unsigned char *buffer, size_t len);
+static PyObject *parse_igmp_control(unsigned char *buffer, size_t len, int int_addresses);
+static PyObject *parse_ip_header(unsigned char *buffer, size_t len, int int_addresses);
 static PyObject *get_network_interfaces(void);
 static PyObject *get_network_interface_info(const struct ifaddrs *ifa);
 static PyObject* del_vif(int sockfd, int vifi);
@@ -53,6 +56,35 @@ static PyObject* parse_query_src_list(__be32* src_list, int nsrcs, size_t len);
 static PyObject *parse_igmpv3_grec(unsigned char *buffer, size_t len);
 static size_t next_igmpv3_grec(unsigned char *buffer);
 static PyObject *parse_igmpv3_grec_list(unsigned char *buffer, size_t len);
+static PyObject *parse_ip_mr_cache(const char *buffer, size_t len);
+static PyObject *pack_ip_mr_cache(const char *buffer, size_t len);
+static PyObject *parse_ip_mr_vif(const char *buffer, size_t len);
+static PyObject *mfc_record_to_tuple(const struct mfc_record *record);
+static PyObject *set_mfcs(PyObject *args, PyObject *kwargs, int optname);
+static int copy_ttls_buffer(PyObject *obj, unsigned char *ttls);
+static PyObject *packet_info_to_object(const struct packet_info *info, Py_ssize_t length);
+
+
+static PyTypeObject *PacketInfoType;
+
+static PyStructSequence_Field packet_info_fields[] = {
+        {"kind", "PACKET_CONTROL, PACKET_IGMP, PACKET_PIM, PACKET_OTHER, or PACKET_INVALID"},
+        {"type", "igmpmsg type, IGMP or PIM message type, or IP protocol number"},
+        {"vif", "VIF the packet arrived on, for upcalls"},
+        {"src", "Source address"},
+        {"dst", "Destination address"},
+        {"group", "Group address"},
+        {"offset", "Offset of the IGMP or PIM message"},
+        {"length", "Length of the packet"},
+        {NULL, NULL}
+};
+
+static PyStructSequence_Desc packet_info_desc = {
+        "pygmp._kernel.PacketInfo",
+        "Summary of a packet read from the multicast routing socket, from classify_packet or recv_batch.",
+        packet_info_fields,
+        8
+};
 
 /*
  * Function:  kernel_add_mfc
@@ -63,18 +95,15 @@ PyObject *kernel_add_mfc(PyObject *self, PyObject *args, PyObject* kwargs) {
     static char* keywords[] = {"sock", "src_str", "grp_str", "parent_vif", "ttls", NULL};
 
     // TODO - add expire flag
-    const char *src_str, *grp_str;
     unsigned int parent_vif;
     PyObject *sock_obj;
     PyObject *ttls_obj;
     struct in_addr src_addr, grp_addr;
     int sockfd;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OssIO", keywords, &sock_obj, &src_str, &grp_str, &parent_vif, &ttls_obj))
-        return NULL;
-
-    // Convert source and group addresses from string to binary format
-    if (!inet_pton_with_exception(AF_INET, src_str, &src_addr) || !inet_pton_with_exception(AF_INET, grp_str, &grp_addr))
+    // source and group addresses are converted to binary format from a string, or taken as is from an integer
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO&O&IO", keywords, &sock_obj, in_addr_converter, &src_addr,
+                                     in_addr_converter, &grp_addr, &parent_vif, &ttls_obj))
         return NULL;
 
     sockfd = PyObject_AsFileDescriptor(sock_obj);
@@ -83,8 +112,8 @@ PyObject *kernel_add_mfc(PyObject *self, PyObject *args, PyObject* kwargs) {
         return NULL;
     }
 
-    if (!PyList_Check(ttls_obj)) {
-        PyErr_SetString(PyExc_TypeError, "Expected a list");
+    if (!PyList_Check(ttls_obj) && !PyObject_CheckBuffer(ttls_obj)) {
+        PyErr_SetString(PyExc_TypeError, "Expected a list or a bytes-like object");
         return NULL;
     }
 
@@ -102,17 +131,14 @@ PyObject *kernel_add_mfc(PyObject *self, PyObject *args, PyObject* kwargs) {
 PyObject *kernel_del_mfc(PyObject *self, PyObject *args, PyObject* kwargs) {
     static char* keywords[] = {"sock", "src_str", "grp_str", "parent_vif", NULL};
 
-    const char *src_str, *grp_str;
     unsigned int parent_vif;
     PyObject *sock_obj;
     struct in_addr src_addr, grp_addr;
     int sockfd;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OssI", keywords, &sock_obj, &src_str, &grp_str, &parent_vif))
-        return NULL;
-
-    // Convert source and group addresses from string to binary format
-    if (!inet_pton_with_exception(AF_INET, src_str, &src_addr) || !inet_pton_with_exception(AF_INET, grp_str, &grp_addr))
+    // source and group addresses are converted to binary format from a string, or taken as is from an integer
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO&O&I", keywords, &sock_obj, in_addr_converter, &src_addr,
+                                     in_addr_converter, &grp_addr, &parent_vif))
         return NULL;
 
     sockfd = PyObject_AsFileDescriptor(sock_obj);
@@ -179,14 +205,16 @@ PyObject *kernel_del_vif(PyObject *self, PyObject *args, PyObject* kwargs) {
  * Function:  kernel_parse_igmp_control
  * --------------------
  * Parses a control message from the kernel on the multicast routing socket.
+ * Addresses are strings, or integers (i.e., int(IPv4Address)) if int_addresses is set.
  */
 PyObject *kernel_parse_igmp_control(PyObject *self, PyObject *args, PyObject* kwargs) {
-    static char* keywords[] = {"buffer", NULL};
+    static char* keywords[] = {"buffer", "int_addresses", NULL};
 
     char *input;
     Py_ssize_t input_size;
+    int int_addresses = 0;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y#", keywords, &input, &input_size))
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y#|p", keywords, &input, &input_size, &int_addresses))
         return NULL;
 
     if (input_size < 0) {
@@ -195,7 +223,7 @@ PyObject *kernel_parse_igmp_control(PyObject *self, PyObject *args, PyObject* kw
     }
 
 
-    return parse_igmp_control((unsigned char *)input, (size_t)input_size);
+    return parse_igmp_control((unsigned char *)input, (size_t)input_size, int_addresses);
 }
 
 /*
@@ -224,14 +252,16 @@ PyObject *kernel_parse_igmp(PyObject *self, PyObject *args, PyObject* kwargs) {
  * Function:  kernel_parse_ip_header
  * --------------------
  * Parses header of an IP packet.
+ * Addresses are strings, or integers (i.e., int(IPv4Address)) if int_addresses is set.
  */
 PyObject *kernel_parse_ip_header(PyObject *self, PyObject *args, PyObject* kwargs) {
-    static char* keywords[] = {"buffer", NULL};
+    static char* keywords[] = {"buffer", "int_addresses", NULL};
 
     char *packet;
     Py_ssize_t packet_len;
+    int int_addresses = 0;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y#", keywords, &packet, &packet_len))
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y#|p", keywords, &packet, &packet_len, &int_addresses))
         return NULL;
 
     if (packet_len < 0) {
@@ -240,7 +270,7 @@ PyObject *kernel_parse_ip_header(PyObject *self, PyObject *args, PyObject* kwarg
     }
 
 
-    return parse_ip_header((unsigned char *)packet, (size_t)packet_len);
+    return parse_ip_header((unsigned char *)packet, (size_t)packet_len, int_addresses);
 
 }
 
@@ -255,6 +285,281 @@ PyObject *kernel_network_interfaces(PyObject *self, PyObject *args)
 }
 
 
+/*
+ * Function:  kernel_parse_ip_mr_cache
+ * --------------------
+ * Parses the contents of /proc/net/ip_mr_cache into a list of tuples.
+ * Accepts any buffer, so the file can be parsed straight from a reusable read buffer.
+ */
+PyObject *kernel_parse_ip_mr_cache(PyObject *self, PyObject *args, PyObject* kwargs) {
+    static char* keywords[] = {"buffer", NULL};
+
+    Py_buffer buffer;
+    PyObject *result;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y*", keywords, &buffer))
+        return NULL;
+
+    result = parse_ip_mr_cache(buffer.buf, (size_t)buffer.len);
+    PyBuffer_Release(&buffer);
+    return result;
+}
+
+/*
+ * Function:  kernel_pack_ip_mr_cache
+ * --------------------
+ * Parses the contents of /proc/net/ip_mr_cache into a bytearray of packed mfc_record structs.
+ * Accepts any buffer, so the file can be parsed straight from a reusable read buffer.
+ */
+PyObject *kernel_pack_ip_mr_cache(PyObject *self, PyObject *args, PyObject* kwargs) {
+    static char* keywords[] = {"buffer", NULL};
+
+    Py_buffer buffer;
+    PyObject *result;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y*", keywords, &buffer))
+        return NULL;
+
+    result = pack_ip_mr_cache(buffer.buf, (size_t)buffer.len);
+    PyBuffer_Release(&buffer);
+    return result;
+}
+
+/*
+ * Function:  kernel_parse_ip_mr_vif
+ * --------------------
+ * Parses the contents of /proc/net/ip_mr_vif into a list of tuples.
+ * Accepts any buffer, so the file can be parsed straight from a reusable read buffer.
+ */
+PyObject *kernel_parse_ip_mr_vif(PyObject *self, PyObject *args, PyObject* kwargs) {
+    static char* keywords[] = {"buffer", NULL};
+
+    Py_buffer buffer;
+    PyObject *result;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y*", keywords, &buffer))
+        return NULL;
+
+    result = parse_ip_mr_vif(buffer.buf, (size_t)buffer.len);
+    PyBuffer_Release(&buffer);
+    return result;
+}
+
+/*
+ * Function:  kernel_get_sg_counts
+ * --------------------
+ * Issues SIOCGETSGCNT for many (source, group) pairs with the GIL released.  pairs is a buffer of uint32 integer
+ * address values, two per pair.  The counters are written into the writable buffer out as packed sg_count_record
+ * structs.  Returns the number of failed requests; each record holds the errno of its request, or 0.
+ */
+PyObject *kernel_get_sg_counts(PyObject *self, PyObject *args, PyObject* kwargs) {
+    static char* keywords[] = {"sock", "pairs", "out", NULL};
+
+    PyObject *sock_obj;
+    Py_buffer pairs, out;
+    size_t count, failed;
+    int sockfd;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Oy*w*", keywords, &sock_obj, &pairs, &out))
+        return NULL;
+
+    sockfd = PyObject_AsFileDescriptor(sock_obj);
+    if (sockfd < 0)
+        goto error;
+
+    if (pairs.len % (2 * sizeof(uint32_t)) != 0) {
+        PyErr_SetString(PyExc_ValueError, "pairs must hold two uint32 values per (source, group) pair");
+        goto error;
+    }
+    count = pairs.len / (2 * sizeof(uint32_t));
+    if ((size_t)out.len < count * sizeof(struct sg_count_record)) {
+        PyErr_Format(PyExc_ValueError, "out must hold at least %zu bytes", count * sizeof(struct sg_count_record));
+        goto error;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    failed = mroute_get_sg_counts(sockfd, pairs.buf, count, out.buf);
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&pairs);
+    PyBuffer_Release(&out);
+    return PyLong_FromSize_t(failed);
+
+error:
+    PyBuffer_Release(&pairs);
+    PyBuffer_Release(&out);
+    return NULL;
+}
+
+/*
+ * Function:  kernel_get_vif_counts
+ * --------------------
+ * Issues SIOCGETVIFCNT for many VIFs with the GIL released.  vifs is a buffer of uint32 VIF indices.  The counters
+ * are written into the writable buffer out as packed vif_count_record structs.  Returns the number of failed
+ * requests; each record holds the errno of its request, or 0.
+ */
+PyObject *kernel_get_vif_counts(PyObject *self, PyObject *args, PyObject* kwargs) {
+    static char* keywords[] = {"sock", "vifs", "out", NULL};
+
+    PyObject *sock_obj;
+    Py_buffer vifs, out;
+    size_t count, failed;
+    int sockfd;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Oy*w*", keywords, &sock_obj, &vifs, &out))
+        return NULL;
+
+    sockfd = PyObject_AsFileDescriptor(sock_obj);
+    if (sockfd < 0)
+        goto error;
+
+    if (vifs.len % sizeof(uint32_t) != 0) {
+        PyErr_SetString(PyExc_ValueError, "vifs must hold uint32 values");
+        goto error;
+    }
+    count = vifs.len / sizeof(uint32_t);
+    if ((size_t)out.len < count * sizeof(struct vif_count_record)) {
+        PyErr_Format(PyExc_ValueError, "out must hold at least %zu bytes", count * sizeof(struct vif_count_record));
+        goto error;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    failed = mroute_get_vif_counts(sockfd, vifs.buf, count, out.buf);
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&vifs);
+    PyBuffer_Release(&out);
+    return PyLong_FromSize_t(failed);
+
+error:
+    PyBuffer_Release(&vifs);
+    PyBuffer_Release(&out);
+    return NULL;
+}
+
+/*
+ * Function:  kernel_add_mfc_many
+ * --------------------
+ * Adds many multicast forwarding cache entries with the GIL released.  See set_mfcs.
+ */
+PyObject *kernel_add_mfc_many(PyObject *self, PyObject *args, PyObject* kwargs) {
+    return set_mfcs(args, kwargs, MRT_ADD_MFC);
+}
+
+/*
+ * Function:  kernel_del_mfc_many
+ * --------------------
+ * Deletes many multicast forwarding cache entries with the GIL released.  See set_mfcs.
+ */
+PyObject *kernel_del_mfc_many(PyObject *self, PyObject *args, PyObject* kwargs) {
+    return set_mfcs(args, kwargs, MRT_DEL_MFC);
+}
+
+
+/*
+ * Function:  kernel_classify_packet
+ * --------------------
+ * Classifies a packet read from the multicast routing socket in one pass over its headers.  Returns a PacketInfo of
+ * (kind, type, vif, src, dst, group, offset, length), see struct packet_info.  Addresses are integers (i.e., int(IPv4Address)).
+ * Accepts any buffer, so a slice of a receive buffer can be classified without copying it.
+ */
+PyObject *kernel_classify_packet(PyObject *self, PyObject *args, PyObject* kwargs) {
+    static char* keywords[] = {"buffer", NULL};
+
+    Py_buffer buffer;
+    Py_ssize_t length;
+    struct packet_info info;
+    int result;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y*", keywords, &buffer))
+        return NULL;
+
+    length = buffer.len;
+    result = mroute_classify_packet(buffer.buf, (size_t)length, &info);
+    PyBuffer_Release(&buffer);
+    if (result < 0) {
+        PyErr_SetString(PyExc_ValueError, "Packet too short for its headers");
+        return NULL;
+    }
+    return packet_info_to_object(&info, length);
+}
+
+
+/*
+ * Function:  kernel_recv_batch
+ * --------------------
+ * Receives a batch of messages from the multicast routing socket with recvmmsg, with the GIL released.  ring is a
+ * writable buffer of slots of slot_size bytes; one message is received into each slot, and the number of slots (up to
+ * RECV_BATCH_MAX) is the most messages received per call.  Waits up to timeout_ms milliseconds for the first message (-1 to wait
+ * forever), but never for the rest.
+ *
+ * Returns a list with the PacketInfo of each message, in the order of the slots they were received into.  Messages
+ * too short for their headers are of kind PACKET_INVALID.  The list is empty if the timeout expired or a signal
+ * interrupted the wait.
+ */
+PyObject *kernel_recv_batch(PyObject *self, PyObject *args, PyObject* kwargs) {
+    static char* keywords[] = {"sock", "ring", "slot_size", "timeout_ms", NULL};
+
+    PyObject *sock_obj, *result = NULL;
+    Py_buffer ring;
+    Py_ssize_t slot_size;
+    size_t count;
+    struct recv_record *records = NULL;
+    int sockfd, timeout_ms = -1, received;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Ow*n|i", keywords, &sock_obj, &ring, &slot_size, &timeout_ms))
+        return NULL;
+
+    sockfd = PyObject_AsFileDescriptor(sock_obj);
+    if (sockfd < 0)
+        goto done;
+
+    if (slot_size <= 0 || ring.len < slot_size) {
+        PyErr_SetString(PyExc_ValueError, "ring must hold at least one slot of a positive slot_size");
+        goto done;
+    }
+    count = (size_t)(ring.len / slot_size);
+    if (count > RECV_BATCH_MAX)
+        count = RECV_BATCH_MAX;
+    records = PyMem_Calloc(count, sizeof(*records));
+    if (records == NULL) {
+        PyErr_NoMemory();
+        goto done;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    received = mroute_recv_batch(sockfd, ring.buf, (size_t)slot_size, count, timeout_ms, records);
+    Py_END_ALLOW_THREADS
+
+    if (received < 0) {
+        if (errno != EINTR) {
+            PyErr_SetFromErrno(PyExc_OSError);
+            goto done;
+        }
+        if (PyErr_CheckSignals() < 0)
+            goto done;
+        received = 0;
+    }
+
+    result = PyList_New(received);
+    if (result == NULL)
+        goto done;
+    for (int i = 0; i < received; i++) {
+        PyObject *info = packet_info_to_object(&records[i].info, records[i].length);
+        if (info == NULL) {
+            Py_CLEAR(result);
+            goto done;
+        }
+        PyList_SET_ITEM(result, i, info);
+    }
+
+done:
+    PyMem_Free(records);
+    PyBuffer_Release(&ring);
+    return result;
+}
+
+
 static PyObject *parse_igmp(unsigned char *buffer, size_t len) {
     if (len < sizeof(struct igmphdr)) {
         PyErr_SetString(PyExc_ValueError, "Buffer too short for igmphdr");
@@ -435,7 +740,7 @@ static size_t next_igmpv3_grec(unsigned char *buffer) {
 }
 
 
-static PyObject *parse_igmp_control(unsigned char *buffer, size_t len) {
+static PyObject *parse_igmp_control(unsigned char *buffer, size_t len, int int_addresses) {
     if (len < sizeof(struct igmpmsg)) {
         PyErr_SetString(PyExc_ValueError, "Buffer too short for igmpmsg");
         return NULL;
@@ -451,14 +756,14 @@ static PyObject *parse_igmp_control(unsigned char *buffer, size_t len) {
     ADD_ITEM_AND_CHECK(result_dict, "mbz", PyLong_FromLong(igmp->im_mbz));
     ADD_ITEM_AND_CHECK(result_dict, "vif", PyLong_FromLong(igmp->im_vif));
     // FIXME - doesn't always exist ADD_ITEM_AND_CHECK(result_dict, "vif_hi", PyLong_FromLong(igmp->im_vif_hi));
-    ADD_ITEM_AND_CHECK(result_dict, "im_src", inet_ntop_with_exception(AF_INET, &(igmp->im_src)));
-    ADD_ITEM_AND_CHECK(result_dict, "im_dst", inet_ntop_with_exception(AF_INET, &(igmp->im_dst)));
+    ADD_ITEM_AND_CHECK(result_dict, "im_src", in_addr_to_object(&(igmp->im_src), int_addresses));
+    ADD_ITEM_AND_CHECK(result_dict, "im_dst", in_addr_to_object(&(igmp->im_dst), int_addresses));
 
     return result_dict;
 }
 
 
-static PyObject *parse_ip_header(unsigned char *buffer, size_t len) {
+static PyObject *parse_ip_header(unsigned char *buffer, size_t len, int int_addresses) {
     // TODO - support ipv6
     if (len < sizeof(struct iphdr)) {
         PyErr_SetString(PyExc_ValueError, "Packet too short for IP header");
@@ -481,8 +786,8 @@ static PyObject *parse_ip_header(unsigned char *buffer, size_t len) {
     ADD_ITEM_AND_CHECK(result_dict, "ttl", PyLong_FromLong(ip_header->ttl));
     ADD_ITEM_AND_CHECK(result_dict, "protocol", PyLong_FromLong(ip_header->protocol));
     ADD_ITEM_AND_CHECK(result_dict, "check", PyLong_FromLong(ntohs(ip_header->check)));
-    ADD_ITEM_AND_CHECK(result_dict, "src_addr", inet_ntop_with_exception(AF_INET, &(ip_header->saddr)));
-    ADD_ITEM_AND_CHECK(result_dict, "dst_addr", inet_ntop_with_exception(AF_INET, &(ip_header->daddr)));
+    ADD_ITEM_AND_CHECK(result_dict, "src_addr", in_addr_to_object((struct in_addr *) &(ip_header->saddr), int_addresses));
+    ADD_ITEM_AND_CHECK(result_dict, "dst_addr", in_addr_to_object((struct in_addr *) &(ip_header->daddr), int_addresses));
 
     return result_dict;
 }
@@ -492,9 +797,14 @@ static PyObject *get_network_interfaces(void)
 {
     struct ifaddrs *ifap, *ifa;
     PyObject *iface_list, *iface_info;
+    int result;
+
+    // get linked list of interfaces, which makes a netlink round trip to the kernel
+    Py_BEGIN_ALLOW_THREADS
+    result = getifaddrs(&ifap);
+    Py_END_ALLOW_THREADS
 
-    // get linked list of interfaces
-    if (getifaddrs(&ifap) == -1) {
+    if (result == -1) {
         PyErr_SetFromErrno(PyExc_OSError);
         return NULL;
     }
@@ -558,11 +868,16 @@ static PyObject *get_network_interface_info(const struct ifaddrs *ifa) {
 
 static PyObject* del_vif(int sockfd, int vifi) {
     struct vifctl vif;
+    int result;
 
     memset(&vif, 0, sizeof(vif));
     vif.vifc_vifi = vifi;
 
-    if (setsockopt(sockfd, IPPROTO_IP, MRT_DEL_VIF, &vif, sizeof(vif)) < 0) {
+    Py_BEGIN_ALLOW_THREADS
+    result = setsockopt(sockfd, IPPROTO_IP, MRT_DEL_VIF, &vif, sizeof(vif));
+    Py_END_ALLOW_THREADS
+
+    if (result < 0) {
         PyErr_SetFromErrno(PyExc_OSError);
         return NULL;
     }
@@ -573,6 +888,7 @@ static PyObject* del_vif(int sockfd, int vifi) {
 static PyObject* add_vif(int sockfd, int vifi, int thresh, int rate_limit, char *lcl_addr_str, char *rmt_addr_str) {
     struct vifctl vif;
     struct in_addr lcl_addr, rmt_addr;
+    int result;
 
     if (inet_pton_with_exception(AF_INET, rmt_addr_str, &rmt_addr) < 0) {
         return NULL;
@@ -597,7 +913,11 @@ static PyObject* add_vif(int sockfd, int vifi, int thresh, int rate_limit, char
         vif.vifc_flags |= VIFF_USE_IFINDEX;
     }
 
-    if (setsockopt(sockfd, IPPROTO_IP, MRT_ADD_VIF, &vif, sizeof(vif)) < 0) {
+    Py_BEGIN_ALLOW_THREADS
+    result = setsockopt(sockfd, IPPROTO_IP, MRT_ADD_VIF, &vif, sizeof(vif));
+    Py_END_ALLOW_THREADS
+
+    if (result < 0) {
         PyErr_SetFromErrno(PyExc_OSError);
         return NULL;
     }
@@ -606,10 +926,57 @@ static PyObject* add_vif(int sockfd, int vifi, int thresh, int rate_limit, char
 }
 
 
+/*
+ * Function:  set_mfcs
+ * --------------------
+ * Parses (sock, records, errors) and issues setsockopt with optname for every packed mfcctl_record in records.
+ * errors is a writable buffer with an int32 per record, set to 0 or the errno of the request.  Returns the number
+ * of failed requests.
+ */
+static PyObject *set_mfcs(PyObject *args, PyObject *kwargs, int optname) {
+    static char* keywords[] = {"sock", "records", "errors", NULL};
+
+    PyObject *sock_obj;
+    Py_buffer records, errors;
+    size_t count, failed;
+    int sockfd;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Oy*w*", keywords, &sock_obj, &records, &errors))
+        return NULL;
+
+    sockfd = PyObject_AsFileDescriptor(sock_obj);
+    if (sockfd < 0)
+        goto error;
+
+    if (records.len % sizeof(struct mfcctl_record) != 0) {
+        PyErr_Format(PyExc_ValueError, "records must be a multiple of %zu bytes", sizeof(struct mfcctl_record));
+        goto error;
+    }
+    count = records.len / sizeof(struct mfcctl_record);
+    if ((size_t)errors.len < count * sizeof(int32_t)) {
+        PyErr_Format(PyExc_ValueError, "errors must hold at least %zu bytes", count * sizeof(int32_t));
+        goto error;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    failed = mroute_set_mfcs(sockfd, optname, records.buf, count, errors.buf);
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&records);
+    PyBuffer_Release(&errors);
+    return PyLong_FromSize_t(failed);
+
+error:
+    PyBuffer_Release(&records);
+    PyBuffer_Release(&errors);
+    return NULL;
+}
+
+
 static PyObject *add_mfc(int sockfd, struct in_addr src_addr, struct in_addr grp_addr, unsigned int parent_vif, PyObject *ttls_list)
 {
     struct mfcctl mfc;
-    int i;
+    int i, result;
     PyObject *item;
 
     // Fill in the multicast forwarding cache control structure
@@ -617,7 +984,10 @@ static PyObject *add_mfc(int sockfd, struct in_addr src_addr, struct in_addr grp
     mfc.mfcc_origin = src_addr;
     mfc.mfcc_mcastgrp = grp_addr;
     mfc.mfcc_parent = parent_vif;
-    if (ttls_list != Py_None) {
+    if (ttls_list != Py_None && PyObject_CheckBuffer(ttls_list)) {
+        if (copy_ttls_buffer(ttls_list, mfc.mfcc_ttls) < 0)
+            return NULL;
+    } else if (ttls_list != Py_None) {
         Py_ssize_t list_size = PyList_Size(ttls_list);
         if (list_size < 0) {
             PyErr_SetString(PyExc_TypeError, "Expected a list object for ttls_list");
@@ -639,7 +1009,11 @@ static PyObject *add_mfc(int sockfd, struct in_addr src_addr, struct in_addr grp
     }
 
     // Add the multicast forwarding cache entry with the MRT_ADD_MFC flag
-    if (setsockopt(sockfd, IPPROTO_IP, MRT_ADD_MFC, &mfc, sizeof(mfc)) < 0) {
+    Py_BEGIN_ALLOW_THREADS
+    result = setsockopt(sockfd, IPPROTO_IP, MRT_ADD_MFC, &mfc, sizeof(mfc));
+    Py_END_ALLOW_THREADS
+
+    if (result < 0) {
         PyErr_SetFromErrno(PyExc_OSError);
         return NULL;
     }
@@ -648,8 +1022,58 @@ static PyObject *add_mfc(int sockfd, struct in_addr src_addr, struct in_addr grp
 }
 
 
+/*
+ * Function:  packet_info_to_object
+ * --------------------
+ * Converts a packet_info and the length of its packet into a PacketInfo struct sequence.
+ */
+static PyObject *packet_info_to_object(const struct packet_info *info, Py_ssize_t length) {
+    PyObject *result = PyStructSequence_New(PacketInfoType);
+    CHECK_NULL_AND_RAISE_NOMEMORY(result);
+
+    PyStructSequence_SetItem(result, 0, PyLong_FromLong(info->kind));
+    PyStructSequence_SetItem(result, 1, PyLong_FromLong(info->type));
+    PyStructSequence_SetItem(result, 2, PyLong_FromLong(info->vif));
+    PyStructSequence_SetItem(result, 3, PyLong_FromUnsignedLong(info->src));
+    PyStructSequence_SetItem(result, 4, PyLong_FromUnsignedLong(info->dst));
+    PyStructSequence_SetItem(result, 5, PyLong_FromUnsignedLong(info->group));
+    PyStructSequence_SetItem(result, 6, PyLong_FromLong(info->offset));
+    PyStructSequence_SetItem(result, 7, PyLong_FromSsize_t(length));
+    if (PyErr_Occurred()) {
+        Py_DECREF(result);
+        return NULL;
+    }
+    return result;
+}
+
+
+/*
+ * Function:  copy_ttls_buffer
+ * --------------------
+ * Copies up to MAXVIFS TTLs from a buffer of single byte items (bytes, bytearray, array('B'), ...) into ttls.
+ * Returns 0 on success, or -1 with an exception set.
+ */
+static int copy_ttls_buffer(PyObject *obj, unsigned char *ttls) {
+    Py_buffer view;
+
+    if (PyObject_GetBuffer(obj, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0)
+        return -1;
+
+    if (view.itemsize != 1) {
+        PyErr_Format(PyExc_TypeError, "Expected a buffer of single byte TTLs, not items of %zd bytes", view.itemsize);
+        PyBuffer_Release(&view);
+        return -1;
+    }
+
+    memcpy(ttls, view.buf, view.len < MAXVIFS ? (size_t)view.len : MAXVIFS);
+    PyBuffer_Release(&view);
+    return 0;
+}
+
+
 static PyObject *del_mfc(int sockfd, struct in_addr src_addr, struct in_addr grp_addr, unsigned int parent_vif) {
     struct mfcctl mfc;
+    int result;
 
     // Fill in the multicast forwarding cache control structure
     memset(&mfc, 0, sizeof(mfc));
@@ -658,7 +1082,11 @@ static PyObject *del_mfc(int sockfd, struct in_addr src_addr, struct in_addr grp
     mfc.mfcc_parent = parent_vif;
 
     // Delete the multicast forwarding cache entry with the MRT_DEL_MFC flag
-    if (setsockopt(sockfd, IPPROTO_IP, MRT_DEL_MFC, &mfc, sizeof(mfc)) < 0) {
+    Py_BEGIN_ALLOW_THREADS
+    result = setsockopt(sockfd, IPPROTO_IP, MRT_DEL_MFC, &mfc, sizeof(mfc));
+    Py_END_ALLOW_THREADS
+
+    if (result < 0) {
         PyErr_SetFromErrno(PyExc_OSError);
         return NULL;
     }
@@ -667,6 +1095,146 @@ static PyObject *del_mfc(int sockfd, struct in_addr src_addr, struct in_addr grp
 }
 
 
+static PyObject *parse_ip_mr_cache(const char *buffer, size_t len) {
+    const char *end = buffer + len;
+    const char *pos = proc_skip_line(buffer, end);  // skip header line
+    struct mfc_record record;
+    PyObject *entries, *entry;
+    int result;
+
+    entries = PyList_New(0);
+    CHECK_NULL_AND_RAISE_NOMEMORY(entries);
+
+    while (pos < end) {
+        result = proc_scan_mfc_line(&pos, end, &record);
+        if (result < 0) {
+            PyErr_SetString(PyExc_ValueError, "Encountered malformed line in ip_mr_cache");
+            Py_DECREF(entries);
+            return NULL;
+        }
+        if (result == 0)
+            continue;
+
+        entry = mfc_record_to_tuple(&record);
+        if (entry == NULL) {
+            Py_DECREF(entries);
+            return NULL;
+        }
+        if (PyList_Append(entries, entry) == -1) {
+            Py_DECREF(entry);
+            Py_DECREF(entries);
+            return NULL;
+        }
+        Py_DECREF(entry);  // append does not steal the reference.
+    }
+
+    return entries;
+}
+
+
+static PyObject *mfc_record_to_tuple(const struct mfc_record *record) {
+    PyObject *oifs, *vifi, *ttl;
+
+    oifs = PyDict_New();
+    CHECK_NULL_AND_RAISE_NOMEMORY(oifs);
+
+    for (int i = 0; i < MAXVIFS; i++) {
+        if (!record->ttls[i])
+            continue;
+
+        vifi = PyLong_FromLong(i);
+        ttl = PyLong_FromLong(record->ttls[i]);
+        if (!vifi || !ttl || PyDict_SetItem(oifs, vifi, ttl) < 0) {
+            Py_XDECREF(vifi);
+            Py_XDECREF(ttl);
+            Py_DECREF(oifs);
+            return NULL;
+        }
+        Py_DECREF(vifi);
+        Py_DECREF(ttl);
+    }
+
+    return Py_BuildValue("(kkhKKKN)", (unsigned long)record->group, (unsigned long)record->origin, record->iif,
+                         (unsigned long long)record->packets, (unsigned long long)record->bytes,
+                         (unsigned long long)record->wrong_if, oifs);
+}
+
+
+static PyObject *pack_ip_mr_cache(const char *buffer, size_t len) {
+    const char *end = buffer + len;
+    const char *pos = proc_skip_line(buffer, end);  // skip header line
+    struct mfc_record *records;
+    size_t count = 0;
+    int result = 0;
+
+    PyObject *packed = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)(proc_count_lines(pos, end) * sizeof(struct mfc_record)));
+    CHECK_NULL_AND_RAISE_NOMEMORY(packed);
+    records = (struct mfc_record *)PyByteArray_AS_STRING(packed);
+
+    // the buffer is an immutable bytes object and the bytearray is not shared yet.
+    Py_BEGIN_ALLOW_THREADS
+    while (pos < end) {
+        result = proc_scan_mfc_line(&pos, end, &records[count]);
+        if (result < 0)
+            break;
+        count += result;
+    }
+    Py_END_ALLOW_THREADS
+
+    if (result < 0) {
+        PyErr_SetString(PyExc_ValueError, "Encountered malformed line in ip_mr_cache");
+        Py_DECREF(packed);
+        return NULL;
+    }
+
+    if (PyByteArray_Resize(packed, (Py_ssize_t)(count * sizeof(struct mfc_record))) < 0) {
+        Py_DECREF(packed);
+        return NULL;
+    }
+    return packed;
+}
+
+
+static PyObject *parse_ip_mr_vif(const char *buffer, size_t len) {
+    const char *end = buffer + len;
+    const char *pos = proc_skip_line(buffer, end);  // skip header line
+    struct vif_record record;
+    PyObject *entries, *entry;
+    int result;
+
+    entries = PyList_New(0);
+    CHECK_NULL_AND_RAISE_NOMEMORY(entries);
+
+    while (pos < end) {
+        result = proc_scan_vif_line(&pos, end, &record);
+        if (result < 0) {
+            PyErr_SetString(PyExc_ValueError, "Encountered malformed line in ip_mr_vif");
+            Py_DECREF(entries);
+            return NULL;
+        }
+        if (result == 0)
+            continue;
+
+        entry = Py_BuildValue("(isKKKKkkk)", record.index, record.name,
+                              (unsigned long long)record.bytes_in, (unsigned long long)record.pkts_in,
+                              (unsigned long long)record.bytes_out, (unsigned long long)record.pkts_out,
+                              (unsigned long)record.flags, (unsigned long)record.local, (unsigned long)record.remote);
+        if (entry == NULL) {
+            Py_DECREF(entries);
+            return NULL;
+        }
+        if (PyList_Append(entries, entry) == -1) {
+            Py_DECREF(entry);
+            Py_DECREF(entries);
+            return NULL;
+        }
+        Py_DECREF(entry);  // append does not steal the reference.
+    }
+
+    return entries;
+}
+
+
 // TODO - add metadata for args
 static PyMethodDef kernel_methods[] = {
         {"network_interfaces", kernel_network_interfaces, METH_NOARGS, "Get basic info on network interface devices."},
@@ -677,6 +1245,15 @@ static PyMethodDef kernel_methods[] = {
         {"parse_igmp_control", (PyCFunction)kernel_parse_igmp_control, METH_VARARGS | METH_KEYWORDS, "Parse an IGMP control message."},
         {"parse_ip_header", (PyCFunction)kernel_parse_ip_header, METH_VARARGS | METH_KEYWORDS, "Parse an IP header."},
         {"parse_igmp", (PyCFunction)kernel_parse_igmp, METH_VARARGS | METH_KEYWORDS, "Parse an IGMP message.  Only the payload of the IP packet."},
+        {"parse_ip_mr_cache", (PyCFunction)kernel_parse_ip_mr_cache, METH_VARARGS | METH_KEYWORDS, "Parse the contents of /proc/net/ip_mr_cache into tuples."},
+        {"pack_ip_mr_cache", (PyCFunction)kernel_pack_ip_mr_cache, METH_VARARGS | METH_KEYWORDS, "Parse the contents of /proc/net/ip_mr_cache into packed records."},
+        {"parse_ip_mr_vif", (PyCFunction)kernel_parse_ip_mr_vif, METH_VARARGS | METH_KEYWORDS, "Parse the contents of /proc/net/ip_mr_vif into tuples."},
+        {"get_sg_counts", (PyCFunction)kernel_get_sg_counts, METH_VARARGS | METH_KEYWORDS, "Get the counters of many (source, group) pairs with SIOCGETSGCNT."},
+        {"get_vif_counts", (PyCFunction)kernel_get_vif_counts, METH_VARARGS | METH_KEYWORDS, "Get the counters of many VIFs with SIOCGETVIFCNT."},
+        {"add_mfc_many", (PyCFunction)kernel_add_mfc_many, METH_VARARGS | METH_KEYWORDS, "Add many multicast forwarding cache entries."},
+        {"del_mfc_many", (PyCFunction)kernel_del_mfc_many, METH_VARARGS | METH_KEYWORDS, "Delete many multicast forwarding cache entries."},
+        {"classify_packet", (PyCFunction)kernel_classify_packet, METH_VARARGS | METH_KEYWORDS, "Classify a packet read from the multicast routing socket."},
+        {"recv_batch", (PyCFunction)kernel_recv_batch, METH_VARARGS | METH_KEYWORDS, "Receive and classify a batch of packets from the multicast routing socket with recvmmsg."},
         {NULL, NULL, 0, NULL}
 };
 
@@ -783,6 +1360,35 @@ PyMODINIT_FUNC PyInit__kernel(void) {
 #ifdef  SIOCGETRPF
     PyModule_AddIntMacro(m, SIOCGETVIFCNT);
 #endif
+#ifdef  RTNL_FAMILY_IPMR
+    PyModule_AddIntMacro(m, RTNL_FAMILY_IPMR); /* Netlink address family of the IPv4 multicast routing tables */
+#endif
+#ifdef  RTNLGRP_IPV4_MROUTE
+    PyModule_AddIntMacro(m, RTNLGRP_IPV4_MROUTE); /* Netlink multicast group for IPv4 MFC changes */
+#endif
+#ifdef  RTNLGRP_LINK
+    PyModule_AddIntMacro(m, RTNLGRP_LINK); /* Netlink multicast group for network interface changes */
+#endif
+#ifdef  RTNLGRP_IPV4_IFADDR
+    PyModule_AddIntMacro(m, RTNLGRP_IPV4_IFADDR); /* Netlink multicast group for IPv4 address changes */
+#endif
+    PyModule_AddIntConstant(m, "RT_TABLE_DEFAULT", RT_TABLE_DEFAULT); /* The multicast routing table used without MRT_TABLE */
+    PyModule_AddIntConstant(m, "MFC_RECORD_SIZE", sizeof(struct mfc_record));  /* Size of records from pack_ip_mr_cache */
+    PyModule_AddIntConstant(m, "SG_COUNT_RECORD_SIZE", sizeof(struct sg_count_record));  /* Size of records from get_sg_counts */
+    PyModule_AddIntConstant(m, "VIF_COUNT_RECORD_SIZE", sizeof(struct vif_count_record));  /* Size of records from get_vif_counts */
+    PyModule_AddIntConstant(m, "MFCCTL_RECORD_SIZE", sizeof(struct mfcctl_record));  /* Size of records for add_mfc_many */
+    PyModule_AddIntMacro(m, PACKET_CONTROL);  /* Kinds of packets from classify_packet */
+    PyModule_AddIntMacro(m, PACKET_IGMP);
+    PyModule_AddIntMacro(m, PACKET_PIM);
+    PyModule_AddIntMacro(m, PACKET_OTHER);
+    PyModule_AddIntMacro(m, PACKET_INVALID);  /* Only from recv_batch */
+    PyModule_AddIntMacro(m, RECV_BATCH_MAX);  /* Most messages received by one call to recv_batch */
+
+    PacketInfoType = PyStructSequence_NewType(&packet_info_desc);
+    if (PacketInfoType == NULL || PyModule_AddObjectRef(m, "PacketInfo", (PyObject *) PacketInfoType) < 0) {
+        Py_DECREF(m);
+        return NULL;
+    }
     return m;
 }
 
@@ -32,6 +32,15 @@ PyObject *kernel_add_mfc(PyObject *self, PyObject *args, PyObject* kwargs);
 PyObject *kernel_del_mfc(PyObject *self, PyObject *args, PyObject* kwargs);
 PyObject *kernel_add_vif(PyObject* self, PyObject* args, PyObject* kwargs);
 PyObject *kernel_del_vif(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_parse_ip_mr_cache(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_pack_ip_mr_cache(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_parse_ip_mr_vif(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_get_sg_counts(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_get_vif_counts(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_add_mfc_many(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_del_mfc_many(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_classify_packet(PyObject *self, PyObject *args, PyObject* kwargs);
+PyObject *kernel_recv_batch(PyObject *self, PyObject *args, PyObject* kwargs);
 
 
 #endif //PYGMP__KERNEL_H
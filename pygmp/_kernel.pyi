@@ -24,6 +24,7 @@ from __future__ import annotations
 
 from socket import SocketType
 from typing import Any, Final
+from typing_extensions import Buffer
 
 
 MRT_INIT: Final[int]
@@ -55,15 +56,41 @@ MAXVIFS: Final[int]
 SIOCGETVIFCNT: Final[int]
 SIOCGETSGCNT: Final[int]
 SIOCGETRPF: Final[int]
+RTNL_FAMILY_IPMR: Final[int]
+RTNLGRP_IPV4_MROUTE: Final[int]
+RTNLGRP_LINK: Final[int]
+RTNLGRP_IPV4_IFADDR: Final[int]
+RT_TABLE_DEFAULT: Final[int]
+MFC_RECORD_SIZE: Final[int]
+SG_COUNT_RECORD_SIZE: Final[int]
+VIF_COUNT_RECORD_SIZE: Final[int]
+MFCCTL_RECORD_SIZE: Final[int]
+PACKET_CONTROL: Final[int]
+PACKET_IGMP: Final[int]
+PACKET_PIM: Final[int]
+PACKET_OTHER: Final[int]
+PACKET_INVALID: Final[int]
+RECV_BATCH_MAX: Final[int]
+
+
+class PacketInfo(tuple):
+    kind: int
+    type: int
+    vif: int
+    src: int
+    dst: int
+    group: int
+    offset: int
+    length: int
 
 
 def network_interfaces() -> list[dict[str, Any]]:
     ...
 
-def add_mfc(sock: SocketType, src_str: str, grp_str: str, parent_vif: int, ttls: list[int]) -> None:
+def add_mfc(sock: SocketType, src_str: str | int, grp_str: str | int, parent_vif: int, ttls: list[int] | Buffer) -> None:
     ...
 
-def del_mfc(sock: SocketType, src_str: str, grp_str: str, parent_vif: int) -> None:
+def del_mfc(sock: SocketType, src_str: str | int, grp_str: str | int, parent_vif: int) -> None:
     ...
 
 def add_vif(sock: SocketType, vifi: int, threshold: int, rate_limit: int, lcl_addr: str, rmt_addr: str) -> None:
@@ -72,11 +99,38 @@ def add_vif(sock: SocketType, vifi: int, threshold: int, rate_limit: int, lcl_ad
 def del_vif(sock: SocketType, vifi: int) -> None:
     ...
 
-def parse_igmp_control(buffer: bytes) -> dict[str, Any]:
+def parse_igmp_control(buffer: bytes, int_addresses: bool = False) -> dict[str, Any]:
     ...
 
-def parse_ip_header(buffer: bytes) -> dict[str, Any]:
+def parse_ip_header(buffer: bytes, int_addresses: bool = False) -> dict[str, Any]:
     ...
 
 def parse_igmp(buffer: bytes) -> dict[str, Any]:
     ...
+
+def parse_ip_mr_cache(buffer: Buffer) -> list[tuple[int, int, int, int, int, int, dict[int, int]]]:
+    ...
+
+def pack_ip_mr_cache(buffer: Buffer) -> bytearray:
+    ...
+
+def parse_ip_mr_vif(buffer: Buffer) -> list[tuple[int, str, int, int, int, int, int, int, int]]:
+    ...
+
+def get_sg_counts(sock: SocketType, pairs: Buffer, out: Buffer) -> int:
+    ...
+
+def get_vif_counts(sock: SocketType, vifs: Buffer, out: Buffer) -> int:
+    ...
+
+def add_mfc_many(sock: SocketType, records: Buffer, errors: Buffer) -> int:
+    ...
+
+def del_mfc_many(sock: SocketType, records: Buffer, errors: Buffer) -> int:
+    ...
+
+def classify_packet(buffer: Buffer) -> PacketInfo:
+    ...
+
+def recv_batch(sock: SocketType, ring: Buffer, slot_size: int, timeout_ms: int = -1) -> list[PacketInfo]:
+    ...
@@ -0,0 +1,96 @@
+#  MIT License
+#
+#  Copyright (c) 2023 Jack Hart
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""asyncio integration for the multicast routing socket.
+
+    PacketReader registers the socket with the running event loop (loop.add_reader) instead of blocking a thread in
+    recv, and reads each wakeup's messages in one batch with kernel.PacketRing.  Kernel upcalls can then be handled on
+    the same loop as the rest of a daemon's work:
+
+        reader = aio.PacketReader(sock)
+        async for msg in reader:
+            if isinstance(msg, IGMPControl):
+                ...
+
+    The reader puts the socket in non-blocking mode.
+"""
+from __future__ import annotations
+import asyncio
+from typing import AsyncIterator
+
+from pygmp import kernel, _kernel
+from pygmp.data import IGMPControl
+
+
+class PacketReader:
+    """Asynchronous batched reads from a multicast routing socket.
+
+        Iterating over the reader yields each message as it is received: the IGMPControl of a kernel upcall, or the
+        PacketInfo of any other packet (see kernel.classify_packet()).  receive() and messages() return whole batches.
+    """
+
+    def __init__(self, sock: kernel.InetRawSocketType, batch_size: int = 64, buffer_size: int = 6000):
+        self.sock = sock
+        self._ring = kernel.PacketRing(sock, batch_size, buffer_size)
+        sock.setblocking(False)
+
+    def __aiter__(self) -> AsyncIterator[IGMPControl | _kernel.PacketInfo]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[IGMPControl | _kernel.PacketInfo]:
+        while True:
+            for msg in await self.messages():
+                yield msg
+
+    async def receive(self) -> list[_kernel.PacketInfo]:
+        """Wait for the next batch of messages, and return their PacketInfo.  See kernel.PacketRing.receive()."""
+        return await self._read(self._ring.receive)
+
+    async def messages(self) -> list[IGMPControl | _kernel.PacketInfo]:
+        """Like receive(), but with the IGMPControl of each kernel upcall in place of its PacketInfo."""
+        return await self._read(self._ring.messages)
+
+    def packet(self, index: int, info: _kernel.PacketInfo) -> memoryview:
+        """The bytes of the message in slot index of the last batch.  See kernel.PacketRing.packet()."""
+        return self._ring.packet(index, info)
+
+    async def _read(self, read):
+        while True:
+            batch = read(0)
+            if batch:
+                return batch
+            await self._readable()
+
+    async def _readable(self) -> None:
+        """Wait until the socket is readable.  Raises ValueError if the socket is closed."""
+        loop = asyncio.get_running_loop()
+        fd = self.sock.fileno()
+        future = loop.create_future()
+        loop.add_reader(fd, _set_done, future)
+        try:
+            await future
+        finally:
+            loop.remove_reader(fd)
+
+
+def _set_done(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
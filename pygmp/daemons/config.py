@@ -21,13 +21,14 @@
 #  SOFTWARE.
 from __future__ import annotations
 import configparser
-from ipaddress import ip_address, IPv4Address
+from ipaddress import IPv4Address
 from dataclasses import dataclass
 
-from pygmp import kernel, data
+from pygmp import kernel, data, _kernel
+from pygmp.utils import intern_address
 
 
-_DEFAULT_SOURCE = ip_address("0.0.0.0")
+_DEFAULT_SOURCE = intern_address("0.0.0.0")
 _MROUTE_PREFIX = "mroute_"
 
 
@@ -38,6 +39,7 @@ class MRoute:
     group: IPv4Address
     to: dict[str, int]
     source: IPv4Address = _DEFAULT_SOURCE
+    table: int = _kernel.RT_TABLE_DEFAULT  # multicast routing table (MRT_TABLE) the route is programmed in
 
 
 @dataclass
@@ -62,9 +64,10 @@ def _parse_mroutes(config_parser: configparser.ConfigParser) -> list[MRoute]:
         if name.startswith(_MROUTE_PREFIX):
             outgoing_interface_dict = _parse_outgoing_map(config_parser.get(name, "to"))
             group = _parse_group_address(config_parser.get(name, "group"))
-            source = ip_address(config_parser.get(name, "source", fallback="0.0.0.0"))
+            source = intern_address(config_parser.get(name, "source", fallback="0.0.0.0"))
+            table = config_parser.getint(name, "table", fallback=_kernel.RT_TABLE_DEFAULT)
             mroutes.append(MRoute(from_=config_parser.get(name, "from"), group=group,
-                                  to=outgoing_interface_dict, source=source))
+                                  to=outgoing_interface_dict, source=source, table=table))
     return mroutes
 
 
@@ -77,7 +80,7 @@ def _parse_phyints(config_parser: configparser.ConfigParser):
 
 def _parse_group_address(group_address: str) -> IPv4Address:
     """Validate and convert group address to IPv4Address object."""
-    group = ip_address(group_address) # TODO - prefix len support
+    group = intern_address(group_address) # TODO - prefix len support
     if not group.is_multicast:
         raise ValueError(f"Invalid group address {group_address}")
 
@@ -34,7 +34,7 @@ from contextlib import contextmanager
 import threading
 import queue
 
-from pygmp import kernel, data
+from pygmp import kernel, data, packet
 from pygmp.daemons.utils import get_logger
 
 
@@ -288,19 +288,20 @@ def _clean(sock: kernel.InetRawSocketType):
 
 
 def _read_from_socket(sock, qu):
+    ring = kernel.PacketRing(sock, buffer_size=6000)  # FIXME - buffer size
     try:
         while True:
-            buff, _ = sock.recvfrom(6000) # FIXME - buffer size
-            qu.put(_filter_ip(kernel.parse_ip_header(buff), buff))
+            for index, info in enumerate(ring.receive()):
+                qu.put(_filter_packet(info, ring.packet(index, info)))
     except Exception:
         _logger.exception("Error in read_from_socket thread.  This will be ignored.")
 
 
-def _filter_ip(ip_header: data.IPHeader, buffer: bytes):
-    if ip_header.protocol == data.IPProtocol.IGMP:
-        return kernel.parse_igmp(buffer[ip_header.ihl * 4:])
-    if ip_header.protocol == data.IPProtocol.CONTROL:
-        return kernel.parse_igmp_control(buffer)
+def _filter_packet(info, buffer: memoryview):
+    if info.kind == data.PacketKind.IGMP:
+        return packet.view(buffer, info).materialize()
+    if info.kind == data.PacketKind.CONTROL:
+        return kernel.igmp_control(info)
     _logger.warning("warning, skipping packet...")
 
 
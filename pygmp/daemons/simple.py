@@ -25,71 +25,141 @@
 #  SOFTWARE.
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from contextlib import ExitStack
+from dataclasses import dataclass
+import functools
 from ipaddress import IPv4Address
+from typing import Iterable
+import os
 import threading
+import time
 from pygmp.daemons.utils import get_logger, search_dict_lists
 from pygmp.daemons.config import load_config, MRoute
-from pygmp import kernel, data
+from pygmp import aio, kernel, data, utils, _kernel
 
 
 logger = get_logger(__name__)
 
 ANY_ADDR = "0.0.0.0"  # TODO - get constant from C extension
+_ANY = utils.intern_address(ANY_ADDR)
 BUFFER_SIZE = 6000  # TODO - think through buffer size
+BATCH_SIZE = 64  # Most messages received per wakeup of a listener
+RECEIVE_TIMEOUT = 1.0  # Seconds a listener waits before checking whether its socket was closed
+UPCALL_WINDOW = 1.0  # Seconds repeated NOCACHE upcalls for the same (source, group, vif) are suppressed
+RECONCILE_INTERVAL = 30.0  # Seconds between reconciliations of the VIF registries and shadow MFC tables with the kernel
 
 
 def main(sock, args, app):
+    """Run the daemon on sock for the default table, plus one socket and listener for every other table in the config.
+
+        The REST API manages the default table.  With args.single_loop, the listeners run as tasks on the event loop
+        of the app instead of in threads, so upcalls are handled on the same loop as API requests.
+    """
     config = load_config(args.config)
+    single_loop = getattr(args, "single_loop", False)
+    table_sockets = ExitStack()
+
+    managers = {}
+    for table in sorted({mroute.table for mroute in config.mroute} | {_kernel.RT_TABLE_DEFAULT}):
+        table_sock = sock if table == _kernel.RT_TABLE_DEFAULT else table_sockets.enter_context(kernel.igmp_socket(table))
+        managers[table] = start_table(table_sock, config.phyint, [m for m in config.mroute if m.table == table], table,
+                                      listener=not single_loop)
+
+    if single_loop:
+        start_loop_listeners(app, [handler for _, _, handler in managers.values()])
+    app.router.add_event_handler("shutdown", table_sockets.close)  # after the listeners stop
+    return setup_app(app, *managers[_kernel.RT_TABLE_DEFAULT], single_loop=single_loop)
+
+
+def _plain(func):
+    return func
+
+
+def _on_loop(func):
+    """Make a route a coroutine that runs func on the event loop."""
+    @functools.wraps(func)
+    async def route(*args, **kwargs):
+        return func(*args, **kwargs)
+    return route
+
+
+def _in_executor(func):
+    """Make a route a coroutine that runs func in the executor of the event loop, so it does not block the loop."""
+    @functools.wraps(func)
+    async def route(*args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+    return route
+
+
+def start_table(sock, phyint: list[data.Interface], mroutes: list[MRoute], table: int = _kernel.RT_TABLE_DEFAULT,
+                listener: bool = True):
+    """Enable multicast routing on sock for a table, program its VIFs and routes, and start its listener thread and
+        the thread that reconciles its VIF registry and shadow MFC table with the kernel.
+
+        Without listener, no thread is started; see start_loop_listeners().
+    """
     kernel.flush(sock)
     kernel.disable_pim(sock)
     kernel.enable_mrt(sock)
 
-    vif_manager = VifManager(sock, config.phyint)
-    mfc_manager = MfcManager(sock, vif_manager, config.mroute)
+    vif_manager = VifManager(sock, phyint, table)
+    mfc_manager = MfcManager(sock, vif_manager, mroutes)
     control_msg_handler = ControlMessageHandler(sock, mfc_manager, vif_manager)
+    if listener:
+        _ = start_socket_listener(sock, control_msg_handler)
+        _ = start_reconciler(mfc_manager)
+    return vif_manager, mfc_manager, control_msg_handler
 
-    app = setup_app(app, vif_manager, mfc_manager, control_msg_handler)
-    _ = start_socket_listener(sock, control_msg_handler)
 
-    return app
+def setup_app(app, vif_manager, mfc_manager, control_msg_handler, single_loop: bool = False):
+    # The routes are plain functions, which FastAPI runs in its threadpool.  With single_loop, they are coroutines on
+    # the loop of start_loop_listeners(), and the ones that block (/proc reads, setsockopt, netlink) are run in the
+    # executor of the loop.
+    blocking = _in_executor if single_loop else _plain
+    in_memory = _on_loop if single_loop else _plain
 
-
-def setup_app(app, vif_manager, mfc_manager, control_msg_handler):
     @app.get("/vifs")
+    @blocking
     def vifs():
         return vif_manager.vifs()
 
     @app.get("/vifs/{interface_name}")
+    @blocking
     def vifs_by_name(interface_name: str):
         return vif_manager.vifs()[interface_name]  # TODO - handle KeyError
 
     @app.get("/static_mfc")
+    @in_memory
     def static_mfc():
         return mfc_manager.static_mfc()
 
     @app.get("/static_mfc/{vif_index}")
+    @in_memory
     def static_mfc_by_vifi(vif_index: int):
         return mfc_manager.static_mfc()[vif_index]  # TODO - handle KeyError
 
     @app.get("/dynamic_mfc")
+    @in_memory
     def dynamic_mfc():
         return mfc_manager.dynamic_mfc()
 
     @app.get("/dynamic_mfc/{vif_index}")
+    @in_memory
     def dynamic_mfc_by_vifi(vif_index: int):
         return mfc_manager.dynamic_mfc()[vif_index] # TODO - handle KeyError
 
     @app.post("/vifs")
+    @blocking
     def add_vif(interface_address_or_index: IPv4Address | int, mcast_index: int | None = None):
-        interfaces = kernel.network_interfaces()
+        interfaces = kernel.interface_registry()
         if isinstance(interface_address_or_index, IPv4Address):
-            match = next((interface for interface in interfaces.values()
-                          if str(interface_address_or_index) in interface.addresses), None)
+            match = interfaces.by_address(interface_address_or_index)
             if not match:
                 raise ValueError(f"Could not find interface with address {interface_address_or_index}.")
         else:
-            match = next((interface for interface in interfaces.values()
-                            if interface.index == interface_address_or_index), None)
+            match = interfaces.by_index(interface_address_or_index)
             if not match:
                 raise ValueError(f"Could not find interface with index {interface_address_or_index}.")
 
@@ -97,6 +167,7 @@ def setup_app(app, vif_manager, mfc_manager, control_msg_handler):
         return vif_manager.vifs()[match.name]
 
     @app.delete("/vifs/{interface_name}")
+    @blocking
     def delete_vif(interface_name_or_index: str | int):
         if isinstance(interface_name_or_index, str):
             vif_manager.remove_by_name(interface_name_or_index)
@@ -105,71 +176,145 @@ def setup_app(app, vif_manager, mfc_manager, control_msg_handler):
 
     # TODO - POST and DELETE mfc
     @app.post("/mfc")
+    @blocking
     def add_mfc(mroute: MRoute):
         mfc_manager.add(mroute)
         if mroute.source == ANY_ADDR:
             return mfc_manager.dynamic_mfc()[mroute.from_][-1]
         return mfc_manager.static_mfc()[mroute.from_][-1]
 
+    @app.get("/upcalls")
+    @in_memory
+    def upcalls():
+        return control_msg_handler.coalescer.counters
+
     @app.delete("/mfc")
+    @blocking
     def delete_mfc(mroute: MRoute):
-        # FIXME - ttl mapping shouldn't matter
         mfc_manager.remove(mroute)
 
     return app
 
 
+class VifRegistry:
+    """The VIFs of a table: interface name <-> VIF index maps, and a bitmap of the free VIF slots.
+
+        Lookups and allocating a slot are O(1), and never read the kernel's table.
+    """
+
+    _ALL_SLOTS = (1 << _kernel.MAXVIFS) - 1
+
+    def __init__(self, entries: Iterable[data.VIFTableEntry] = ()):
+        self._vifi_by_name: dict[str, int] = {}
+        self._name_by_vifi: dict[int, str] = {}
+        self._free = self._ALL_SLOTS  # bit i is set if VIF index i is free
+        for entry in entries:
+            self.add(entry.index, entry.name)
+
+    def __len__(self) -> int:
+        return len(self._name_by_vifi)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._vifi_by_name
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VifRegistry):
+            return NotImplemented
+        return self._name_by_vifi == other._name_by_vifi
+
+    @property
+    def size(self) -> int:
+        """One more than the highest VIF index in use, i.e., the length of a TTL list covering every VIF."""
+        return (self._free ^ self._ALL_SLOTS).bit_length()
+
+    def vifi(self, name: str) -> int:
+        """Raises KeyError if no VIF is registered for the interface."""
+        return self._vifi_by_name[name]
+
+    def name(self, vifi: int) -> str:
+        """Raises KeyError if the VIF index is not in use."""
+        return self._name_by_vifi[vifi]
+
+    def allocate(self) -> int:
+        """The lowest free VIF index.  Raises ValueError if all MAXVIFS are in use."""
+        if not self._free:
+            raise ValueError(f"All {_kernel.MAXVIFS} VIFs are in use.")
+        return (self._free & -self._free).bit_length() - 1
+
+    def add(self, vifi: int, name: str) -> None:
+        self._vifi_by_name[name] = vifi
+        self._name_by_vifi[vifi] = name
+        self._free &= ~(1 << vifi)
+
+    def remove(self, vifi: int) -> None:
+        name = self._name_by_vifi.pop(vifi, None)
+        if self._vifi_by_name.get(name) == vifi:
+            del self._vifi_by_name[name]
+        self._free |= 1 << vifi
+
+
 class VifManager:
     # FIXME - VIF can represent a physical interface OR an addresses.
     #  (The address does not imply the src address of a packet, but rather, the IP address on an interface.)
-    def __init__(self, sock: kernel.InetRawSocketType, phyint: list[data.Interface] | None = None):
+    def __init__(self, sock: kernel.InetRawSocketType, phyint: list[data.Interface] | None = None,
+                 table: int = _kernel.RT_TABLE_DEFAULT):
         self.sock = sock
-        self._vif_name_list = list(self.vifs().keys())
+        self.table = table
+        self.registry = VifRegistry()
+        self.generation = 0  # incremented whenever the VIF table changes
+        self.reconcile()
         if phyint:
             for i, interf in enumerate(phyint):
                 self.add(interf, i)
 
     def vifs(self) -> dict[str, data.VIFTableEntry]:
         """Returns a dictionary of the virtual multicast interfaces registered in the kernel."""
-        vif_table = {entry.name: entry for entry in kernel.ip_mr_vif()}
+        vif_table = {entry.name: entry for entry in kernel.ip_mr_vif(table=self.table)}
         return vif_table
 
+    def reconcile(self) -> None:
+        """Rebuild the registry from the kernel's VIF table."""
+        registry = VifRegistry(kernel.ip_mr_vif(table=self.table))
+        if registry != self.registry:
+            self.registry = registry
+            self.generation += 1
+
     def vifi(self, name) -> int:
         """Returns the multicast VIF index for the given interface."""
         try:
-            return self._vif_name_list.index(name)
-        except ValueError as e:
+            return self.registry.vifi(name)
+        except KeyError as e:
             raise ValueError(f"Could not find index for Interface {name}.") from e
 
     def add(self, interf: data.Interface, mcast_index: int | None = None):
-        """Adds a virtual multicast interface to the kernel.
+        """Adds a virtual multicast interface to the kernel, in the lowest free VIF slot.
             If index is provided, it is used and the interface is not checked for existence before adding.
         """
         if not mcast_index:
-            vifs = self.vifs()
-            if interf.name in vifs:
+            if interf.name in self.registry:
                 raise ValueError(f"Interface {interf.name} already exists.")
-            mcast_index = len(vifs)
+            mcast_index = self.registry.allocate()
         kernel.add_vif(self.sock, data.VifCtl(vifi=mcast_index, lcl_addr=int(interf.index)))
-        self._vif_name_list = list(self.vifs().keys())
+        self.registry.add(mcast_index, interf.name)
+        self.generation += 1
 
     def remove_by_index(self, mc_index: int):
         """Removes a virtual multicast interface from the kernel by multicast index."""
         vifctl = data.VifCtl(vifi=mc_index, lcl_addr=ANY_ADDR)
         kernel.del_vif(self.sock, vifctl)
-        self._vif_name_list = list(self.vifs().keys())
+        self.registry.remove(mc_index)
+        self.generation += 1
 
     def remove_by_name(self, interface_name: str):
         """Removes a virtual multicast interface from the kernel by name."""
         try:
-            vif_entry = self.vifs()[interface_name]
+            vifi = self.registry.vifi(interface_name)
         except KeyError as e:
             raise ValueError(f"Interface {interface_name} does not exist.") from e
-        # FIXME - interface vs address
-        kernel.del_vif(self.sock, data.VifCtl(vifi=vif_entry.index, lcl_addr=vif_entry.local_addr_or_interface))
+        self.remove_by_index(vifi)
 
     def make_ttls_list(self, phyints: dict[str | int, int]):
-        ttls = [0] * len(self._vif_name_list)
+        ttls = [0] * self.registry.size
         for inter, ttl in phyints.items():
             if isinstance(inter, str):
                 inter = self.vifi(inter)
@@ -179,102 +324,347 @@ class VifManager:
                 raise ValueError(f"Interface of index {inter} does not exist.") from e
         return ttls
 
+    def make_ttls(self, phyints: dict[str | int, int]) -> bytes:
+        """Like make_ttls_list, but as an immutable buffer that can be saved and passed to add_mfc as-is."""
+        return bytes(self.make_ttls_list(phyints))
+
 
 class MfcManager:
+    """Routes of one table.  Static routes are programmed into the kernel; dynamic (*,G) routes are kept here and
+        programmed as (S,G) entries when upcalls match them.
+
+        The manager keeps a shadow of the kernel's MFC for its table, so static_mfc() is served from memory.  It is
+        updated on every change made through the manager, and replaced with the kernel's table by reconcile(), which
+        also picks up the current counters and any changes made by others.
+    """
+
     def __init__(self, sock, vif_manager, mroute_list: list[MRoute] | None = None):
         self.sock = sock
         self.vif_manager = vif_manager
         self._dynamic_mroutes = {}
+        self._ttls: dict[tuple[int, IPv4Address, IPv4Address], bytes] = {}  # TTL buffers of matched routes, by key
+        self._ttls_generation = vif_manager.generation  # of the VIF table the TTL buffers were built for
+        self._routes: dict[tuple[int, IPv4Address, IPv4Address], MRoute] = {}  # by (parent, group, source)
+        self._shadow: dict[tuple[IPv4Address, IPv4Address], data.MFCEntry] = {}  # by (origin, group)
+        self._static_mfc: dict[int, list[data.MFCEntry]] | None = None  # static_mfc(), until the shadow changes
+        self._shadow_lock = threading.Lock()
+        self.reconcile()
         if mroute_list:
+            self._add_static_mroutes([mroute for mroute in mroute_list if str(mroute.source) != ANY_ADDR])
             for mroute in mroute_list:
-                self.add(mroute)
+                if str(mroute.source) == ANY_ADDR:
+                    self.add(mroute)
 
     def static_mfc(self) -> dict[int, list[data.MFCEntry]]:
-        result = {}
-        for entry in kernel.ip_mr_cache():
-            if result.get(entry.iif):
-                result[entry.iif].append(entry)
-            else:
-                result[entry.iif] = [entry]
+        """The kernel's MFC entries for the table by incoming VIF, from the shadow table.
+
+            Counters are as of the last reconcile(), and are 0 for entries added since.
+        """
+        result = self._static_mfc
+        if result is None:
+            with self._shadow_lock:
+                result = {}
+                for entry in self._shadow.values():
+                    result.setdefault(entry.iif, []).append(entry)
+                self._static_mfc = result
         return result
 
+    def reconcile(self) -> None:
+        """Replace the shadow table with the kernel's MFC for the table."""
+        with self._shadow_lock:
+            self._shadow = {(entry.origin, entry.group): entry
+                            for entry in kernel.ip_mr_cache(table=self.vif_manager.table)}
+            self._static_mfc = None
+
+    def install(self, mfcctl: data.MfcCtl) -> None:
+        """Program an (S,G) entry into the kernel, e.g., for an upcall that matched a route, and shadow it."""
+        kernel.add_mfc(self.sock, mfcctl)
+        self._shadow_add(mfcctl)
+
     def dynamic_mfc(self) -> dict[int, list[data.MFCEntry]]:
         return self._dynamic_mroutes
 
+    def ttls(self, vifi: int, route: MRoute | data.MFCEntry) -> bytes:
+        """TTL buffer for a route matched on a VIF.  Built once per route, then reused until the route or the VIF table
+            changes.
+        """
+        if self._ttls_generation != self.vif_manager.generation:
+            self._ttls.clear()
+            self._ttls_generation = self.vif_manager.generation
+        key = _route_key(vifi, route.group, route.source if isinstance(route, MRoute) else route.origin)
+        ttls = self._ttls.get(key)
+        if ttls is None:
+            ttls = self._ttls[key] = self.vif_manager.make_ttls(route.to if isinstance(route, MRoute) else route.oifs)
+        return ttls
+
     def add(self, mroute: MRoute):
-        if str(mroute.source) == ANY_ADDR:
-            vifi = self.vif_manager.vifi(mroute.from_)
-            if self._dynamic_mroutes.get(vifi):
-                self._dynamic_mroutes[vifi][self._dynamic_mroutes[vifi].index(mroute)] = mroute # FIXME throws ValueError
+        vifi = self.vif_manager.vifi(mroute.from_)
+        key = _route_key(vifi, mroute.group, mroute.source)
+        self._ttls.pop(key, None)
+        if key[2] == _ANY:
+            routes = self._dynamic_mroutes.setdefault(vifi, [])
+            previous = self._routes.get(key)
+            if previous is not None:
+                routes[routes.index(previous)] = mroute
             else:
-                self._dynamic_mroutes[vifi] = [mroute]
+                routes.append(mroute)
         else:
             self._add_mfc_syscall(mroute)
+        self._routes[key] = mroute
 
     def remove(self, mroute: MRoute):
         parent = self.vif_manager.vifi(mroute.from_)
-        if str(mroute.source) == ANY_ADDR:
-            if self._dynamic_mroutes.get(parent):
-                self._dynamic_mroutes[parent].remove(mroute)
-                if not self._dynamic_mroutes[parent]:
-                    del self._dynamic_mroutes[parent]
-            else:
+        key = _route_key(parent, mroute.group, mroute.source)
+        self._ttls.pop(key, None)
+        if key[2] == _ANY:  # matched by key, so the outgoing interfaces of the given route don't matter
+            route = self._routes.get(key)
+            if route is None:
                 raise ValueError(f"Dynamic MRoute {mroute} does not exist.")
+            routes = self._dynamic_mroutes[parent]
+            routes.remove(route)
+            if not routes:
+                del self._dynamic_mroutes[parent]
         else:
             kernel.del_mfc(self.sock, data.MfcCtl(origin=mroute.source, mcastgroup=mroute.group, parent=parent, ttls=[]))
+            self._shadow_remove(key[2], key[1])
+        self._routes.pop(key, None)
 
-    def match(self, vifi, group, source_address=ANY_ADDR) -> data.MFCEntry | None:
-        try:
-            if str(source_address) == ANY_ADDR:
-                return next((route for route in self.dynamic_mfc()[vifi] if str(route.group) == str(group)), None)
-            return next((route for route in self.static_mfc()[vifi] if str(route.group) == str(group) and str(route.origin) == source_address), None)
-        except KeyError:
-            return None
+    def match(self, vifi, group, source_address=ANY_ADDR) -> MRoute | None:
+        """The route for packets to group from source_address arriving on vifi: the static (S,G) route if there is
+            one, else the dynamic (*,G) route.  A lookup in the route index, so it never reads the kernel's table.
+        """
+        key = _route_key(vifi, group, source_address)
+        route = self._routes.get(key)
+        if route is None and key[2] != _ANY:
+            route = self._routes.get((vifi, key[1], _ANY))
+        return route
 
     def _add_mfc_syscall(self, mroute: MRoute):
-        mfcctl = data.MfcCtl(origin=mroute.source,
-                             mcastgroup=mroute.group,
-                             parent=self.vif_manager.vifi(mroute.from_), 
-                             ttls=self.vif_manager.make_ttls_list(mroute.to))
-        kernel.add_mfc(self.sock, mfcctl)
+        self.install(self._mfcctl(mroute))
+
+    def _add_static_mroutes(self, mroutes: list[MRoute]):
+        """Program all static routes with one batched call.  Raises OSError if any of them fail."""
+        mfcctls = [self._mfcctl(mroute) for mroute in mroutes]
+        errors = kernel.add_mfc_many(self.sock, mfcctls)
+        failed = [(mroute, error) for mroute, error in zip(mroutes, errors) if error]
+        for mroute, mfcctl, error in zip(mroutes, mfcctls, errors):
+            if not error:
+                self._routes[_route_key(mfcctl.parent, mroute.group, mroute.source)] = mroute
+                self._shadow_add(mfcctl)
+        for mroute, error in failed:
+            logger.error(f"Failed to add static MRoute {mroute}: {os.strerror(error)}")
+        if failed:
+            raise OSError(failed[0][1], f"Failed to add {len(failed)} of {len(mroutes)} static MRoutes.")
+
+    def _shadow_add(self, mfcctl: data.MfcCtl) -> None:
+        origin, group = utils.intern_address(mfcctl.origin), utils.intern_address(mfcctl.mcastgroup)
+        oifs = {vifi: ttl for vifi, ttl in enumerate(mfcctl.ttls) if ttl}
+        entry = data.MFCEntry.trusted(group, origin, mfcctl.parent, 0, 0, 0, oifs, self.vif_manager.table)
+        with self._shadow_lock:
+            self._shadow[(origin, group)] = entry
+            self._static_mfc = None
+
+    def _shadow_remove(self, origin: IPv4Address, group: IPv4Address) -> None:
+        with self._shadow_lock:
+            self._shadow.pop((origin, group), None)
+            self._static_mfc = None
+
+    def _mfcctl(self, mroute: MRoute) -> data.MfcCtl:
+        return data.MfcCtl(origin=mroute.source,
+                           mcastgroup=mroute.group,
+                           parent=self.vif_manager.vifi(mroute.from_),
+                           ttls=self.vif_manager.make_ttls(mroute.to))
+
+
+@dataclass
+class UpcallCounters:
+    """Counts of the NOCACHE upcalls seen by an UpcallCoalescer."""
+    received: int = 0  #: All NOCACHE upcalls
+    handled: int = 0  #: Upcalls that were handled
+    suppressed: int = 0  #: Duplicates of an upcall handled within the window, which were dropped
+    failed: int = 0  #: Upcalls whose handling raised an error
+
+
+class UpcallCoalescer:
+    """Deduplicates NOCACHE upcalls for the same (source, group, vif).
+
+        Until its MFC entry is installed, the kernel sends an upcall for every packet of a new (S,G), and packets queued
+        before the entry landed still cause upcalls after it.  The first upcall for a key starts a window of `window`
+        seconds; the key is in flight for that window, and further upcalls for it are counted and dropped.  If handling
+        fails, the key is released so the next upcall retries.
+    """
+
+    def __init__(self, window: float = UPCALL_WINDOW, clock=time.monotonic):
+        self.window = window
+        self.counters = UpcallCounters()
+        self._clock = clock
+        self._in_flight: OrderedDict[tuple, float] = OrderedDict()  # deadline by key, in order of deadline
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def begin(self, key: tuple) -> bool:
+        """Start handling the upcall for key.  Returns False if it is a duplicate to drop."""
+        now = self._clock()
+        self.counters.received += 1
+        self._expire(now)
+        if key in self._in_flight:
+            self.counters.suppressed += 1
+            return False
+        self._in_flight[key] = now + self.window
+        self.counters.handled += 1
+        return True
+
+    def cancel(self, key: tuple) -> None:
+        """Release a key whose handling failed."""
+        self.counters.failed += 1
+        self._in_flight.pop(key, None)
+
+    def _expire(self, now: float) -> None:
+        while self._in_flight:
+            key, deadline = next(iter(self._in_flight.items()))
+            if deadline > now:
+                return
+            self._in_flight.popitem(last=False)
 
 
 class ControlMessageHandler:
-    def __init__(self, sock, mfc_manager: MfcManager, vif_manager: VifManager):
+    def __init__(self, sock, mfc_manager: MfcManager, vif_manager: VifManager,
+                 coalescer: UpcallCoalescer | None = None):
         self.sock = sock
         self.mfc_manager = mfc_manager
         self.vif_manager = vif_manager
+        self.coalescer = coalescer if coalescer is not None else UpcallCoalescer()
 
     def process_control_message(self, message: data.IGMPControl):
         if message.msgtype == data.ControlMsgType.IGMPMSG_NOCACHE:
-            match = self.mfc_manager.match(message.vif, message.im_dst, message.im_src)
-            if match:  # TODO - move into mfc_manager
-                ttls_list = self.vif_manager.make_ttls_list(match.oifs)
-                mfctl = data.MfcCtl(origin=message.im_src, mcastgroup=message.im_dst, parent=message.vif, ttls=ttls_list)
-                kernel.add_mfc(self.sock, mfctl)
-        # TODO - expand support
-        raise ValueError(f"Unknown control message type {message.msgtype}.")
+            key = (message.im_src, message.im_dst, message.vif)
+            if not self.coalescer.begin(key):
+                return
+            try:
+                self._install_route(message)
+            except Exception:
+                self.coalescer.cancel(key)
+                raise
+        else:
+            # TODO - expand support
+            raise ValueError(f"Unknown control message type {message.msgtype}.")
+
+    def _install_route(self, message: data.IGMPControl):
+        match = self.mfc_manager.match(message.vif, message.im_dst, message.im_src)
+        if match:  # TODO - move into mfc_manager
+            ttls = self.mfc_manager.ttls(message.vif, match)
+            mfctl = data.MfcCtl(origin=message.im_src, mcastgroup=message.im_dst, parent=message.vif, ttls=ttls)
+            self.mfc_manager.install(mfctl)
 
 
 def start_socket_listener(sock, control_message_handler):
-    thread = threading.Thread(target=_daemon_listener, args=(sock, control_message_handler), daemon=True)
+    thread = threading.Thread(target=_daemon_listener, args=(sock, control_message_handler), daemon=True,
+                              name=f"listener-{control_message_handler.vif_manager.table}")
     thread.start()
     return thread
 
 
-def _daemon_listener(sock, control_message_handler):
+def start_reconciler(mfc_manager: MfcManager, interval: float = RECONCILE_INTERVAL):
+    thread = threading.Thread(target=_daemon_reconciler, args=(mfc_manager, interval), daemon=True,
+                              name=f"reconciler-{mfc_manager.vif_manager.table}")
+    thread.start()
+    return thread
+
+
+def _daemon_reconciler(mfc_manager: MfcManager, interval: float):
+    while mfc_manager.sock.fileno() >= 0:
+        time.sleep(interval)
+        _reconcile(mfc_manager)
+
+
+def _reconcile(mfc_manager: MfcManager):
+    try:
+        mfc_manager.vif_manager.reconcile()
+        mfc_manager.reconcile()
+    except Exception:
+        logger.exception("An error occurred reconciling with the kernel.  This will be ignored.")
+
+
+def start_loop_listeners(app, control_message_handlers: list[ControlMessageHandler],
+                         reconcile_interval: float = RECONCILE_INTERVAL) -> None:
+    """Run a listener for the socket of each handler, and a reconciler for its VIF registry and shadow MFC table, as
+        tasks on the event loop of the app, from startup to shutdown.  Each reconcile reads the kernel tables, so it
+        runs in the default executor, as with the reconciler threads, rather than blocking the loop.
+    """
+    tasks = []
+
+    async def start():
+        for handler in control_message_handlers:
+            tasks.append(asyncio.create_task(_loop_listener(handler.sock, handler),
+                                             name=f"listener-{handler.vif_manager.table}"))
+            tasks.append(asyncio.create_task(_loop_reconciler(handler.mfc_manager, reconcile_interval),
+                                             name=f"reconciler-{handler.vif_manager.table}"))
+
+    async def stop():
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    app.router.add_event_handler("startup", start)
+    app.router.add_event_handler("shutdown", stop)
+
+
+async def _loop_listener(sock, control_message_handler, batch_size: int = BATCH_SIZE):
+    logger.info("Listener task starting.")
+    reader = aio.PacketReader(sock, batch_size, BUFFER_SIZE)
+    while True:
+        try:
+            messages = await reader.messages()
+        except Exception:
+            if sock.fileno() < 0:
+                logger.info("Socket closed, listener task stopping.")
+                return
+            logger.exception("An error occurred in task reading multicast routing socket.  This will be ignored.")
+            continue
+        for msg in messages:
+            _process_message(control_message_handler, msg)
+
+
+async def _loop_reconciler(mfc_manager: MfcManager, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.get_running_loop().run_in_executor(None, _reconcile, mfc_manager)
+
+
+def _daemon_listener(sock, control_message_handler, batch_size: int = BATCH_SIZE,
+                     timeout: float | None = RECEIVE_TIMEOUT):
     logger.info("Listener Daemon starting.")
+    ring = kernel.PacketRing(sock, batch_size, BUFFER_SIZE)
     while True:
         try:
-            msg = _read_from_socket(sock)
-            if isinstance(msg, data.IGMPControl):
-                logger.info(f"Control message received: {msg}")
-                control_message_handler.process_control_message(msg)
-            else:
-                logger.warning(f"Warning, skipping packet..{msg}")
+            messages = ring.messages(timeout)
         except Exception:
-            logger.exception("An error occurred in thread reading and processing multicast routing socket."
-                             "  This will be ignored.")
+            if sock.fileno() < 0:
+                logger.info("Socket closed, listener daemon stopping.")
+                return
+            logger.exception("An error occurred in thread reading multicast routing socket.  This will be ignored.")
+            continue
+        for msg in messages:
+            _process_message(control_message_handler, msg)
+
+
+def _process_message(control_message_handler, msg):
+    """Handle one message from the multicast routing socket.  Errors are logged, so the rest of a batch is handled."""
+    try:
+        if isinstance(msg, data.IGMPControl):
+            logger.info(f"Control message received: {msg}")
+            control_message_handler.process_control_message(msg)
+        else:
+            logger.warning(f"Warning, skipping packet..{msg}")
+    except Exception:
+        logger.exception("An error occurred processing a message from the multicast routing socket."
+                         "  This will be ignored.")
+
+
+def _route_key(vifi: int, group, source) -> tuple[int, IPv4Address, IPv4Address]:
+    """Key of a route in MfcManager's index.  The addresses are interned, so any form of them finds the route."""
+    return vifi, utils.intern_address(group), utils.intern_address(source)
 
 
 def _ttls_list(phyints: dict[data.Interface, int], vifs_dict: dict[str, dict]) -> list[int]:
@@ -283,16 +673,3 @@ def _ttls_list(phyints: dict[data.Interface, int], vifs_dict: dict[str, dict]) -
     for inter, ttl in phyints.items():
         ttls[vifs.index(inter.name)] = ttl
     return ttls
-
-
-def _read_from_socket(sock):
-    buff, _ = sock.recvfrom(BUFFER_SIZE)
-    return _filter_ip(kernel.parse_ip_header(buff), buff)
-
-
-def _filter_ip(ip_header: data.IPHeader, buffer: bytes):
-    if ip_header.protocol == data.IPProtocol.IGMP:
-        return kernel.parse_igmp(buffer[ip_header.ihl * 4:])
-    if ip_header.protocol == data.IPProtocol.CONTROL:
-        return kernel.parse_igmp_control(buffer)
-    logger.warning("warning, skipping packet...")
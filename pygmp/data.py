@@ -21,26 +21,49 @@
 #  SOFTWARE.
 from __future__ import annotations  # relevant to PEP 563 (postponed evaluation of annotations)
 
-import ipaddress
 from enum import IntEnum, Enum, EnumMeta
-from dataclasses import dataclass, fields
+from dataclasses import dataclass, fields, MISSING
 from ipaddress import ip_address, IPv4Address, IPv6Address
-from typing import get_args
+from typing import Callable, get_args
 
-from pygmp import _kernel
+from pygmp import _kernel, utils
 
 
 @dataclass
 class Base:
-    """Base dataclass for all other dataclasses"""
+    """Base dataclass for all other dataclasses
+
+    Enum fields are converted from their values, and address fields from strings.  Which fields need converting
+    is worked out once per class, on its first construction, instead of from the type hints of every object.
+    The records built for every packet or table entry are slotted, so they extend __post_init__ with
+    Base.__post_init__(self) rather than super().  The control structures keep their defaults as class attributes.
+    """
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.trusted = classmethod(Base.trusted.__func__)  # compiled for this class on its first call
+
     def __post_init__(self):
-        for field in fields(self):
-            if isinstance(_get_type(field.type), EnumMeta):
-                setattr(self, field.name, _get_type(field.type)(getattr(self, field.name)))
-            elif IPv4Address in set(get_args(_get_type(field.type))):
-                if not isinstance(getattr(self, field.name), str):
-                    continue
-                setattr(self, field.name, ip_address(getattr(self, field.name)))
+        enums, addresses = _converters(type(self))
+        for name, enum in enums:
+            value = getattr(self, name)
+            if not isinstance(value, enum):
+                setattr(self, name, enum(value))
+        for name in addresses:
+            value = getattr(self, name)
+            if isinstance(value, str):
+                setattr(self, name, utils.intern_address(value))
+
+    @classmethod
+    def trusted(cls, *args, **kwargs):
+        """Construct an object without converting its fields.
+
+        For callers, like the parsers in pygmp.kernel, that already pass values of the annotated types.
+        """
+        constructor = _trusted_constructor(cls)
+        cls.trusted = classmethod(constructor)
+        return constructor(cls, *args, **kwargs)
 
 
 class IPVersion(Enum):
@@ -83,6 +106,27 @@ class ControlMsgType(IntEnum):
     IGMPMSG_WRVIFWHOLE = 4
 
 
+class PacketKind(IntEnum):
+    """Kind of packet read from the multicast routing socket, from kernel.classify_packet() or kernel.PacketRing."""
+    CONTROL = 0  #: Upcall from the kernel (struct igmpmsg)
+    IGMP = 1  #: IGMP message
+    PIM = 2  #: PIM message
+    OTHER = 3  #: Any other IP protocol
+    INVALID = 4  #: Too short for the headers of its kind (only from kernel.PacketRing)
+
+
+class MRTBackend(Enum):
+    """Source of the multicast routing tables read by kernel.ip_mr_cache() and kernel.ip_mr_vif()."""
+    PROC = "proc"  #: The /proc/net/ip_mr_cache and /proc/net/ip_mr_vif files
+    NETLINK = "netlink"  #: An rtnetlink dump of the RTNL_FAMILY_IPMR tables
+
+
+class MFCEventType(IntEnum):
+    """Kind of MFC change notification, by rtnetlink message type."""
+    ADD = 24  #: RTM_NEWROUTE, an entry was added or updated
+    DELETE = 25  #: RTM_DELROUTE, an entry was removed
+
+
 class InterfaceFlags(IntEnum):
     """Linux network interface flags"""
     UP = 1 << 0
@@ -133,8 +177,8 @@ class VifReq(Base):
 class SGReq(Base):
     """Data class for 'Source-Group Request', used in `SIOCGETSGCNT` ioctl call."""
     format = "4s 4s LLL"
-    src: IPv4Address | IPv6Address | str  #: Source IP address
-    grp: IPv4Address | IPv6Address | str  #: Group IP address
+    src: IPv4Address | IPv6Address | str | int  #: Source IP address
+    grp: IPv4Address | IPv6Address | str | int  #: Group IP address
     pktcnt: int = 0  #: Packet count
     bytecnt: int = 0  #: Byte count
     wrong_if: int = 0  #: Wrong interface count
@@ -143,14 +187,15 @@ class SGReq(Base):
 @dataclass
 class MfcCtl(Base):
     """Data class for Multicast Forwarding Cache (MFC) control, used in `MRT_ADD_MFC` and `MRT_DEL_MFC` calls."""
-    origin: IPv4Address | IPv6Address | str  #: Originating IP address, used in Source-Specific Multicast (SSM)
-    mcastgroup: IPv4Address | IPv6Address | str  #: Multicast group address
+    record_format = f"=IIH{_kernel.MAXVIFS}s"  # packed records for kernel.add_mfc_many: integer origin and group, parent, ttls
+    origin: IPv4Address | IPv6Address | str | int  #: Originating IP address, used in Source-Specific Multicast (SSM)
+    mcastgroup: IPv4Address | IPv6Address | str | int  #: Multicast group address
     parent: int  #: Parent VIF index, where the packet arrived (incoming interface index)
-    ttls: list  #: List of minimum TTL thresholds for forwarding on VIFs
+    ttls: list | bytes | bytearray | memoryview  #: Minimum TTL thresholds for forwarding on VIFs, as a list or a buffer of bytes
     expire: int = 0  #: Time in seconds after which the cache entry will be deleted  TODO - not supported
 
 
-@dataclass
+@dataclass(slots=True)
 class Interface(Base):
     """Data class representing a network interface with all associated addresses."""
     name: str  #: Interface name
@@ -159,25 +204,25 @@ class Interface(Base):
     addresses: set[str] = None  #: set of IP addresses associated with the interface
 
     def __post_init__(self):
-        super().__post_init__()
+        Base.__post_init__(self)
         if isinstance(self.flags, int):
             self.flags = InterfaceFlags.from_value(self.flags)
         if self.addresses is None:
             self.addresses = set()
 
 
-@dataclass
+@dataclass(slots=True)
 class IGMPControl(Base):
     """Data class representing the control message sent from kernel over the IGMP socket."""
     msgtype: ControlMsgType  #: Control message type
     mbz: int  #: Must be zero
     vif: int  #: Low 8 bits of VIF number
     # vif_hi: int  #: High 8 bits of VIF number
-    im_src: IPv4Address | IPv6Address | str   #: IP address of source of packet
-    im_dst: IPv4Address | IPv6Address | str   #: IP address of destination of packet
+    im_src: IPv4Address | IPv6Address | str | int  #: IP address of source of packet
+    im_dst: IPv4Address | IPv6Address | str | int  #: IP address of destination of packet
 
 
-@dataclass
+@dataclass(slots=True)
 class IPHeader(Base):
     """Data class representing an IP header."""
     version: IPVersion  #: IP version
@@ -189,11 +234,11 @@ class IPHeader(Base):
     ttl: int  #: Time to live
     protocol: IPProtocol  #: IP Protocol
     check: int  #: Checksum
-    src_addr: IPv4Address | IPv6Address | str  #: IP source address
-    dst_addr: IPv4Address | IPv6Address | str  #: IP destination address
+    src_addr: IPv4Address | IPv6Address | str | int  #: IP source address
+    dst_addr: IPv4Address | IPv6Address | str | int  #: IP destination address
 
 
-@dataclass
+@dataclass(slots=True)
 class IGMP(Base):
     """Data class representing the format of an IGMP message in an IP packet's payload."""
     type : IGMPType  #: IGMP version
@@ -202,7 +247,7 @@ class IGMP(Base):
     group: IPv4Address | str  #: Group address
 
 
-@dataclass
+@dataclass(slots=True)
 class IGMPv3MembershipReport(Base):
     """Data class representing the format of an IGMP message in an IP packet's payload."""
     type: IGMPType  #: IGMP version
@@ -211,11 +256,11 @@ class IGMPv3MembershipReport(Base):
     grec_list: list[IGMPv3Record | dict]  #: List of records
 
     def __post_init__(self):
-        super().__post_init__()
+        Base.__post_init__(self)
         self.grec_list = [IGMPv3Record(**grec) for grec in self.grec_list if isinstance(grec, dict)]
 
 
-@dataclass
+@dataclass(slots=True)
 class IGMPv3Record(Base):
     """Data class representing a record in a IGMPv3 Membership Report messages."""
     type: IGMPv3RecordType  #: Record type
@@ -225,11 +270,11 @@ class IGMPv3Record(Base):
     src_list: list[IPv4Address | str]  # Source address list
 
     def __post_init__(self):
-        super().__post_init__()
-        self.src_list = [ipaddress.IPv4Address(src) for src in self.src_list]
+        Base.__post_init__(self)
+        self.src_list = [utils.intern_address(src) for src in self.src_list]
 
 
-@dataclass
+@dataclass(slots=True)
 class IGMPv3Query(Base):
     """Data class representing an IGMPv3 Query."""
     type: IGMPType  #: IGMP type
@@ -244,11 +289,11 @@ class IGMPv3Query(Base):
     src_list: list[IPv4Address | str]  #: Source list
 
     def __post_init__(self):
-        super().__post_init__()
-        self.src_list = [ipaddress.IPv4Address(src) for src in self.src_list]
+        Base.__post_init__(self)
+        self.src_list = [utils.intern_address(src) for src in self.src_list]
 
 
-@dataclass
+@dataclass(slots=True)
 class VIFTableEntry(Base):
     """Data class representing an entry in the VIF table at `/proc/net/ip_mr_vif`."""
     index: int  #: VIF index
@@ -272,16 +317,32 @@ class VifCtl(Base):
     rate_limit: int = 0  #: Rate limiter values (Not Implemented in Linux)
 
 
-@dataclass
+@dataclass(slots=True)
 class MFCEntry(Base):
     """Data class representing an entry in the MFC table at `/proc/net/ip_mr_cache`."""
-    group: IPv4Address | IPv6Address | str  #: Multicast group address
-    origin: IPv4Address | IPv6Address | str  #: Originating IP address
+    group: IPv4Address | IPv6Address | str | int  #: Multicast group address
+    origin: IPv4Address | IPv6Address | str | int  #: Originating IP address
     iif: int  #: Incoming interface index
     packets: int  #: Packet count
     bytes: int  #: Byte count
     wrong_if: int  #: Wrong incoming interface count
     oifs: dict[int, int]  #: Outgoing interface indices and their minimum TTLs for the route
+    table: int = _kernel.RT_TABLE_DEFAULT  #: Multicast routing table id
+
+
+@dataclass(slots=True)
+class MFCDelta(Base):
+    """Data class representing the changes in the MFC table between two reads of `/proc/net/ip_mr_cache`."""
+    added: list[MFCEntry]  #: Entries that were not in the previous snapshot
+    removed: list[MFCEntry]  #: Entries from the previous snapshot that are no longer in the table
+    changed: list[MFCEntry]  #: Entries whose counters or outgoing interfaces changed
+
+
+@dataclass(slots=True)
+class MFCEvent(Base):
+    """Data class representing an MFC change notification from the RTNLGRP_IPV4_MROUTE netlink group."""
+    type: MFCEventType  #: Whether the entry was added or deleted
+    entry: MFCEntry  #: The entry, as reported by the kernel
 
 
 def _get_type(type_obj: str | type) -> type:
@@ -289,3 +350,34 @@ def _get_type(type_obj: str | type) -> type:
     if isinstance(type_obj, type):
         return type_obj
     return eval(type_obj)
+
+
+_CONVERTERS: dict[type, tuple[tuple[tuple[str, EnumMeta], ...], tuple[str, ...]]] = {}
+
+
+def _converters(cls: type) -> tuple[tuple[tuple[str, EnumMeta], ...], tuple[str, ...]]:
+    """The (name, enum) pairs of the enum fields and the names of the address fields of a dataclass."""
+    try:
+        return _CONVERTERS[cls]
+    except KeyError:
+        pass
+    enums, addresses = [], []
+    for field in fields(cls):
+        field_type = _get_type(field.type)
+        if isinstance(field_type, EnumMeta):
+            enums.append((field.name, field_type))
+        elif IPv4Address in set(get_args(field_type)):
+            addresses.append(field.name)
+    converters = _CONVERTERS[cls] = (tuple(enums), tuple(addresses))
+    return converters
+
+
+def _trusted_constructor(cls: type) -> Callable:
+    """Compile a function that takes the same arguments as the __init__ of a dataclass and only assigns them."""
+    defaults = {field.name: field.default for field in fields(cls) if field.default is not MISSING}
+    names = [field.name for field in fields(cls)]
+    parameters = ", ".join(f"{name}=_defaults[{name!r}]" if name in defaults else name for name in names)
+    assignments = "".join(f"    self.{name} = {name}\n" for name in names)
+    namespace = {"_defaults": defaults}
+    exec(f"def trusted(cls, {parameters}):\n    self = object.__new__(cls)\n{assignments}    return self\n", namespace)
+    return namespace["trusted"]
@@ -1,5 +1,4 @@
 """ # TODO Investigate syscalls:
-        - MRT_TABLE -- Linux can support multiple MRT tables.
         - MRT_ADD_MFC_PROXY / MRT_DEL_MFC_PROXY -- It is unclear to me what these do.
         - SIOCGETRPF  -- Get the RPF neighbor for a given source and group?
 """
@@ -26,17 +25,19 @@
 #  SOFTWARE.
 from __future__ import annotations
 import struct
+from array import array
 from contextlib import contextmanager
-from typing import TypeVar
+from typing import TypeVar, Iterable, Iterator
 import socket
 import fcntl
-from ipaddress import ip_address
+import threading
+from ipaddress import ip_address, IPv4Address, IPv6Address
 
 
 from pygmp.data import VifReq, IpMreq, VifCtl, MfcCtl, SGReq, IPHeader, \
-    IGMPControl, Interface, VIFTableEntry, MFCEntry, \
-    IGMP, IGMPType, IGMPv3Query, IGMPv3MembershipReport
-from pygmp import utils
+    IGMPControl, Interface, VIFTableEntry, MFCEntry, MFCDelta, MFCEvent, MRTBackend, \
+    IGMP, IGMPType, IGMPv3Query, IGMPv3MembershipReport, ControlMsgType
+from pygmp import utils, netlink
 from pygmp import _kernel
 
 
@@ -49,9 +50,14 @@ InetAnySocket = TypeVar("InetAnySocket", bound=socket.socket)
 
 
 @contextmanager
-def igmp_socket() -> InetRawSocketType:
-    """The IGMP socket. A raw socket used to communicate wither kernel multicast routing code."""
+def igmp_socket(table: int | None = None) -> InetRawSocketType:
+    """The IGMP socket. A raw socket used to communicate wither kernel multicast routing code.
+
+        If a table is given, the socket is bound to that multicast routing table, see set_mrt_table().
+    """
     sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_IGMP)
+    if table is not None:
+        set_mrt_table(sock, table)
     yield sock
     sock.close()
 
@@ -61,8 +67,23 @@ def mrt_version(sock: InetRawSocketType) -> str:
     return hex(sock.getsockopt(socket.IPPROTO_IP, _kernel.MRT_VERSION))
 
 
-def enable_mrt(sock: InetRawSocketType) -> None:
-    """Enable the kernel multicast routing socket to receive control messages."""
+def set_mrt_table(sock: InetRawSocketType, table: int) -> None:
+    """Select the multicast routing table that the socket controls.  Linux specific.
+
+        Must be called before enable_mrt().  The table is created if it does not exist, and each table can have one
+        enabled socket, with its own VIFs, MFC, and upcalls.  Requires a kernel with CONFIG_IP_MROUTE_MULTIPLE_TABLES,
+        and `ip mrule` rules to steer traffic to tables other than the default.
+    """
+    sock.setsockopt(socket.IPPROTO_IP, _kernel.MRT_TABLE, table)
+
+
+def enable_mrt(sock: InetRawSocketType, table: int | None = None) -> None:
+    """Enable the kernel multicast routing socket to receive control messages.
+
+        If a table is given, it is selected with set_mrt_table() first.
+    """
+    if table is not None:
+        set_mrt_table(sock, table)
     try:
         sock.setsockopt(socket.IPPROTO_IP, _kernel.MRT_INIT, 1)
     except OSError as e:
@@ -125,25 +146,135 @@ def get_vif_counts(sock: InetRawSocketType, vif_req: VifReq) -> VifReq:
     return VifReq(*struct.unpack(VifReq.format, sioc_vif_result))
 
 
+def get_vif_counts_array(sock: InetRawSocketType, vifs: Iterable[int] | None = None):
+    """Get packet and byte counts for many VIFs in one call.  Requires numpy.
+
+        vifs is a sequence of VIF indices, or None for all MAXVIFS slots.  The ioctls are all made in C, with the GIL
+        released.
+
+        Returns a structured array with one record per VIF, and fields:
+            vifi  int32, the VIF index.
+            error  int32, 0 on success or the errno of the request (e.g., EINVAL if the VIF is not in use).
+            icount, ocount, ibytes, obytes  uint64 counters, as in VifReq.
+    """
+    np = _import_numpy()
+    vifs = np.arange(_kernel.MAXVIFS, dtype=np.uint32) if vifs is None else np.fromiter(vifs, dtype=np.uint32)
+
+    counts = np.zeros(len(vifs), dtype=_vif_counts_dtype(np))
+    _kernel.get_vif_counts(sock, vifs, counts)
+    return counts
+
+
 def get_mfc_counts(sock: InetRawSocketType, sg_req: SGReq) -> SGReq:
-    """Get packet and byte counts for a source-group mfc entry."""
-    sioc_sg_req = struct.pack(sg_req.format, sg_req.src.packed, sg_req.grp.packed, sg_req.pktcnt, sg_req.bytecnt, sg_req.wrong_if)
+    """Get packet and byte counts for a source-group mfc entry.
+
+        The source and group may be integers (i.e., int(IPv4Address)), and are returned as they were given.
+    """
+    sioc_sg_req = struct.pack(sg_req.format, _packed(sg_req.src), _packed(sg_req.grp), sg_req.pktcnt, sg_req.bytecnt,
+                              sg_req.wrong_if)
     sioc_sg_result = fcntl.ioctl(sock.fileno(), _kernel.SIOCGETSGCNT, sioc_sg_req, True)
-    unpacked_args = list(struct.unpack(SGReq.format, sioc_sg_result))
-    unpacked_args[0], unpacked_args[1] = ip_address(unpacked_args[0]), ip_address(unpacked_args[1])
-    return SGReq(*unpacked_args)
+    _, _, pktcnt, bytecnt, wrong_if = struct.unpack(SGReq.format, sioc_sg_result)
+    return SGReq.trusted(sg_req.src, sg_req.grp, pktcnt, bytecnt, wrong_if)
+
+
+def get_mfc_counts_array(sock: InetRawSocketType, pairs):
+    """Get packet and byte counts for many source-group mfc entries in one call.  Requires numpy.
+
+        pairs is a sequence, or (N, 2) array, of (source, group) addresses.  Addresses may be address objects, strings,
+        or integer values (i.e., int(IPv4Address)).  The ioctls are all made in C, with the GIL released.
+
+        Returns a structured array with one record per pair, and fields:
+            packets, bytes, wrong_if  uint64 counters.
+            error  int32, 0 on success or the errno of the request (e.g., EADDRNOTAVAIL if there is no such entry).
+    """
+    np = _import_numpy()
+    pairs = np.asarray(pairs)
+    if pairs.dtype.kind not in "iu":
+        pairs = np.fromiter((int(ip_address(address)) for address in pairs.ravel()), dtype=np.uint32, count=pairs.size)
+    pairs = np.ascontiguousarray(pairs, dtype=np.uint32).reshape(-1, 2)
+
+    counts = np.zeros(len(pairs), dtype=_sg_counts_dtype(np))
+    _kernel.get_sg_counts(sock, pairs, counts)
+    return counts
 
 
 def add_mfc(sock: InetRawSocketType, mfcctl: MfcCtl) -> None:
     """Add a multicast forwarding cache entry to the kernel multicast routing table.
+
+        The ttls of the MfcCtl may be a list of ints, or any buffer of single byte TTLs (bytes, bytearray,
+        array('B'), memoryview), which is copied directly.  Reuse the same buffer for a route to avoid rebuilding it.
+        The origin and group may be integers (i.e., int(IPv4Address)), which are passed to the kernel without parsing.
         TODO - support expire field.
     """
-    _kernel.add_mfc(sock, str(mfcctl.origin), str(mfcctl.mcastgroup), mfcctl.parent, mfcctl.ttls)
+    _kernel.add_mfc(sock, _address_arg(mfcctl.origin), _address_arg(mfcctl.mcastgroup), mfcctl.parent, mfcctl.ttls)
 
 
 def del_mfc(sock: InetRawSocketType, mfcctl: MfcCtl) -> None:
-    """Delete a multicast forwarding cache entry from the kernel multicast routing table."""
-    _kernel.del_mfc(sock, str(mfcctl.origin), str(mfcctl.mcastgroup), mfcctl.parent)
+    """Delete a multicast forwarding cache entry from the kernel multicast routing table.  See add_mfc()."""
+    _kernel.del_mfc(sock, _address_arg(mfcctl.origin), _address_arg(mfcctl.mcastgroup), mfcctl.parent)
+
+
+def add_mfc_many(sock: InetRawSocketType, mfcctls: Iterable[MfcCtl] | bytes | bytearray | memoryview) -> array:
+    """Add many multicast forwarding cache entries in one call.  The setsockopt calls are all made in C, with the GIL
+        released.
+
+        mfcctls is an iterable of MfcCtl, or a buffer of records packed with MfcCtl.record_format.
+
+        Returns an array with an errno per entry, 0 if the entry was added.
+    """
+    return _set_mfcs(_kernel.add_mfc_many, sock, mfcctls)
+
+
+def del_mfc_many(sock: InetRawSocketType, mfcctls: Iterable[MfcCtl] | bytes | bytearray | memoryview) -> array:
+    """Delete many multicast forwarding cache entries in one call.  See add_mfc_many().
+
+        Returns an array with an errno per entry, 0 if the entry was deleted.
+    """
+    return _set_mfcs(_kernel.del_mfc_many, sock, mfcctls)
+
+
+def _set_mfcs(set_mfcs, sock: InetRawSocketType, mfcctls) -> array:
+    """Pack the MfcCtl records if needed, and pass them to _kernel.add_mfc_many or _kernel.del_mfc_many."""
+    try:
+        records = memoryview(mfcctls).cast('B')
+    except TypeError:
+        records = _pack_mfcctls(mfcctls)
+
+    errors = array('i', bytes(len(records) // _kernel.MFCCTL_RECORD_SIZE * 4))
+    set_mfcs(sock, records, errors)
+    return errors
+
+
+def _pack_mfcctls(mfcctls: Iterable[MfcCtl]) -> bytearray:
+    """Pack MfcCtl objects into records with MfcCtl.record_format."""
+    record = struct.Struct(MfcCtl.record_format)
+    mfcctls = list(mfcctls)
+    records = bytearray(record.size * len(mfcctls))
+    for i, mfcctl in enumerate(mfcctls):
+        record.pack_into(records, i * record.size, _address_int(mfcctl.origin), _address_int(mfcctl.mcastgroup),
+                         mfcctl.parent, bytes(mfcctl.ttls[:_kernel.MAXVIFS]))
+    return records
+
+
+def _address_int(address: IPv4Address | IPv6Address | str | int) -> int:
+    """Integer value of an address, without re-parsing address objects."""
+    if type(address) is int:
+        return address
+    return int(address) if isinstance(address, IPv4Address) else int(ip_address(address))
+
+
+def _address_arg(address: IPv4Address | IPv6Address | str | int) -> str | int:
+    """An address as _kernel.add_mfc and _kernel.del_mfc take it, an integer if possible and a string otherwise."""
+    if type(address) is int:
+        return address
+    return int(address) if isinstance(address, IPv4Address) else str(address)
+
+
+def _packed(address: IPv4Address | IPv6Address | str | int) -> bytes:
+    """Network byte order bytes of an address."""
+    if type(address) is int:
+        return address.to_bytes(4, 'big')
+    return address.packed if isinstance(address, (IPv4Address, IPv6Address)) else ip_address(address).packed
 
 
 def flush(sock: InetRawSocketType, vifs=True, mfc=True, static=True) -> None:
@@ -190,8 +321,9 @@ def interface(sock: InetAnySocket) -> str:
     return socket.inet_ntoa(in_buff)
 
 
-def parse_ip_header(buffer: bytes) -> IPHeader:
-    return IPHeader(**_kernel.parse_ip_header(buffer))
+def parse_ip_header(buffer: bytes, int_addresses: bool = False) -> IPHeader:
+    """Parse an IP header.  The addresses are integers (i.e., int(IPv4Address)) if int_addresses is set."""
+    return IPHeader(**_kernel.parse_ip_header(buffer, int_addresses))
 
 
 def parse_igmp(buffer: bytes) -> IGMP | IGMPv3MembershipReport | IGMPv3Query:
@@ -204,8 +336,80 @@ def parse_igmp(buffer: bytes) -> IGMP | IGMPv3MembershipReport | IGMPv3Query:
     return IGMP(**result_dict)
 
 
-def parse_igmp_control(buffer: bytes) -> IGMPControl:
-    return IGMPControl(**_kernel.parse_igmp_control(buffer))
+def parse_igmp_control(buffer: bytes, int_addresses: bool = False) -> IGMPControl:
+    """Parse a kernel control message.  The addresses are integers (i.e., int(IPv4Address)) if int_addresses is set."""
+    return IGMPControl(**_kernel.parse_igmp_control(buffer, int_addresses))
+
+
+def classify_packet(buffer: bytes | bytearray | memoryview) -> _kernel.PacketInfo:
+    """Classify a packet read from the multicast routing socket with one pass over its headers in C.
+
+        Returns a PacketInfo of (kind, type, vif, src, dst, group, offset, length).  kind is a PacketKind value, and
+        the addresses are integers (i.e., int(IPv4Address)):
+            CONTROL  type is the ControlMsgType, vif the VIF the packet arrived on, and src and group (also dst) the
+                     source and group of the packet that caused the upcall.  See igmp_control().
+            IGMP     type is the IGMPType, group the group of the message, and offset where the message starts.
+            PIM      type is the PIM message type, and offset where the message starts.
+            OTHER    type is the IP protocol number.
+
+        Raises ValueError if the buffer is too short for its headers.
+    """
+    return _kernel.classify_packet(buffer)
+
+
+def igmp_control(info: _kernel.PacketInfo) -> IGMPControl:
+    """Build the IGMPControl for a PacketInfo of kind CONTROL, from classify_packet()."""
+    return IGMPControl.trusted(ControlMsgType(info.type), 0, info.vif,
+                               utils.intern_address(info.src), utils.intern_address(info.dst))
+
+
+class PacketRing:
+    """Batched reads from the multicast routing socket, with recvmmsg into a ring of preallocated buffers.
+
+        Each wakeup receives up to batch_size messages with one system call and no per-message allocation, and
+        classifies them in C (see classify_packet()), so a storm of NOCACHE upcalls is drained in batches instead of
+        one recvfrom() at a time:
+
+            ring = PacketRing(sock)
+            while True:
+                for index, info in enumerate(ring.receive()):
+                    if info.kind == PacketKind.CONTROL:
+                        handle(igmp_control(info))
+                    elif info.kind == PacketKind.IGMP:
+                        handle(parse_igmp(ring.packet(index, info)[info.offset:]))
+
+        Messages longer than buffer_size are truncated.  The ring is reused by the next receive(), so packet() is only
+        valid until then; copy what must be kept.
+    """
+
+    def __init__(self, sock: InetRawSocketType, batch_size: int = 64, buffer_size: int = 6000):
+        if not 0 < batch_size <= _kernel.RECV_BATCH_MAX:
+            raise ValueError(f"batch_size must be between 1 and {_kernel.RECV_BATCH_MAX}")
+        if buffer_size <= 0:
+            raise ValueError("buffer_size must be positive")
+        self.sock = sock
+        self.batch_size = batch_size
+        self.buffer_size = buffer_size
+        self._ring = bytearray(batch_size * buffer_size)
+        self._view = memoryview(self._ring)
+
+    def receive(self, timeout: float | None = None) -> list[_kernel.PacketInfo]:
+        """Receive the next batch of messages, and return their PacketInfo in the order of their slots in the ring.
+
+            Waits up to timeout seconds (forever if None) for the first message, but not for the rest.  Returns an
+            empty list if the timeout expires.  Messages too short for their headers are of kind INVALID.
+        """
+        timeout_ms = -1 if timeout is None else max(0, int(timeout * 1000))
+        return _kernel.recv_batch(self.sock, self._ring, self.buffer_size, timeout_ms)
+
+    def messages(self, timeout: float | None = None) -> list[IGMPControl | _kernel.PacketInfo]:
+        """Like receive(), but with the IGMPControl of each kernel upcall in place of its PacketInfo."""
+        return [igmp_control(info) if info.kind == _kernel.PACKET_CONTROL else info for info in self.receive(timeout)]
+
+    def packet(self, index: int, info: _kernel.PacketInfo) -> memoryview:
+        """The bytes of the message in slot index of the last batch, without copying them."""
+        start = index * self.buffer_size
+        return self._view[start:start + info.length]
 
 
 def network_interfaces() -> dict[str, Interface]:
@@ -220,8 +424,95 @@ def network_interfaces() -> dict[str, Interface]:
     return interfaces
 
 
-@utils.file_cache(IP_MR_VIF_DIR)
-def ip_mr_vif() -> list[VIFTableEntry]:
+class InterfaceRegistry:
+    """Cache of network_interfaces(), indexed by name, interface index, and IPv4 address.
+
+        The registry joins the RTNLGRP_LINK and RTNLGRP_IPV4_IFADDR rtnetlink groups, and only calls getifaddrs
+        again after the kernel reports a change to an interface or address.  Lookups are dictionary lookups.
+
+        The returned Interface objects are shared between callers, and should not be modified.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sock = netlink.open_rtnl_socket(groups=[_kernel.RTNLGRP_LINK, _kernel.RTNLGRP_IPV4_IFADDR])
+        self._by_name: dict[str, Interface] = dict()
+        self._by_index: dict[int, Interface] = dict()
+        self._by_address: dict[str, Interface] = dict()
+        self._load()
+
+    def __enter__(self) -> InterfaceRegistry:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def interfaces(self) -> dict[str, Interface]:
+        """All interfaces by name, like network_interfaces()."""
+        with self._lock:
+            self._refresh()
+            return dict(self._by_name)
+
+    def by_name(self, name: str) -> Interface | None:
+        with self._lock:
+            self._refresh()
+            return self._by_name.get(name)
+
+    def by_index(self, index: int) -> Interface | None:
+        with self._lock:
+            self._refresh()
+            return self._by_index.get(index)
+
+    def by_address(self, address: IPv4Address | IPv6Address | str) -> Interface | None:
+        with self._lock:
+            self._refresh()
+            return self._by_address.get(str(ip_address(address)))
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def _refresh(self) -> None:
+        """Reload the interfaces if the kernel reported any changes since the last lookup."""
+        if netlink.drain(self._sock):
+            self._load()
+
+    def _load(self) -> None:
+        interfaces = network_interfaces()
+        self._by_name = interfaces
+        self._by_index = {interface.index: interface for interface in interfaces.values()}
+        self._by_address = {address: interface for interface in interfaces.values() for address in interface.addresses}
+
+
+def interface_registry() -> InterfaceRegistry:
+    """The InterfaceRegistry shared by the process, created on first use."""
+    global _interface_registry
+    with _interface_registry_lock:
+        if _interface_registry is None:
+            _interface_registry = InterfaceRegistry()
+        return _interface_registry
+
+
+_interface_registry: InterfaceRegistry | None = None
+_interface_registry_lock = threading.Lock()
+
+
+def ip_mr_vif(backend: MRTBackend | None = None, table: int = _kernel.RT_TABLE_DEFAULT) -> list[VIFTableEntry]:
+    """Get the IPv4 virtual interfaces used by the active multicast routing daemon.  Linux specific.
+
+        The PROC backend parses /proc/net/ip_mr_vif, and is cached until the file changes.  ip_mr_vif.cache_info(),
+        cache_clear(), and set_ttl(ttl) control that cache, as with utils.file_cache().  The NETLINK backend dumps
+        the VIF table over rtnetlink.  The two return the same entries.  /proc only shows the default table, so by
+        default PROC is used for the default table and NETLINK for any other.
+
+        Raises FileNotFoundError if the file does not exist (PROC), or OSError if the dump fails (NETLINK).
+    """
+    if _mrt_backend(backend, table) is MRTBackend.NETLINK:
+        return netlink.ip_mr_vif(table)
+    return _proc_ip_mr_vif()
+
+
+@utils.file_cache(lambda: IP_MR_VIF_DIR)
+def _proc_ip_mr_vif(content: memoryview) -> list[VIFTableEntry]:
     """Parse the /proc/net/ip_mr_vif file.  Linux specific, holds the IPv4 virtual interfaces used by the active multicast routing daemon.
 
         Virtual file generated by the kernel code here: https://github.com/torvalds/linux/blob/master/net/ipv4/ipmr.c#L2922
@@ -231,46 +522,320 @@ def ip_mr_vif() -> list[VIFTableEntry]:
         Raises FileNotFoundError if the file does not exist.
 
     """
-    vifs = []
+    return [_vif_entry(*record) for record in _kernel.parse_ip_mr_vif(content)]
+
+
+ip_mr_vif.cache_info = _proc_ip_mr_vif.cache_info
+ip_mr_vif.cache_clear = _proc_ip_mr_vif.cache_clear
+ip_mr_vif.set_ttl = _proc_ip_mr_vif.set_ttl
+
+
+def ip_mr_vif_records() -> list[tuple[int, str, int, int, int, int, int, int, int]]:
+    """Parse the /proc/net/ip_mr_vif file in C, without building VIFTableEntry objects.
+
+        Each record is a tuple of (index, name, bytes_in, pkts_in, bytes_out, pkts_out, flags, local, remote).
+        Addresses are integers (i.e., int(IPv4Address)), and local is the interface index if VIFF_USE_IFINDEX is set.
+
+        Raises FileNotFoundError if the file does not exist.
+    """
+    with open(IP_MR_VIF_DIR, 'rb') as f:
+        return _kernel.parse_ip_mr_vif(f.read())
+
+
+def iter_ip_mr_vif() -> Iterator[VIFTableEntry]:
+    """Lazily parse the /proc/net/ip_mr_vif file, yielding one entry per line.  See ip_mr_vif().
+
+        Raises FileNotFoundError if the file does not exist.
+    """
     with open(IP_MR_VIF_DIR, 'r') as f:
         next(f) # skip header line
         for line in f:
-            fields = line.split()
-            index, name, flags = int(fields[0]), fields[1], int(fields[6])
-            local = int(fields[7], 16) if flags & _kernel.VIFF_USE_IFINDEX else utils.host_hex_to_ip(fields[7])
-            remote = utils.host_hex_to_ip(fields[8])
-            vifs.append(VIFTableEntry(index=index, name=name,
-                                      bytes_in=int(fields[2]), pkts_in=int(fields[3]),
-                                      bytes_out=int(fields[4]), pkts_out=int(fields[5]), flags=flags,
-                                      local_addr_or_interface=local, remote_addr=remote))
+            yield _parse_ip_mr_vif_line(line.split())
 
-    return vifs
 
+def ip_mr_cache(backend: MRTBackend | None = None, table: int = _kernel.RT_TABLE_DEFAULT,
+                int_addresses: bool = False) -> list[MFCEntry]:
+    """Get the entries of the multicast forwarding cache (MFC).  Linux specific.
 
-@utils.file_cache(IP_MR_CACHE_DIR)
-def ip_mr_cache() -> list[MFCEntry]:
+        The PROC backend parses /proc/net/ip_mr_cache, and is cached until the file changes.  ip_mr_cache.cache_info(),
+        cache_clear(), and set_ttl(ttl) control that cache, as with utils.file_cache().  Its counters are printed as
+        unsigned longs.  The NETLINK backend dumps the MFC over rtnetlink, which always has 64-bit counters
+        and reports the table id of each entry.  Both return MFCEntry objects.  /proc only shows the default table,
+        so by default PROC is used for the default table and NETLINK for any other.
+
+        With int_addresses, the group and origin of each entry are integers (i.e., int(IPv4Address)) instead of
+        address objects.  They can be passed back to add_mfc() and get_mfc_counts() as they are.
+
+        Raises FileNotFoundError if the file does not exist (PROC), or OSError if the dump fails (NETLINK).
+    """
+    if _mrt_backend(backend, table) is MRTBackend.NETLINK:
+        return netlink.ip_mr_cache(table, int_addresses)
+    return _proc_ip_mr_cache().entries(int_addresses)
+
+
+def _mrt_backend(backend: MRTBackend | None, table: int) -> MRTBackend:
+    """Resolve the backend for reading a table.  Raises ValueError for PROC with a table other than the default."""
+    if backend is None:
+        return MRTBackend.PROC if table == _kernel.RT_TABLE_DEFAULT else MRTBackend.NETLINK
+    backend = MRTBackend(backend)
+    if backend is MRTBackend.PROC and table != _kernel.RT_TABLE_DEFAULT:
+        raise ValueError(f"/proc only shows the default multicast routing table, not table {table}.")
+    return backend
+
+
+@utils.file_cache(lambda: IP_MR_CACHE_DIR)
+def _proc_ip_mr_cache(content: memoryview) -> _ProcMFCRecords:
     """Parse the /proc/net/ip_mr_cache file.  Linux specific, holds the multicast routing cache.
 
         Virtual file generated by the kernel code here: https://github.com/torvalds/linux/blob/master/net/ipv4/ipmr.c#L2966
             group origin iif pkts bytes wrong [oifs]
             %08X %08X %-3hd %8lu %8lu %8lu [[%2d:%-3d] [%2d:%-3d] ...] or [ %2d:%-3d]
 
+        Both address modes of ip_mr_cache() share this one cached read.  Each builds its entries from the records on
+        first use.
+
+        Raises FileNotFoundError if the file does not exist.
+
+    """
+    return _ProcMFCRecords(_kernel.parse_ip_mr_cache(content))
+
+
+class _ProcMFCRecords:
+    """The records of one read of /proc/net/ip_mr_cache, and the MFCEntry lists built from them for each mode."""
+
+    def __init__(self, records: list[tuple[int, int, int, int, int, int, dict[int, int]]]):
+        self.records = records
+        self._entries = {}
+
+    def entries(self, int_addresses: bool) -> list[MFCEntry]:
+        entries = self._entries.get(int_addresses)
+        if entries is None:
+            if int_addresses:
+                entries = [MFCEntry.trusted(*record) for record in self.records]
+            else:
+                entries = [_mfc_entry(*record) for record in self.records]
+            entries = self._entries.setdefault(int_addresses, entries)
+        return entries
+
+
+ip_mr_cache.cache_info = _proc_ip_mr_cache.cache_info
+ip_mr_cache.cache_clear = _proc_ip_mr_cache.cache_clear
+ip_mr_cache.set_ttl = _proc_ip_mr_cache.set_ttl
+
+
+def ip_mr_cache_records() -> list[tuple[int, int, int, int, int, int, dict[int, int]]]:
+    """Parse the /proc/net/ip_mr_cache file in C, without building MFCEntry objects.
+
+        Each record is a tuple of (group, origin, iif, packets, bytes, wrong_if, oifs).  Addresses are integers
+        (i.e., int(IPv4Address)), and oifs maps VIF indices to their minimum TTLs.
+
         Raises FileNotFoundError if the file does not exist.
+    """
+    with open(IP_MR_CACHE_DIR, 'rb') as f:
+        return _kernel.parse_ip_mr_cache(f.read())
+
 
+def iter_ip_mr_cache(iif: int | None = None,
+                     group: IPv4Address | IPv6Address | str | None = None,
+                     origin: IPv4Address | IPv6Address | str | None = None) -> Iterator[MFCEntry]:
+    """Lazily parse the /proc/net/ip_mr_cache file, yielding one entry per line.  See ip_mr_cache().
+
+        Entries can be filtered by incoming VIF index, group, and/or origin address.  Filters are compared against
+        the raw fields of each line, so only matching lines are converted into MFCEntry objects.
+
+        Raises FileNotFoundError if the file does not exist.
     """
+    group_hex = utils.ip_to_host_hex(group) if group is not None else None
+    origin_hex = utils.ip_to_host_hex(origin) if origin is not None else None
+
     with open(IP_MR_CACHE_DIR, 'r') as f:
         next(f) # skip header line
-        entries = []
         for line in f:
-            fields = line.strip().split()
+            fields = line.split()
 
-            if len(fields) < 6 :
+            if len(fields) < 6:
                 raise ValueError(f"Encountered malformed line in {IP_MR_CACHE_DIR}: {line}")
 
-            oifs = _parse_index_ttl(fields[6:]) if len(fields) > 6 else dict()
-            group, origin = utils.host_hex_to_ip(fields[0]), utils.host_hex_to_ip(fields[1])
-            entries.append(MFCEntry(group, origin, int(fields[2]), int(fields[3]), int(fields[4]), int(fields[5]), oifs))
-    return entries
+            if (group_hex is not None and fields[0] != group_hex) \
+                    or (origin_hex is not None and fields[1] != origin_hex) \
+                    or (iif is not None and int(fields[2]) != iif):
+                continue
+
+            yield _parse_ip_mr_cache_line(fields)
+
+
+def ip_mr_cache_array():
+    """Parse the /proc/net/ip_mr_cache file into a NumPy structured array, one record per entry.  Requires numpy.
+
+        Fields:
+            group, origin  uint32, the integer value of the address (i.e., int(IPv4Address)).
+            iif  int16, incoming VIF index.  Unresolved entries have an iif of -1.
+            packets, bytes, wrong_if  uint64 counters.
+            oifs  uint8[MAXVIFS] minimum TTL per VIF index.  0 means the entry does not forward on that VIF.
+
+        Raises FileNotFoundError if the file does not exist.
+    """
+    np = _import_numpy()
+    with open(IP_MR_CACHE_DIR, 'rb') as f:
+        return np.frombuffer(_kernel.pack_ip_mr_cache(f.read()), dtype=_mfc_array_dtype(np))
+
+
+def _mfc_array_dtype(np):
+    """The NumPy dtype of records returned by ip_mr_cache_array()."""
+    return np.dtype([('group', np.uint32), ('origin', np.uint32), ('iif', np.int16),
+                     ('packets', np.uint64), ('bytes', np.uint64), ('wrong_if', np.uint64),
+                     ('oifs', np.uint8, (_kernel.MAXVIFS,))])
+
+
+def _vif_counts_dtype(np):
+    """The NumPy dtype of records returned by get_vif_counts_array()."""
+    return np.dtype([('vifi', np.int32), ('error', np.int32), ('icount', np.uint64), ('ocount', np.uint64),
+                     ('ibytes', np.uint64), ('obytes', np.uint64)])
+
+
+def _sg_counts_dtype(np):
+    """The NumPy dtype of records returned by get_mfc_counts_array()."""
+    return np.dtype([('packets', np.uint64), ('bytes', np.uint64), ('wrong_if', np.uint64), ('error', np.int32)])
+
+
+def _import_numpy():
+    """Import numpy, which is an optional dependency."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("numpy is required for this function.  Install it with 'pip install py-gmp[numpy]'.") from e
+    return numpy
+
+
+class MFCSnapshot:
+    """Incremental view of /proc/net/ip_mr_cache that reports what changed since the previous read.
+
+        Raw lines are indexed by their (origin, group, iif) fields.  On update(), the new and previous indexes are
+        compared with set operations, so MFCEntry objects are only built for added and changed entries.
+
+            snapshot = MFCSnapshot()
+            delta = snapshot.update()  # the first delta holds every entry as added
+    """
+
+    def __init__(self):
+        self._lines: dict[tuple[str, str, str], str] = dict()
+        self._entries: dict[tuple[str, str, str], MFCEntry] = dict()
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def entries(self) -> list[MFCEntry]:
+        """The MFC entries as of the last update."""
+        return list(self._entries.values())
+
+    def update(self) -> MFCDelta:
+        """Re-read /proc/net/ip_mr_cache and return the delta against the previous snapshot.
+
+            Raises FileNotFoundError if the file does not exist.
+        """
+        with open(IP_MR_CACHE_DIR, 'r') as f:
+            next(f)  # skip header line
+            lines = {_mfc_key(line): line for line in f}
+
+        modified = lines.items() - self._lines.items()
+        removed_keys = self._lines.keys() - lines.keys()
+
+        added, changed = [], []
+        for key, line in modified:
+            entry = _parse_ip_mr_cache_line(line.split())
+            (changed if key in self._entries else added).append(entry)
+            self._entries[key] = entry
+        removed = [self._entries.pop(key) for key in removed_keys]
+
+        self._lines = lines
+        return MFCDelta(added=added, removed=removed, changed=changed)
+
+
+class MFCSubscription:
+    """Notifications of changes to the MFC from the RTNLGRP_IPV4_MROUTE rtnetlink group, instead of polling.
+
+        The kernel sends an ADD event when an entry is added or updated (including unresolved entries), and a DELETE
+        event when it is removed or expires.  Subscribe before reading the table, so no change is missed between the
+        two:
+
+            with MFCSubscription() as subscription:
+                table = {(e.origin, e.group): e for e in ip_mr_cache(MRTBackend.NETLINK)}
+                for event in subscription:
+                    ...
+
+        Only changes to the given table are reported.  The subscription has a fileno(), so it can be used with
+        select() alongside the IGMP socket.
+    """
+
+    def __init__(self, table: int = _kernel.RT_TABLE_DEFAULT):
+        self.table = table
+        self._vif_indices = netlink.VifIndices(table)
+        self._sock = netlink.open_rtnl_socket(groups=[_kernel.RTNLGRP_IPV4_MROUTE])
+
+    def __enter__(self) -> MFCSubscription:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[MFCEvent]:
+        while True:
+            yield from self.read()
+
+    def fileno(self) -> int:
+        return self._sock.fileno()
+
+    def read(self) -> list[MFCEvent]:
+        """Receive the next batch of events.  Blocks until one arrives, unless the timeout is set.
+
+            Raises TimeoutError if the timeout expires.
+        """
+        return netlink.read_mfc_events(self._sock, self._vif_indices, self.table)
+
+    def settimeout(self, timeout: float | None) -> None:
+        self._sock.settimeout(timeout)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+def _mfc_key(line: str) -> tuple[str, str, str]:
+    """The raw (origin, group, iif) fields of a /proc/net/ip_mr_cache line."""
+    fields = line.split(None, 3)
+    if len(fields) < 4:
+        raise ValueError(f"Encountered malformed line in {IP_MR_CACHE_DIR}: {line}")
+    return fields[1], fields[0], fields[2]
+
+
+def _vif_entry(index, name, bytes_in, pkts_in, bytes_out, pkts_out, flags, local, remote) -> VIFTableEntry:
+    """Convert a record from _kernel.parse_ip_mr_vif into a VIFTableEntry."""
+    local = local if flags & _kernel.VIFF_USE_IFINDEX else utils.intern_address(local)
+    return VIFTableEntry.trusted(index=index, name=name, bytes_in=bytes_in, pkts_in=pkts_in,
+                                 bytes_out=bytes_out, pkts_out=pkts_out, flags=flags,
+                                 local_addr_or_interface=local, remote_addr=utils.intern_address(remote))
+
+
+def _mfc_entry(group, origin, iif, packets, nbytes, wrong_if, oifs) -> MFCEntry:
+    """Convert a record from _kernel.parse_ip_mr_cache into an MFCEntry."""
+    return MFCEntry.trusted(utils.intern_address(group), utils.intern_address(origin), iif, packets, nbytes, wrong_if, oifs)
+
+
+def _parse_ip_mr_vif_line(fields: list[str]) -> VIFTableEntry:
+    """Convert the fields of a /proc/net/ip_mr_vif line into a VIFTableEntry."""
+    index, name, flags = int(fields[0]), fields[1], int(fields[6])
+    local = int(fields[7], 16) if flags & _kernel.VIFF_USE_IFINDEX else utils.host_hex_to_ip(fields[7])
+    remote = utils.host_hex_to_ip(fields[8])
+    return VIFTableEntry.trusted(index=index, name=name,
+                                 bytes_in=int(fields[2]), pkts_in=int(fields[3]),
+                                 bytes_out=int(fields[4]), pkts_out=int(fields[5]), flags=flags,
+                                 local_addr_or_interface=local, remote_addr=remote)
+
+
+def _parse_ip_mr_cache_line(fields: list[str]) -> MFCEntry:
+    """Convert the fields of a /proc/net/ip_mr_cache line into an MFCEntry."""
+    oifs = _parse_index_ttl(fields[6:]) if len(fields) > 6 else dict()
+    group, origin = utils.host_hex_to_ip(fields[0]), utils.host_hex_to_ip(fields[1])
+    return MFCEntry.trusted(group, origin, int(fields[2]), int(fields[3]), int(fields[4]), int(fields[5]), oifs)
 
 
 def _parse_index_ttl(pairs_list: list[str]) -> dict[int, int]:
@@ -0,0 +1,252 @@
+// MIT License
+//
+// Copyright (c) 2023 Jack Hart
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#define _GNU_SOURCE  // recvmmsg
+
+#include <errno.h>
+#include <poll.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/ioctl.h>
+#include <sys/socket.h>
+#include <netinet/in.h>
+#include <arpa/inet.h>
+#include <linux/mroute.h>
+#include <linux/igmp.h>
+#include <linux/ip.h>
+
+#include "mroute.h"
+
+
+/*
+ * Function:  mroute_get_sg_counts
+ * -------------------------------
+ * Issues SIOCGETSGCNT for each (source, group) pair, storing the counters or the errno in records.  Pairs are
+ * integer address values (host order).  Does not touch any Python objects, so it can be called without the GIL.
+ *
+ * Returns the number of failed requests.
+ */
+size_t mroute_get_sg_counts(int sockfd, const uint32_t *pairs, size_t count, struct sg_count_record *records) {
+    struct sioc_sg_req req;
+    size_t failed = 0;
+    size_t i;
+
+    for (i = 0; i < count; i++) {
+        memset(&req, 0, sizeof(req));
+        req.src.s_addr = htonl(pairs[2 * i]);
+        req.grp.s_addr = htonl(pairs[2 * i + 1]);
+
+        struct sg_count_record record = {0};
+        if (ioctl(sockfd, SIOCGETSGCNT, &req) < 0) {
+            record.error = errno;
+            failed++;
+        } else {
+            record.packets = req.pktcnt;
+            record.bytes = req.bytecnt;
+            record.wrong_if = req.wrong_if;
+        }
+        memcpy(&records[i], &record, sizeof(record));
+    }
+    return failed;
+}
+
+
+/*
+ * Function:  mroute_get_vif_counts
+ * --------------------------------
+ * Issues SIOCGETVIFCNT for each VIF index, storing the counters or the errno in records.  Does not touch any Python
+ * objects, so it can be called without the GIL.
+ *
+ * Returns the number of failed requests.
+ */
+size_t mroute_get_vif_counts(int sockfd, const uint32_t *vifs, size_t count, struct vif_count_record *records) {
+    struct sioc_vif_req req;
+    size_t failed = 0;
+    size_t i;
+
+    for (i = 0; i < count; i++) {
+        memset(&req, 0, sizeof(req));
+        req.vifi = vifs[i];
+
+        struct vif_count_record record = {0};
+        record.vifi = (int32_t)vifs[i];
+        if (ioctl(sockfd, SIOCGETVIFCNT, &req) < 0) {
+            record.error = errno;
+            failed++;
+        } else {
+            record.icount = req.icount;
+            record.ocount = req.ocount;
+            record.ibytes = req.ibytes;
+            record.obytes = req.obytes;
+        }
+        memcpy(&records[i], &record, sizeof(record));
+    }
+    return failed;
+}
+
+
+/*
+ * Function:  mroute_set_mfcs
+ * --------------------------
+ * Issues setsockopt with optname (MRT_ADD_MFC or MRT_DEL_MFC) for each route, storing 0 or the errno in errors.
+ * Does not touch any Python objects, so it can be called without the GIL.
+ *
+ * Returns the number of failed requests.
+ */
+size_t mroute_set_mfcs(int sockfd, int optname, const struct mfcctl_record *records, size_t count, int32_t *errors) {
+    struct mfcctl mfc;
+    struct mfcctl_record record;
+    size_t failed = 0;
+    size_t i;
+
+    for (i = 0; i < count; i++) {
+        memcpy(&record, &records[i], sizeof(record));
+
+        memset(&mfc, 0, sizeof(mfc));
+        mfc.mfcc_origin.s_addr = htonl(record.origin);
+        mfc.mfcc_mcastgrp.s_addr = htonl(record.group);
+        mfc.mfcc_parent = record.parent;
+        memcpy(mfc.mfcc_ttls, record.ttls, sizeof(mfc.mfcc_ttls));
+
+        errors[i] = 0;
+        if (setsockopt(sockfd, IPPROTO_IP, optname, &mfc, sizeof(mfc)) < 0) {
+            errors[i] = errno;
+            failed++;
+        }
+    }
+    return failed;
+}
+
+
+/*
+ * Function:  mroute_classify_packet
+ * ---------------------------------
+ * Fills info from the headers of a packet read from the multicast routing socket, in one pass and without building
+ * any Python objects.  Kernel upcalls are told apart from IP packets by their protocol of 0 (struct igmpmsg overlays
+ * the IP header, with im_mbz in the protocol field).
+ *
+ * Returns 0, or -1 if the buffer is too short for the headers of its kind of packet.
+ */
+int mroute_classify_packet(const unsigned char *buffer, size_t len, struct packet_info *info) {
+    struct iphdr ip_header;
+    size_t offset;
+
+    memset(info, 0, sizeof(*info));
+    if (len < sizeof(struct iphdr))
+        return -1;
+    memcpy(&ip_header, buffer, sizeof(ip_header));
+
+    if (ip_header.protocol == 0) {
+        struct igmpmsg msg;
+        if (len < sizeof(msg))
+            return -1;
+        memcpy(&msg, buffer, sizeof(msg));
+        info->kind = PACKET_CONTROL;
+        info->type = msg.im_msgtype;
+        info->vif = msg.im_vif;
+        info->src = ntohl(msg.im_src.s_addr);
+        info->dst = info->group = ntohl(msg.im_dst.s_addr);
+        return 0;
+    }
+
+    offset = ip_header.ihl * 4;
+    if (offset < sizeof(struct iphdr) || offset > len)
+        return -1;
+    info->src = ntohl(ip_header.saddr);
+    info->dst = ntohl(ip_header.daddr);
+    info->offset = (int32_t)offset;
+
+    if (ip_header.protocol == IPPROTO_IGMP) {
+        struct igmphdr igmp;
+        if (len - offset < sizeof(igmp))
+            return -1;
+        memcpy(&igmp, buffer + offset, sizeof(igmp));
+        info->kind = PACKET_IGMP;
+        info->type = igmp.type;
+        info->group = ntohl(igmp.group);
+    } else if (ip_header.protocol == IPPROTO_PIM) {
+        if (len - offset < 1)
+            return -1;
+        info->kind = PACKET_PIM;
+        info->type = buffer[offset] & 0x0f;
+    } else {
+        info->kind = PACKET_OTHER;
+        info->type = ip_header.protocol;
+    }
+    return 0;
+}
+
+
+/*
+ * Function:  mroute_recv_batch
+ * ----------------------------
+ * Receives up to count messages from the multicast routing socket with one recvmmsg call, into the ring of count
+ * slots of slot_size bytes each, and classifies each one into its record.  Waits up to timeout_ms milliseconds (-1
+ * to wait forever) for the first message, then takes whatever else is already queued without waiting.  Messages
+ * longer than a slot are truncated to it.
+ *
+ * Returns the number of messages received (0 if the timeout expired), or -1 and sets errno.
+ */
+int mroute_recv_batch(int sockfd, unsigned char *ring, size_t slot_size, size_t count, int timeout_ms,
+                      struct recv_record *records) {
+    struct pollfd pfd = {.fd = sockfd, .events = POLLIN};
+    struct mmsghdr *msgs;
+    struct iovec *iovs;
+    int result;
+
+    result = poll(&pfd, 1, timeout_ms);
+    if (result <= 0)
+        return result;
+    if (pfd.revents & POLLNVAL) {
+        errno = EBADF;
+        return -1;
+    }
+
+    msgs = calloc(count, sizeof(*msgs));
+    iovs = calloc(count, sizeof(*iovs));
+    if (msgs == NULL || iovs == NULL) {
+        free(msgs);
+        free(iovs);
+        errno = ENOMEM;
+        return -1;
+    }
+    for (size_t i = 0; i < count; i++) {
+        iovs[i].iov_base = ring + i * slot_size;
+        iovs[i].iov_len = slot_size;
+        msgs[i].msg_hdr.msg_iov = &iovs[i];
+        msgs[i].msg_hdr.msg_iovlen = 1;
+    }
+
+    result = recvmmsg(sockfd, msgs, (unsigned int)count, MSG_DONTWAIT, NULL);
+    if (result < 0 && (errno == EAGAIN || errno == EWOULDBLOCK))
+        result = 0;  // woken, but another reader took the messages
+    for (int i = 0; i < result; i++) {
+        size_t len = msgs[i].msg_len < slot_size ? msgs[i].msg_len : slot_size;
+        records[i].length = (int32_t)len;
+        if (mroute_classify_packet(ring + i * slot_size, len, &records[i].info) < 0)
+            records[i].info.kind = PACKET_INVALID;
+    }
+
+    free(msgs);
+    free(iovs);
+    return result;
+}
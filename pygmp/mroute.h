@@ -0,0 +1,118 @@
+// MIT License
+//
+// Copyright (c) 2023 Jack Hart
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#ifndef PYGMP_MROUTE_H
+#define PYGMP_MROUTE_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include <linux/mroute.h>
+
+
+/*
+ *  Result of SIOCGETSGCNT for one (source, group) pair.  Packed so an array of records can be handed to NumPy as-is.
+ *  error is 0 on success, or the errno of the ioctl (e.g., EADDRNOTAVAIL if there is no such entry).
+ */
+struct sg_count_record {
+    uint64_t packets;
+    uint64_t bytes;
+    uint64_t wrong_if;
+    int32_t error;
+} __attribute__((packed));
+
+
+/*
+ *  Result of SIOCGETVIFCNT for one VIF.  error is 0 on success, or the errno of the ioctl (e.g., EINVAL if
+ *  the VIF is not in use).
+ */
+struct vif_count_record {
+    int32_t vifi;
+    int32_t error;
+    uint64_t icount;
+    uint64_t ocount;
+    uint64_t ibytes;
+    uint64_t obytes;
+} __attribute__((packed));
+
+
+/*
+ *  A route for MRT_ADD_MFC or MRT_DEL_MFC.  Addresses are the integer value of the address (host order).
+ */
+struct mfcctl_record {
+    uint32_t origin;
+    uint32_t group;
+    uint16_t parent;
+    uint8_t ttls[MAXVIFS];  // 0 if the route does not forward on the VIF
+} __attribute__((packed));
+
+
+/*
+ *  Kinds of packets read from the multicast routing socket, as set by mroute_classify_packet.
+ */
+#define PACKET_CONTROL 0  // an upcall from the kernel (struct igmpmsg)
+#define PACKET_IGMP 1
+#define PACKET_PIM 2
+#define PACKET_OTHER 3
+#define PACKET_INVALID 4  // too short for the headers of its kind, from mroute_recv_batch only
+
+
+/*
+ *  Summary of one packet read from the multicast routing socket.  Addresses are the integer value of the address
+ *  (host order), and fields that do not apply to a kind of packet are 0.
+ *    PACKET_CONTROL  type is the igmpmsg type (IGMPMSG_*), vif the VIF it arrived on, and src and group the source
+ *                    and group of the packet that caused the upcall.  dst is the group as well.
+ *    PACKET_IGMP     type is the IGMP message type, group its group address, and offset that of the IGMP message.
+ *    PACKET_PIM      type is the PIM message type and offset that of the PIM message.
+ *    PACKET_OTHER    type is the IP protocol number.
+ */
+struct packet_info {
+    int32_t kind;
+    int32_t type;
+    int32_t vif;
+    uint32_t src;
+    uint32_t dst;
+    uint32_t group;
+    int32_t offset;
+} __attribute__((packed));
+
+
+#define RECV_BATCH_MAX 1024  // the kernel handles at most UIO_MAXIOV messages per recvmmsg call
+
+
+/*
+ *  One message from mroute_recv_batch: the number of bytes of it in its ring slot, and its classification.
+ */
+struct recv_record {
+    int32_t length;
+    struct packet_info info;
+} __attribute__((packed));
+
+
+int mroute_classify_packet(const unsigned char *buffer, size_t len, struct packet_info *info);
+size_t mroute_get_sg_counts(int sockfd, const uint32_t *pairs, size_t count, struct sg_count_record *records);
+size_t mroute_get_vif_counts(int sockfd, const uint32_t *vifs, size_t count, struct vif_count_record *records);
+size_t mroute_set_mfcs(int sockfd, int optname, const struct mfcctl_record *records, size_t count, int32_t *errors);
+int mroute_recv_batch(int sockfd, unsigned char *ring, size_t slot_size, size_t count, int timeout_ms,
+                      struct recv_record *records);
+
+
+#endif //PYGMP_MROUTE_H
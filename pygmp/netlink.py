@@ -0,0 +1,360 @@
+#  MIT License
+#
+#  Copyright (c) 2023 Jack Hart
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""Minimal rtnetlink client for the kernel's IPv4 multicast routing tables (RTNL_FAMILY_IPMR).
+
+    The kernel dumps the MFC as RTM_NEWROUTE messages and the VIF table as RTM_NEWLINK messages.  Interfaces are
+    referenced by ifindex in both, so MFC entries are mapped back to VIF indices using the VIF table dump.
+
+    Netlink constants are from linux/netlink.h, linux/rtnetlink.h, and linux/mroute.h.  RTNL_FAMILY_IPMR and
+    RT_TABLE_DEFAULT come from the C extension.
+"""
+from __future__ import annotations
+import errno
+import os
+import socket
+import struct
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Mapping
+
+from pygmp.data import VIFTableEntry, MFCEntry, MFCEvent, MFCEventType
+from pygmp import _kernel, utils
+
+
+NETLINK_ROUTE = 0
+SOL_NETLINK = 270
+NETLINK_ADD_MEMBERSHIP = 1
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+RTM_GETROUTE = 26
+
+RTA_DST = 1
+RTA_SRC = 2
+RTA_IIF = 3
+RTA_MULTIPATH = 9
+RTA_TABLE = 15
+RTA_MFC_STATS = 17
+
+IFLA_AF_SPEC = 26
+IPMRA_TABLE_ID = 1
+IPMRA_TABLE_VIFS = 6
+IPMRA_VIF = 1
+IPMRA_VIFA_IFINDEX = 1
+IPMRA_VIFA_VIF_ID = 2
+IPMRA_VIFA_FLAGS = 3
+IPMRA_VIFA_BYTES_IN = 4
+IPMRA_VIFA_BYTES_OUT = 5
+IPMRA_VIFA_PACKETS_IN = 6
+IPMRA_VIFA_PACKETS_OUT = 7
+IPMRA_VIFA_LOCAL_ADDR = 8
+IPMRA_VIFA_REMOTE_ADDR = 9
+
+_NLA_TYPE_MASK = 0x3fff  # strips NLA_F_NESTED and NLA_F_NET_BYTEORDER
+_RECV_SIZE = 32768
+
+_NLMSGHDR = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+_RTMSG = struct.Struct("=BBBBBBBBI")  # family, dst_len, src_len, tos, table, protocol, scope, type, flags
+_IFINFOMSG = struct.Struct("=BxHiII")  # family, type, index, flags, change
+_RTATTR = struct.Struct("=HH")  # len, type
+_RTNEXTHOP = struct.Struct("=HBBi")  # len, flags, hops (ttl), ifindex
+_MFC_STATS = struct.Struct("=QQQ")  # packets, bytes, wrong_if
+_U16 = struct.Struct("=H")
+_U32 = struct.Struct("=I")
+_U64 = struct.Struct("=Q")
+_ERRNO = struct.Struct("=i")
+_ADDRESS = struct.Struct("!I")  # an IPv4 address, as int(IPv4Address)
+
+
+@contextmanager
+def rtnl_socket(groups: Iterable[int] = ()) -> socket.socket:
+    """A route netlink socket, see open_rtnl_socket()."""
+    sock = open_rtnl_socket(groups)
+    try:
+        yield sock
+    finally:
+        sock.close()
+
+
+def open_rtnl_socket(groups: Iterable[int] = ()) -> socket.socket:
+    """Open a route netlink socket bound to a kernel assigned port id, and joined to the given RTNLGRP_* groups."""
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+    try:
+        sock.bind((0, 0))
+        for group in groups:
+            sock.setsockopt(SOL_NETLINK, NETLINK_ADD_MEMBERSHIP, group)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def dump(sock: socket.socket, msg_type: int, header: bytes) -> bytes:
+    """Send a dump request and return all the raw response messages, up to and including NLMSG_DONE.
+
+        Raises OSError if the kernel responds with an error.
+    """
+    request = _NLMSGHDR.pack(_NLMSGHDR.size + len(header), msg_type, NLM_F_REQUEST | NLM_F_DUMP, 1, 0) + header
+    sock.send(request)
+
+    chunks = []
+    while True:
+        chunk = sock.recv(_RECV_SIZE)
+        chunks.append(chunk)
+        if any(msg_type == NLMSG_DONE for msg_type, _ in messages(chunk)):
+            return b"".join(chunks)
+
+
+def drain(sock: socket.socket) -> bool:
+    """Discard all pending notifications on a subscribed socket without blocking.
+
+        Returns True if there were any, or if the socket overflowed and notifications were lost (ENOBUFS).
+    """
+    received = False
+    while True:
+        try:
+            if not sock.recv(_RECV_SIZE, socket.MSG_DONTWAIT):
+                return received
+            received = True
+        except BlockingIOError:
+            return received
+        except OSError as e:
+            if e.errno != errno.ENOBUFS:
+                raise
+            received = True
+
+
+def ip_mr_vif(table: int = _kernel.RT_TABLE_DEFAULT) -> list[VIFTableEntry]:
+    """Dump the VIF table of a multicast routing table."""
+    with rtnl_socket() as sock:
+        return parse_vif_dump(dump_vifs(sock), table)
+
+
+def ip_mr_cache(table: int = _kernel.RT_TABLE_DEFAULT, int_addresses: bool = False) -> list[MFCEntry]:
+    """Dump the MFC entries of a multicast routing table.  See parse_mfc_message() for int_addresses."""
+    with rtnl_socket() as sock:
+        return parse_mfc_dump(dump_mfc(sock), dump_vifs(sock), table, int_addresses)
+
+
+def dump_vifs(sock: socket.socket) -> bytes:
+    """Raw RTM_NEWLINK messages for the VIFs of every multicast routing table."""
+    return dump(sock, RTM_GETLINK, _IFINFOMSG.pack(_kernel.RTNL_FAMILY_IPMR, 0, 0, 0, 0))
+
+
+def dump_mfc(sock: socket.socket) -> bytes:
+    """Raw RTM_NEWROUTE messages for the MFC entries of every multicast routing table."""
+    return dump(sock, RTM_GETROUTE, _RTMSG.pack(_kernel.RTNL_FAMILY_IPMR, 0, 0, 0, 0, 0, 0, 0, 0))
+
+
+def read_mfc_events(sock: socket.socket, vif_indices: Mapping[int, int],
+                    table: int = _kernel.RT_TABLE_DEFAULT) -> list[MFCEvent]:
+    """Receive one batch of notifications from a socket joined to RTNLGRP_IPV4_MROUTE.  Blocks until one arrives.
+
+        Only MFC changes to the given table are returned.  vif_indices maps interface indices to VIF indices,
+        see VifIndices.
+    """
+    return parse_mfc_events(sock.recv(_RECV_SIZE), vif_indices, table)
+
+
+def parse_mfc_events(buffer: bytes, vif_indices: Mapping[int, int],
+                     table: int = _kernel.RT_TABLE_DEFAULT) -> list[MFCEvent]:
+    """Parse RTM_NEWROUTE and RTM_DELROUTE notifications of the IPMR family for one table."""
+    events = []
+    for msg_type, payload in messages(buffer):
+        if msg_type not in (RTM_NEWROUTE, RTM_DELROUTE) or payload[0] != _kernel.RTNL_FAMILY_IPMR:
+            continue
+        entry = parse_mfc_message(payload, vif_indices)
+        if entry.table == table:
+            events.append(MFCEvent.trusted(MFCEventType(msg_type), entry))
+    return events
+
+
+class VifIndices(dict):
+    """Maps interface indices to the VIF indices of a multicast routing table.
+
+        The VIF table is dumped again the first time an unknown interface index is looked up, so the mapping follows
+        VIFs that are added after it is created.  Unknown interfaces raise KeyError.
+    """
+
+    def __init__(self, table: int = _kernel.RT_TABLE_DEFAULT):
+        super().__init__()
+        self.table = table
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-read the VIF table."""
+        with rtnl_socket() as sock:
+            buffer = dump_vifs(sock)
+        self.clear()
+        self.update(_vif_indices(buffer, self.table))
+
+    def __missing__(self, ifindex: int) -> int:
+        self.refresh()
+        if ifindex not in self:
+            raise KeyError(ifindex)
+        return self[ifindex]
+
+
+def parse_vif_dump(buffer: bytes, table: int = _kernel.RT_TABLE_DEFAULT) -> list[VIFTableEntry]:
+    """Parse the output of dump_vifs() into VIF table entries for one table."""
+    return [_vif_entry(vif) for vif in _vif_attributes(buffer, table)]
+
+
+def parse_mfc_dump(buffer: bytes, vif_buffer: bytes, table: int = _kernel.RT_TABLE_DEFAULT,
+                   int_addresses: bool = False) -> list[MFCEntry]:
+    """Parse the output of dump_mfc() into MFC entries for one table.  vif_buffer is the output of dump_vifs()."""
+    vif_indices = _vif_indices(vif_buffer, table)
+    entries = []
+    for msg_type, payload in messages(buffer):
+        if msg_type != RTM_NEWROUTE:
+            continue
+        entry = parse_mfc_message(payload, vif_indices, int_addresses)
+        if entry.table == table:
+            entries.append(entry)
+    return entries
+
+
+def parse_mfc_message(payload: memoryview, vif_indices: Mapping[int, int], int_addresses: bool = False) -> MFCEntry:
+    """Parse the payload of an RTM_NEWROUTE or RTM_DELROUTE message for the IPMR family.
+
+        vif_indices maps interface indices to VIF indices.  Interfaces that are not VIFs are given an index of -1.
+        The group and origin are IPv4Address objects, or integers (i.e., int(IPv4Address)) if int_addresses is set.
+    """
+    rtm_table = _RTMSG.unpack_from(payload)[4]
+    attributes = dict(_attributes(payload[_RTMSG.size:]))
+
+    table = _U32.unpack(attributes[RTA_TABLE])[0] if RTA_TABLE in attributes else rtm_table
+    iif = _vif_index(vif_indices, _U32.unpack(attributes[RTA_IIF])[0]) if RTA_IIF in attributes else -1
+    packets, nbytes, wrong_if = _MFC_STATS.unpack(attributes[RTA_MFC_STATS]) if RTA_MFC_STATS in attributes else (0, 0, 0)
+
+    oifs = dict()
+    if RTA_MULTIPATH in attributes:
+        nexthops = attributes[RTA_MULTIPATH]
+        offset = 0
+        while offset + _RTNEXTHOP.size <= len(nexthops):
+            length, _, ttl, ifindex = _RTNEXTHOP.unpack_from(nexthops, offset)
+            if length < _RTNEXTHOP.size:
+                break
+            oifs[_vif_index(vif_indices, ifindex)] = ttl
+            offset += _align(length)
+
+    group, origin = _ADDRESS.unpack(attributes[RTA_DST])[0], _ADDRESS.unpack(attributes[RTA_SRC])[0]
+    if not int_addresses:
+        group, origin = utils.intern_address(group), utils.intern_address(origin)
+    return MFCEntry.trusted(group=group, origin=origin, iif=iif, packets=packets, bytes=nbytes, wrong_if=wrong_if,
+                            oifs=oifs, table=table)
+
+
+def messages(buffer: bytes | memoryview) -> Iterator[tuple[int, memoryview]]:
+    """Yield the type and payload of each netlink message in a buffer.
+
+        Raises OSError for NLMSG_ERROR messages with a non-zero error code.
+    """
+    view = memoryview(buffer)
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(view):
+        length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(view, offset)
+        if length < _NLMSGHDR.size or offset + length > len(view):
+            raise ValueError(f"Malformed netlink message of length {length}")
+
+        payload = view[offset + _NLMSGHDR.size:offset + length]
+        if msg_type == NLMSG_ERROR:
+            error = _ERRNO.unpack_from(payload)[0]
+            if error:
+                raise OSError(-error, os.strerror(-error))
+        else:
+            yield msg_type, payload
+        offset += _align(length)
+
+
+def _attributes(buffer: memoryview) -> Iterator[tuple[int, memoryview]]:
+    """Yield the type and payload of each netlink attribute in a buffer."""
+    offset = 0
+    while offset + _RTATTR.size <= len(buffer):
+        length, attr_type = _RTATTR.unpack_from(buffer, offset)
+        if length < _RTATTR.size:
+            break
+        yield attr_type & _NLA_TYPE_MASK, buffer[offset + _RTATTR.size:offset + length]
+        offset += _align(length)
+
+
+def _vif_attributes(buffer: bytes, table: int) -> Iterator[dict[int, memoryview]]:
+    """Yield the IPMRA_VIFA_* attributes of each VIF in a dump_vifs() buffer for one table."""
+    for msg_type, payload in messages(buffer):
+        if msg_type != RTM_NEWLINK:
+            continue
+        af_spec = dict(_attributes(payload[_IFINFOMSG.size:])).get(IFLA_AF_SPEC)
+        if af_spec is None:
+            continue
+        table_attributes = dict(_attributes(af_spec))
+        if IPMRA_TABLE_ID not in table_attributes or _U32.unpack(table_attributes[IPMRA_TABLE_ID])[0] != table:
+            continue
+        for attr_type, vif in _attributes(table_attributes.get(IPMRA_TABLE_VIFS, memoryview(b""))):
+            if attr_type == IPMRA_VIF:
+                yield dict(_attributes(vif))
+
+
+def _vif_indices(buffer: bytes, table: int) -> dict[int, int]:
+    """Map interface indices to VIF indices from a dump_vifs() buffer."""
+    return {_U32.unpack(vif[IPMRA_VIFA_IFINDEX])[0]: _U32.unpack(vif[IPMRA_VIFA_VIF_ID])[0]
+            for vif in _vif_attributes(buffer, table)}
+
+
+def _vif_index(vif_indices: Mapping[int, int], ifindex: int) -> int:
+    """VIF index of an interface, or -1 if it is not a VIF."""
+    try:
+        return vif_indices[ifindex]
+    except KeyError:
+        return -1
+
+
+def _vif_entry(vif: dict[int, memoryview]) -> VIFTableEntry:
+    """Convert IPMRA_VIFA_* attributes into a VIF table entry."""
+    ifindex = _U32.unpack(vif[IPMRA_VIFA_IFINDEX])[0]
+    flags = _U16.unpack(vif[IPMRA_VIFA_FLAGS])[0]
+    local = ifindex if flags & _kernel.VIFF_USE_IFINDEX else utils.intern_address(vif[IPMRA_VIFA_LOCAL_ADDR])
+    return VIFTableEntry.trusted(index=_U32.unpack(vif[IPMRA_VIFA_VIF_ID])[0], name=_interface_name(ifindex),
+                                 bytes_in=_U64.unpack(vif[IPMRA_VIFA_BYTES_IN])[0],
+                                 pkts_in=_U64.unpack(vif[IPMRA_VIFA_PACKETS_IN])[0],
+                                 bytes_out=_U64.unpack(vif[IPMRA_VIFA_BYTES_OUT])[0],
+                                 pkts_out=_U64.unpack(vif[IPMRA_VIFA_PACKETS_OUT])[0],
+                                 flags=flags, local_addr_or_interface=local,
+                                 remote_addr=utils.intern_address(vif[IPMRA_VIFA_REMOTE_ADDR]))
+
+
+def _interface_name(ifindex: int) -> str:
+    """Interface name for an index, or the index as a string if it no longer exists."""
+    try:
+        return socket.if_indextoname(ifindex)
+    except OSError:
+        return str(ifindex)
+
+
+def _align(length: int) -> int:
+    """Netlink messages and attributes are aligned to 4 bytes."""
+    return (length + 3) & ~3
@@ -0,0 +1,210 @@
+#  MIT License
+#
+#  Copyright (c) 2023 Jack Hart
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""Zero-copy views of the packets read from an IGMP socket.
+
+    The views wrap a memoryview of the receive buffer and decode each field when it is accessed, so a listener can
+    dispatch on the protocol or control message type without building an IPHeader and an IGMP or IGMPControl object
+    for every packet.  materialize() converts a view into the corresponding dataclass.  view() picks the view for a
+    packet from its kernel.classify_packet() PacketInfo.
+
+    A view refers to the buffer it was created from.  Do not keep one after the buffer is reused for another packet.
+"""
+from __future__ import annotations
+import struct
+from ipaddress import IPv4Address
+
+from pygmp import kernel, _kernel
+from pygmp.utils import intern_address
+from pygmp.data import (ControlMsgType, IGMP, IGMPControl, IGMPType, IGMPv3MembershipReport, IGMPv3Query, IPHeader,
+                        IPProtocol, IPVersion, PacketKind)
+
+
+IP_HEADER_SIZE = 20  # struct iphdr, without options
+IGMP_SIZE = 8  # struct igmphdr
+IGMPMSG_SIZE = 20  # struct igmpmsg
+
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+_PROTOCOLS = {protocol.value: protocol for protocol in IPProtocol}
+
+
+class IPHeaderView:
+    """An IPv4 header, decoded from the buffer on attribute access."""
+    __slots__ = ("buffer",)
+
+    def __init__(self, buffer: bytes | bytearray | memoryview):
+        buffer = memoryview(buffer)
+        if len(buffer) < IP_HEADER_SIZE:
+            raise ValueError("Packet too short for IP header")
+        self.buffer = buffer
+
+    @property
+    def version(self) -> IPVersion:
+        return IPVersion(self.buffer[0] >> 4)
+
+    @property
+    def ihl(self) -> int:
+        return self.buffer[0] & 0x0f
+
+    @property
+    def tos(self) -> int:
+        return self.buffer[1]
+
+    @property
+    def tot_len(self) -> int:
+        return _U16.unpack_from(self.buffer, 2)[0]
+
+    @property
+    def id(self) -> int:
+        return _U16.unpack_from(self.buffer, 4)[0]
+
+    @property
+    def frag_off(self) -> int:
+        return _U16.unpack_from(self.buffer, 6)[0]
+
+    @property
+    def ttl(self) -> int:
+        return self.buffer[8]
+
+    @property
+    def protocol(self) -> IPProtocol | int:
+        """The IPProtocol, or the protocol number of any other protocol."""
+        protocol = self.buffer[9]
+        return _PROTOCOLS.get(protocol, protocol)
+
+    @property
+    def check(self) -> int:
+        return _U16.unpack_from(self.buffer, 10)[0]
+
+    @property
+    def src_addr(self) -> IPv4Address:
+        return intern_address(_U32.unpack_from(self.buffer, 12)[0])
+
+    @property
+    def dst_addr(self) -> IPv4Address:
+        return intern_address(_U32.unpack_from(self.buffer, 16)[0])
+
+    @property
+    def payload(self) -> memoryview:
+        """The bytes after the header and its options, without copying them."""
+        return self.buffer[self.ihl * 4:]
+
+    def materialize(self) -> IPHeader:
+        return IPHeader.trusted(self.version, self.ihl, self.tos, self.tot_len, self.id, self.frag_off, self.ttl,
+                                self.protocol, self.check, self.src_addr, self.dst_addr)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(protocol={self.buffer[9]}, src_addr={self.src_addr}, dst_addr={self.dst_addr})"
+
+
+class IGMPView:
+    """An IGMP message, decoded from the buffer on attribute access.  The buffer starts after the IP header."""
+    __slots__ = ("buffer",)
+
+    def __init__(self, buffer: bytes | bytearray | memoryview):
+        buffer = memoryview(buffer)
+        if len(buffer) < IGMP_SIZE:
+            raise ValueError("Packet too short for IGMP header")
+        self.buffer = buffer
+
+    @property
+    def type(self) -> IGMPType:
+        return IGMPType(self.buffer[0])
+
+    @property
+    def max_response_time(self) -> int:
+        return self.buffer[1]
+
+    @property
+    def checksum(self) -> int:
+        return _U16.unpack_from(self.buffer, 2)[0]
+
+    @property
+    def group(self) -> IPv4Address:
+        """The group address.  Zero in IGMPv3 membership reports, whose groups are in their records."""
+        return intern_address(_U32.unpack_from(self.buffer, 4)[0])
+
+    def materialize(self) -> IGMP | IGMPv3MembershipReport | IGMPv3Query:
+        """Parse the whole message, including the records and sources of IGMPv3 messages."""
+        return kernel.parse_igmp(bytes(self.buffer))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(type={self.type}, group={self.group})"
+
+
+class IGMPControlView:
+    """A control message from the kernel (struct igmpmsg), decoded from the buffer on attribute access."""
+    __slots__ = ("buffer",)
+
+    def __init__(self, buffer: bytes | bytearray | memoryview):
+        buffer = memoryview(buffer)
+        if len(buffer) < IGMPMSG_SIZE:
+            raise ValueError("Buffer too short for igmpmsg")
+        self.buffer = buffer
+
+    @property
+    def msgtype(self) -> ControlMsgType:
+        return ControlMsgType(self.buffer[8])
+
+    @property
+    def mbz(self) -> int:
+        return self.buffer[9]
+
+    @property
+    def vif(self) -> int:
+        return self.buffer[10]
+
+    @property
+    def im_src(self) -> IPv4Address:
+        return intern_address(_U32.unpack_from(self.buffer, 12)[0])
+
+    @property
+    def im_dst(self) -> IPv4Address:
+        return intern_address(_U32.unpack_from(self.buffer, 16)[0])
+
+    def materialize(self) -> IGMPControl:
+        return IGMPControl.trusted(self.msgtype, self.mbz, self.vif, self.im_src, self.im_dst)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(msgtype={self.msgtype}, vif={self.vif}, im_src={self.im_src}, " \
+               f"im_dst={self.im_dst})"
+
+
+def view(buffer: bytes | bytearray | memoryview,
+         info: _kernel.PacketInfo | None = None) -> IGMPControlView | IGMPView | IPHeaderView:
+    """View a packet read from an IGMP socket.
+
+        The packet is sorted with kernel.classify_packet(), unless its PacketInfo is given, e.g., from
+        kernel.PacketRing.  Kernel control messages become an IGMPControlView and IGMP packets an IGMPView of their
+        payload.  Any other packet is returned as an IPHeaderView.
+
+        Raises ValueError if the buffer is too short for its headers.
+    """
+    if info is None:
+        info = kernel.classify_packet(buffer)
+    if info.kind == PacketKind.CONTROL:
+        return IGMPControlView(buffer)
+    if info.kind == PacketKind.IGMP:
+        return IGMPView(memoryview(buffer)[info.offset:])
+    if info.kind == PacketKind.INVALID:
+        raise ValueError("Packet too short for its headers")
+    return IPHeaderView(buffer)
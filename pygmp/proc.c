@@ -0,0 +1,229 @@
+// MIT License
+//
+// Copyright (c) 2023 Jack Hart
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#include <string.h>
+#include <arpa/inet.h>
+
+#include "proc.h"
+
+
+static const char *skip_blanks(const char *pos, const char *end);
+static int is_line_end(const char *pos, const char *end);
+static int scan_hex(const char **pos, const char *end, uint32_t *out);
+static int scan_dec(const char **pos, const char *end, int64_t *out);
+static int scan_udec(const char **pos, const char *end, uint64_t *out);
+static int scan_token(const char **pos, const char *end, char *out, size_t out_size);
+
+
+/*
+ * Function:  proc_skip_line
+ * -------------------------
+ * Returns a pointer to the start of the next line, or end if there is none.
+ */
+const char *proc_skip_line(const char *pos, const char *end) {
+    const char *newline = memchr(pos, '\n', end - pos);
+    return newline ? newline + 1 : end;
+}
+
+
+/*
+ * Function:  proc_count_lines
+ * ---------------------------
+ * Upper bound on the number of lines in the buffer, used to size output before parsing.
+ */
+size_t proc_count_lines(const char *pos, const char *end) {
+    size_t count = 0;
+    while (pos < end) {
+        pos = proc_skip_line(pos, end);
+        count++;
+    }
+    return count;
+}
+
+
+/*
+ * Function:  proc_scan_mfc_line
+ * -----------------------------
+ * Parses one line of /proc/net/ip_mr_cache and advances pos to the next line.
+ *      %08X %08X %-3hd %8lu %8lu %8lu [ %2d:%-3d ...]
+ *
+ * Returns 1 on success, 0 if the line is blank, and -1 if it is malformed.
+ */
+int proc_scan_mfc_line(const char **pos, const char *end, struct mfc_record *record) {
+    const char *p = *pos;
+    uint32_t group, origin;
+    uint64_t packets, bytes, wrong_if;
+    int64_t iif, vifi, ttl;
+
+    if (is_line_end(skip_blanks(p, end), end)) {
+        *pos = proc_skip_line(p, end);
+        return 0;
+    }
+
+    memset(record, 0, sizeof(*record));
+    if (!scan_hex(&p, end, &group) || !scan_hex(&p, end, &origin) || !scan_dec(&p, end, &iif)
+        || !scan_udec(&p, end, &packets) || !scan_udec(&p, end, &bytes) || !scan_udec(&p, end, &wrong_if))
+        return -1;
+
+    // members are assigned through locals, since the record is packed
+    record->group = ntohl(group);
+    record->origin = ntohl(origin);
+    record->iif = (int16_t)iif;
+    record->packets = packets;
+    record->bytes = bytes;
+    record->wrong_if = wrong_if;
+
+    // outgoing interfaces as index:ttl pairs
+    while (!is_line_end(skip_blanks(p, end), end)) {
+        if (!scan_dec(&p, end, &vifi) || p >= end || *p != ':')
+            return -1;
+        p++;
+        if (!scan_dec(&p, end, &ttl) || vifi < 0 || vifi >= MAXVIFS)
+            return -1;
+        record->ttls[vifi] = (uint8_t)ttl;
+    }
+
+    *pos = proc_skip_line(p, end);
+    return 1;
+}
+
+
+/*
+ * Function:  proc_scan_vif_line
+ * -----------------------------
+ * Parses one line of /proc/net/ip_mr_vif and advances pos to the next line.
+ *      %2td %-10s %8ld %7ld  %8ld %7ld %05X %08X %08X
+ *
+ * Returns 1 on success, 0 if the line is blank, and -1 if it is malformed.
+ */
+int proc_scan_vif_line(const char **pos, const char *end, struct vif_record *record) {
+    const char *p = *pos;
+    int64_t index;
+
+    if (is_line_end(skip_blanks(p, end), end)) {
+        *pos = proc_skip_line(p, end);
+        return 0;
+    }
+
+    memset(record, 0, sizeof(*record));
+    if (!scan_dec(&p, end, &index) || !scan_token(&p, end, record->name, sizeof(record->name))
+        || !scan_udec(&p, end, &record->bytes_in) || !scan_udec(&p, end, &record->pkts_in)
+        || !scan_udec(&p, end, &record->bytes_out) || !scan_udec(&p, end, &record->pkts_out)
+        || !scan_hex(&p, end, &record->flags) || !scan_hex(&p, end, &record->local)
+        || !scan_hex(&p, end, &record->remote))
+        return -1;
+
+    record->index = (int)index;
+    if (!(record->flags & VIFF_USE_IFINDEX))
+        record->local = ntohl(record->local);
+    record->remote = ntohl(record->remote);
+
+    *pos = proc_skip_line(p, end);
+    return 1;
+}
+
+
+static const char *skip_blanks(const char *pos, const char *end) {
+    while (pos < end && (*pos == ' ' || *pos == '\t'))
+        pos++;
+    return pos;
+}
+
+
+static int is_line_end(const char *pos, const char *end) {
+    return pos >= end || *pos == '\n' || *pos == '\r';
+}
+
+
+static int scan_hex(const char **pos, const char *end, uint32_t *out) {
+    const char *p = skip_blanks(*pos, end);
+    const char *start = p;
+    uint32_t value = 0;
+
+    for (; p < end; p++) {
+        char c = *p;
+        if (c >= '0' && c <= '9')
+            value = (value << 4) | (uint32_t)(c - '0');
+        else if (c >= 'A' && c <= 'F')
+            value = (value << 4) | (uint32_t)(c - 'A' + 10);
+        else if (c >= 'a' && c <= 'f')
+            value = (value << 4) | (uint32_t)(c - 'a' + 10);
+        else
+            break;
+    }
+    if (p == start || p - start > 8)
+        return 0;
+
+    *out = value;
+    *pos = p;
+    return 1;
+}
+
+
+static int scan_udec(const char **pos, const char *end, uint64_t *out) {
+    const char *p = skip_blanks(*pos, end);
+    const char *start = p;
+    uint64_t value = 0;
+
+    for (; p < end && *p >= '0' && *p <= '9'; p++)
+        value = value * 10 + (uint64_t)(*p - '0');
+    if (p == start)
+        return 0;
+
+    *out = value;
+    *pos = p;
+    return 1;
+}
+
+
+static int scan_dec(const char **pos, const char *end, int64_t *out) {
+    const char *p = skip_blanks(*pos, end);
+    uint64_t value;
+    int negative = 0;
+
+    if (p < end && *p == '-') {
+        negative = 1;
+        p++;
+    }
+    if (!scan_udec(&p, end, &value))
+        return 0;
+
+    *out = negative ? -(int64_t)value : (int64_t)value;
+    *pos = p;
+    return 1;
+}
+
+
+static int scan_token(const char **pos, const char *end, char *out, size_t out_size) {
+    const char *p = skip_blanks(*pos, end);
+    const char *start = p;
+
+    while (p < end && *p != ' ' && *p != '\t' && *p != '\n' && *p != '\r')
+        p++;
+    if (p == start || (size_t)(p - start) >= out_size)
+        return 0;
+
+    memcpy(out, start, p - start);
+    out[p - start] = '\0';
+    *pos = p;
+    return 1;
+}
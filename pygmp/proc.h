@@ -0,0 +1,68 @@
+// MIT License
+//
+// Copyright (c) 2023 Jack Hart
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#ifndef PYGMP_PROC_H
+#define PYGMP_PROC_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include <linux/mroute.h>
+
+
+/*
+ *  Entry of /proc/net/ip_mr_cache.  Packed so an array of records can be handed to NumPy as-is.
+ *  Addresses are the integer value of the address (host order), not the raw network order value.
+ */
+struct mfc_record {
+    uint32_t group;
+    uint32_t origin;
+    int16_t iif;
+    uint64_t packets;
+    uint64_t bytes;
+    uint64_t wrong_if;
+    uint8_t ttls[MAXVIFS];  // 0 if the entry does not forward on the VIF
+} __attribute__((packed));
+
+
+/*
+ *  Entry of /proc/net/ip_mr_vif.  The local address is the interface index if VIFF_USE_IFINDEX is set.
+ */
+struct vif_record {
+    int index;
+    char name[32];
+    uint64_t bytes_in;
+    uint64_t pkts_in;
+    uint64_t bytes_out;
+    uint64_t pkts_out;
+    uint32_t flags;
+    uint32_t local;
+    uint32_t remote;
+};
+
+
+const char *proc_skip_line(const char *pos, const char *end);
+size_t proc_count_lines(const char *pos, const char *end);
+int proc_scan_mfc_line(const char **pos, const char *end, struct mfc_record *record);
+int proc_scan_vif_line(const char **pos, const char *end, struct vif_record *record);
+
+
+#endif //PYGMP_PROC_H
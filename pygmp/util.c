@@ -104,4 +104,53 @@ int inet_pton_with_exception(int af, const char *src_str, void *dst) {
         return 0;
     }
     return 1;
-}
\ No newline at end of file
+}
+
+
+/*
+ * Function:  in_addr_converter
+ * ----------------------------
+ *
+ * PyArg "O&" converter from a str, or an int (i.e., int(IPv4Address)), to a struct in_addr in network byte order.
+ * Integers are not parsed, so callers that keep addresses as integers skip inet_pton.
+ * Returns 1 on success, or 0 with a Python exception set.
+ *
+ */
+int in_addr_converter(PyObject *obj, void *dst) {
+    struct in_addr *addr = (struct in_addr *) dst;
+
+    if (PyLong_Check(obj)) {
+        unsigned long value = PyLong_AsUnsignedLong(obj);
+        if (value == (unsigned long) -1 && PyErr_Occurred())
+            return 0;
+        if (value > 0xFFFFFFFFUL) {
+            PyErr_SetString(PyExc_ValueError, "IPv4 address integer out of range");
+            return 0;
+        }
+        addr->s_addr = htonl((uint32_t) value);
+        return 1;
+    }
+    if (PyUnicode_Check(obj)) {
+        const char *str = PyUnicode_AsUTF8(obj);
+        if (str == NULL)
+            return 0;
+        return inet_pton_with_exception(AF_INET, str, addr);
+    }
+
+    PyErr_Format(PyExc_TypeError, "Expected an address as a str or int, not %s", Py_TYPE(obj)->tp_name);
+    return 0;
+}
+
+
+/*
+ * Function:  in_addr_to_object
+ * ----------------------------
+ *
+ * Converts a network byte order address to a Python str, or to an int (i.e., int(IPv4Address)) if as_int is set.
+ *
+ */
+PyObject *in_addr_to_object(const struct in_addr *addr, int as_int) {
+    if (as_int)
+        return PyLong_FromUnsignedLong(ntohl(addr->s_addr));
+    return inet_ntop_with_exception(AF_INET, addr);
+}
@@ -25,6 +25,8 @@
 int inet_pton_with_exception(int af, const char *src_str, void *dst);
 PyObject *sin_addr_with_exception(const struct ifaddrs *ifa);
 PyObject *inet_ntop_with_exception(int af, const void *src);
+int in_addr_converter(PyObject *obj, void *dst);
+PyObject *in_addr_to_object(const struct in_addr *addr, int as_int);
 
 
 /*
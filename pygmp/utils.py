@@ -20,41 +20,157 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 from __future__ import annotations
-import hashlib
+import functools
 import socket
 import sys
+import threading
+import time
+from collections import namedtuple
 from ipaddress import ip_address, IPv4Address, IPv6Address
 
 
-def file_cache(filename):
-    """Save the contents of a file to a cache, and only run the decorated function if the file has changed.
-        This still has the overhead of reading the file.
+_FILE_CACHE_BUFFER_SIZE = 64 * 1024
+_ADDRESS_POOL_SIZE = 8192
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "ttl"])
+
+
+def file_cache(filename, ttl: float = 0.0):
+    """Save the result of a function that parses a file, and only run the decorated function if the file has changed.
+
+        The file is read in binary into a reusable buffer and compared byte for byte against the previous snapshot,
+        so there is no decoding or hashing on each call.  On a change, the decorated function is called with a
+        memoryview of the content that was read, so it parses exactly what was compared, without reading the file
+        again.  The view is only valid during the call.  This still has the overhead of reading the file, unless
+        a ttl (in seconds) is set, in which case the file is not read again until ttl seconds after the last check.
+
+        filename can also be a callable returning the path, which is called on each read, so a module level path
+        can still be patched after decorating.  The wrapper exposes cache_info(), cache_clear(), and set_ttl(ttl) in
+        the style of functools.lru_cache.
     """
     def file_cache_wrapper(func):
-        cache = {'last_hash': None, 'result': None}
+        lock = threading.Lock()
+        cache = {'snapshot': None, 'result': None, 'checked_at': 0.0, 'ttl': ttl, 'hits': 0, 'misses': 0,
+                 'buffer': bytearray(_FILE_CACHE_BUFFER_SIZE)}
+
+        @functools.wraps(func)
         def wrapper():
-            with open(filename, 'r') as f:
-                content = f.read()
-            new_hash = hashlib.md5(content.encode()).hexdigest()
+            with lock:
+                now = time.monotonic()
+                if cache['snapshot'] is not None and now - cache['checked_at'] < cache['ttl']:
+                    cache['hits'] += 1
+                    return cache['result']
+
+                with _read_into(filename() if callable(filename) else filename, cache) as content:
+                    cache['checked_at'] = now
+                    if content == cache['snapshot']:
+                        cache['hits'] += 1
+                        return cache['result']
 
-            if new_hash != cache['last_hash']:
-                cache['result'] = func()
-                cache['last_hash'] = new_hash
+                    cache['result'] = func(content)
+                    cache['snapshot'] = bytes(content)
+                    cache['misses'] += 1
+                    return cache['result']
 
-            return cache['result']
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(cache['hits'], cache['misses'], cache['ttl'])
+
+        def cache_clear():
+            with lock:
+                cache.update(snapshot=None, result=None, checked_at=0.0, hits=0, misses=0)
+
+        def set_ttl(new_ttl: float):
+            with lock:
+                cache['ttl'] = new_ttl
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.set_ttl = set_ttl
         return wrapper
     return file_cache_wrapper
 
 
+def _read_into(filename, cache: dict) -> memoryview:
+    """Read a whole file into the cache's reusable buffer, growing it as needed.
+
+        Returns a view of the content in the buffer, without copying it.  Release the view before the next read, as
+        the buffer cannot grow while it is exported.
+    """
+    buffer = cache['buffer']
+    size = 0
+    with open(filename, 'rb', buffering=0) as f:
+        while True:
+            if size == len(buffer):
+                buffer.extend(bytes(len(buffer)))
+            read = f.readinto(memoryview(buffer)[size:])
+            if not read:
+                break
+            size += read
+    return memoryview(buffer)[:size]
+
+
 def host_hex_to_ip(hex_val: str) -> IPv4Address | IPv6Address:
-    """Convert a hex string in network byte order (big-endian) to IP address object."""
+    """Convert a hex string in network byte order (big-endian) to IP address object.  IPv4 addresses are interned."""
     # Convert hex string to bytes
     net_order = bytes.fromhex(hex_val)
-    net_order = net_order if sys.byteorder == 'big' else net_order[::-1]
 
-    if len(net_order) == 4:  # IPv4 address
-        return ip_address(socket.inet_ntop(socket.AF_INET, net_order))
+    if len(net_order) == 4:  # IPv4 address, read back as the host integer it was printed from
+        return _ipv4_from_int(int.from_bytes(net_order, sys.byteorder))
     elif len(net_order) == 16:  # IPv6 address
+        net_order = net_order if sys.byteorder == 'big' else net_order[::-1]
         return ip_address(socket.inet_ntop(socket.AF_INET6, net_order))
     else:
         raise ValueError(f"Invalid IP address length: {len(net_order)}")
+
+
+def intern_address(address: IPv4Address | IPv6Address | str | int | bytes) -> IPv4Address | IPv6Address:
+    """Get the shared IPv4Address object for an address, like ip_address() but without a new object for every call.
+
+        IPv4 addresses come from a bounded pool, with least recently used eviction, so the groups and sources seen
+        over and over by the parsers, the data classes, and the config share one object each and compare cheaply.
+        Strings are only parsed the first time they are seen, and are looked up in the same pool, so every form of
+        an address gets the same object while it is pooled.  IPv6 addresses are passed to ip_address() as before.
+        Integers are taken as IPv4 addresses and bytes as packed addresses, as with ip_address().
+    """
+    if type(address) is str:
+        parsed = _parse_address(address)
+        return _ipv4_from_int(parsed) if type(parsed) is int else parsed
+    if type(address) is int:
+        return _ipv4_from_int(address)
+    if isinstance(address, IPv4Address):
+        return _ipv4_from_int(int(address))
+    if isinstance(address, (bytes, bytearray, memoryview)) and len(address) == 4:
+        return _ipv4_from_int(int.from_bytes(address, 'big'))
+    return ip_address(address)
+
+
+def address_pool_info():
+    """Hits, misses, and size of the interned IPv4 address pool, from its integer keyed cache."""
+    return _ipv4_from_int.cache_info()
+
+
+def address_pool_clear():
+    """Drop all interned addresses."""
+    _parse_address.cache_clear()
+    _ipv4_from_int.cache_clear()
+
+
+@functools.lru_cache(maxsize=_ADDRESS_POOL_SIZE)
+def _ipv4_from_int(address: int) -> IPv4Address:
+    return IPv4Address(address)
+
+
+@functools.lru_cache(maxsize=_ADDRESS_POOL_SIZE)
+def _parse_address(address: str) -> int | IPv6Address:
+    """The integer of an IPv4 address, to look up in the pool, or the IPv6 address object."""
+    parsed = ip_address(address)
+    return int(parsed) if parsed.version == 4 else parsed
+
+
+def ip_to_host_hex(address: IPv4Address | IPv6Address | str) -> str:
+    """Convert an IP address to the upper-case, host byte order hex string used in /proc/net files."""
+    net_order = ip_address(address).packed
+    net_order = net_order if sys.byteorder == 'big' else net_order[::-1]
+    return net_order.hex().upper()
@@ -34,7 +34,7 @@ def main(args):
     pygmp_dir = Path.cwd().joinpath("pygmp")
 
     module1 = Extension('pygmp._kernel',
-                        sources=["pygmp/_kernel.c", "pygmp/util.c"],
+                        sources=["pygmp/_kernel.c", "pygmp/util.c", "pygmp/proc.c", "pygmp/mroute.c"],
                         include_dirs=[pygmp_dir, include_dir])
 
     if "--debug" in args:
@@ -0,0 +1,231 @@
+"""Micro-benchmarks comparing the optimized code paths against the pure Python ones.
+
+    These are not collected with the rest of the tests.  Run them with `task benchmark`, or `pytest -s tests/benchmarks.py`.
+"""
+import socket
+import threading
+import time
+import timeit
+from ipaddress import ip_address
+
+import pytest
+
+from pygmp import kernel, data, packet, utils
+
+
+_BENCHMARK_ROUTES = 100_000
+
+
+def _benchmark(name: str, func, repeat: int = 3) -> float:
+    """Print and return the best time of a few runs of func."""
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"\n{name}: {best * 1000:.1f} ms")
+    return best
+
+
+@pytest.fixture(scope="module")
+def large_ip_mr_cache(tmp_path_factory):
+    path = tmp_path_factory.mktemp("proc") / "ip_mr_cache"
+    lines = ["Group    Origin   Iif     Pkts    Bytes    Wrong Oifs\n"]
+    for i in range(_BENCHMARK_ROUTES):
+        group = utils.ip_to_host_hex(ip_address("239.0.0.0") + i)
+        origin = utils.ip_to_host_hex(ip_address("10.0.0.0") + i % 250)
+        lines.append(f"{group} {origin} {i % 3:<3d} {i:8d} {i * 1000:8d} {0:8d}  1:1    2:1  \n")
+    path.write_text("".join(lines))
+    return path
+
+
+@pytest.fixture
+def ip_mr_cache_path(large_ip_mr_cache, monkeypatch):
+    monkeypatch.setattr(kernel, "IP_MR_CACHE_DIR", str(large_ip_mr_cache))
+    return large_ip_mr_cache
+
+
+def test_benchmark_ip_mr_cache(ip_mr_cache_path):
+    python = _benchmark("ip_mr_cache, Python parser", lambda: list(kernel.iter_ip_mr_cache()), repeat=1)
+    def native_uncached():
+        kernel.ip_mr_cache.cache_clear()
+        return kernel.ip_mr_cache(data.MRTBackend.PROC)
+
+    native = _benchmark("ip_mr_cache, C parser", native_uncached, repeat=1)
+    records = _benchmark("ip_mr_cache_records, C parser without MFCEntry", kernel.ip_mr_cache_records)
+    print(f"speedup: {python / native:.1f}x, {python / records:.1f}x without MFCEntry")
+    assert records < python
+
+
+def test_benchmark_ip_mr_cache_array(ip_mr_cache_path):
+    pytest.importorskip("numpy")
+    _benchmark("ip_mr_cache_array, C parser into packed records", kernel.ip_mr_cache_array)
+
+
+@pytest.fixture
+def mrt_socket():
+    with kernel.igmp_socket() as sock:
+        try:
+            kernel.enable_mrt(sock)
+        except OSError as e:
+            pytest.skip(f"Multicast routing is not available: {e}")
+        yield sock
+        kernel.flush(sock)
+        kernel.disable_mrt(sock)
+
+
+@pytest.fixture
+def mrt_vifs(mrt_socket):
+    """mrt_socket with VIFs 0 and 1 on the first two non-loopback interfaces."""
+    indexes = [interface.index for interface in kernel.network_interfaces().values()
+               if data.InterfaceFlags.LOOPBACK not in interface.flags]
+    if len(indexes) < 2:
+        pytest.skip("At least two non-loopback interfaces are needed.")
+    kernel.add_vif(mrt_socket, data.VifCtl(vifi=0, lcl_addr=int(indexes[0]), threshold=1))
+    kernel.add_vif(mrt_socket, data.VifCtl(vifi=1, lcl_addr=int(indexes[1]), threshold=1))
+    return mrt_socket
+
+
+def _mfcctls(count: int) -> list[data.MfcCtl]:
+    """Routes from VIF 0 to VIF 1 for count consecutive groups."""
+    return [data.MfcCtl(origin="10.0.0.1", mcastgroup=ip_address("239.0.0.0") + i, parent=0, ttls=[0, 1])
+            for i in range(count)]
+
+
+def test_benchmark_add_mfc_many(mrt_vifs):
+    mrt_socket = mrt_vifs
+    mfcctls = _mfcctls(_BENCHMARK_ROUTES // 10)
+
+    def add_each():
+        for mfcctl in mfcctls:
+            kernel.add_mfc(mrt_socket, mfcctl)
+
+    single = _benchmark("add_mfc, one call per route", add_each, repeat=1)
+    kernel.flush(mrt_socket, vifs=False)
+    batched = _benchmark("add_mfc_many", lambda: kernel.add_mfc_many(mrt_socket, mfcctls), repeat=1)
+    print(f"speedup: {single / batched:.1f}x")
+    assert not any(kernel.add_mfc_many(mrt_socket, mfcctls))
+
+
+def _latencies(func, count: int = 200, interval: float = 0.001) -> list[float]:
+    """Call func periodically, like a REST handler, and return the sorted latencies of each call."""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(interval)
+    return sorted(latencies)
+
+
+def test_benchmark_concurrent_latency(mrt_vifs):
+    mrt_socket = mrt_vifs
+    mfcctls = _mfcctls(1000)
+
+    stop = threading.Event()
+
+    def program_routes():
+        # stands in for the listener thread, programming routes as fast as it can
+        while not stop.is_set():
+            for mfcctl in mfcctls:
+                kernel.add_mfc(mrt_socket, mfcctl)
+            for mfcctl in mfcctls:
+                kernel.del_mfc(mrt_socket, mfcctl)
+
+    request = kernel.network_interfaces  # stands in for a REST handler
+    idle = _latencies(request)
+    listener = threading.Thread(target=program_routes, daemon=True)
+    listener.start()
+    try:
+        busy = _latencies(request)
+    finally:
+        stop.set()
+        listener.join()
+
+    for name, latencies in (("idle", idle), ("while programming routes", busy)):
+        print(f"\nnetwork_interfaces latency {name}: p50 {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+
+
+def test_benchmark_data_construction():
+    header = dict(version=4, ihl=5, tos=0, tot_len=20, id=0, frag_off=0, ttl=1, protocol=2, check=0,
+                  src_addr="10.0.0.1", dst_addr="239.0.0.1")
+    group, origin = ip_address("239.0.0.1"), ip_address("10.0.0.1")
+    count = 100_000
+
+    def construct(func):
+        for _ in range(count):
+            func()
+
+    for name, func in (("IPHeader", lambda: data.IPHeader(**header)),
+                       ("IGMP", lambda: data.IGMP(0x16, 0, 0, "239.0.0.1")),
+                       ("MFCEntry", lambda: data.MFCEntry(group, origin, 0, 1, 2, 0, {1: 1})),
+                       ("MFCEntry.trusted", lambda: data.MFCEntry.trusted(group, origin, 0, 1, 2, 0, {1: 1}))):
+        best = _benchmark(f"{count} x {name}", lambda: construct(func))
+        print(f"{best / count * 1e9:.0f} ns per object")
+
+
+def test_benchmark_packet_view():
+    control = b'E\x00\x00\x1c\x00\x00@\x00\x01\x00\x00\x00\n\x00\x00\x01\xef\x00\x00\x04\x01\x00\x00\x00\x00\x00\x00\x00'
+    count = 100_000
+
+    def parse():
+        for _ in range(count):
+            if kernel.parse_ip_header(control).protocol == data.IPProtocol.CONTROL:
+                kernel.parse_igmp_control(control).msgtype
+
+    def view():
+        for _ in range(count):
+            message = packet.view(control)
+            if isinstance(message, packet.IGMPControlView):
+                message.msgtype
+
+    parsed = _benchmark(f"{count} control messages, parse_ip_header and parse_igmp_control", parse)
+    viewed = _benchmark(f"{count} control messages, packet.view", view)
+    print(f"speedup: {parsed / viewed:.1f}x")
+    assert viewed < parsed
+
+
+def test_benchmark_classify_packet():
+    control = b'E\x00\x00\x1c\x00\x00@\x00\x01\x00\x00\x00\n\x00\x00\x01\xef\x00\x00\x04\x01\x00\x00\x00\x00\x00\x00\x00'
+    count = 100_000
+
+    def view():  # the listener's pipeline before classify_packet: dispatch on the views in Python
+        for _ in range(count):
+            if packet.IPHeaderView(control).protocol == data.IPProtocol.CONTROL:
+                packet.IGMPControlView(control).materialize()
+
+    def classify():
+        for _ in range(count):
+            info = kernel.classify_packet(control)
+            if info.kind == data.PacketKind.CONTROL:
+                kernel.igmp_control(info)
+
+    viewed = _benchmark(f"{count} control messages, IPHeaderView and IGMPControlView.materialize", view)
+    classified = _benchmark(f"{count} control messages, classify_packet and igmp_control", classify)
+    print(f"{count / viewed:,.0f} msgs/s viewed, {count / classified:,.0f} msgs/s classified")
+    assert classified < viewed
+
+
+def test_benchmark_packet_ring():
+    control = b'E\x00\x00\x1c\x00\x00@\x00\x01\x00\x00\x00\n\x00\x00\x01\xef\x00\x00\x04\x01\x00\x00\x00\x00\x00\x00\x00'
+    rounds, burst = 400, 250  # bursts stay under net.unix.max_dgram_qlen
+    sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    ring = kernel.PacketRing(receiver, batch_size=64)
+
+    def recvfrom():  # the listener before the ring, one message per call
+        for _ in range(rounds):
+            for _ in range(burst):
+                sender.send(control)
+            for _ in range(burst):
+                kernel.classify_packet(receiver.recv(6000))
+
+    def batched():
+        for _ in range(rounds):
+            for _ in range(burst):
+                sender.send(control)
+            received = 0
+            while received < burst:
+                received += len(ring.receive())
+
+    with sender, receiver:
+        single = _benchmark(f"{rounds * burst} control messages, send, recv and classify_packet", recvfrom)
+        ringed = _benchmark(f"{rounds * burst} control messages, send and PacketRing.receive", batched)
+    print(f"speedup: {single / ringed:.1f}x")
+    assert ringed < single
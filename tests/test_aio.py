@@ -0,0 +1,62 @@
+import asyncio
+import socket
+
+import pytest
+
+from pygmp import aio, data, kernel
+
+_IGMPMSG_BYTES = b'E\x00\x00\x1c\x00\x00@\x00\x01\x00\x00\x00\n\x00\x00\x01\xef\x00\x00\x04\x01\x00\x00\x00\x00\x00\x00\x00'
+_IGMP_IP_PACKET = b'F\xc0\x00 \x00\x00@\x00\x01\x02\xeb\x14\n\x00\x00\x01\xef\x00\x00\x02\x94\x04\x00\x00\x16\x00\xfa\xfc\xef\x00\x00\x02'
+
+
+@pytest.fixture
+def datagram_pair():
+    sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    with sender, receiver:
+        yield sender, receiver
+
+
+def test_packet_reader_iterate(datagram_pair):
+    sender, receiver = datagram_pair
+
+    async def read(count):
+        reader = aio.PacketReader(receiver, batch_size=4)
+        asyncio.get_running_loop().call_later(0.01, sender.send, _IGMP_IP_PACKET)  # after the reader is waiting
+        messages = []
+        async for msg in reader:
+            messages.append(msg)
+            if len(messages) == count:
+                return messages
+
+    sender.send(_IGMPMSG_BYTES)
+    control, info = asyncio.run(asyncio.wait_for(read(2), timeout=5))
+    assert control == kernel.parse_igmp_control(_IGMPMSG_BYTES)
+    assert info == kernel.classify_packet(_IGMP_IP_PACKET)
+    assert not receiver.getblocking()
+
+
+def test_packet_reader_receive(datagram_pair):
+    sender, receiver = datagram_pair
+    reader = aio.PacketReader(receiver, batch_size=4)
+    for _ in range(6):
+        sender.send(_IGMP_IP_PACKET)
+
+    infos = asyncio.run(reader.receive())
+    assert [info.kind for info in infos] == [data.PacketKind.IGMP] * 4
+    assert reader.packet(3, infos[3]) == _IGMP_IP_PACKET
+    assert len(asyncio.run(reader.receive())) == 2
+
+
+def test_packet_reader_cancel(datagram_pair):
+    _, receiver = datagram_pair
+    reader = aio.PacketReader(receiver)
+
+    async def cancel():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(reader.messages(), timeout=0.01)
+        assert not asyncio.get_running_loop().remove_reader(receiver.fileno())  # removed on cancel
+
+    asyncio.run(cancel())
+    receiver.close()
+    with pytest.raises(ValueError):
+        asyncio.run(reader.messages())
@@ -176,3 +176,22 @@ def test_igmpv3_membership_report_raw_init():
 
 
 
+
+
+def test_records_are_slotted(inaddr_str, multicast_addr):
+    entry = data.MFCEntry(multicast_addr, inaddr_str, 0, 0, 0, 0, {1: 1})
+    assert not hasattr(entry, "__dict__")
+    with pytest.raises(AttributeError):
+        entry.unknown = 1
+
+
+def test_trusted_skips_conversion(inaddr_str, multicast_addr):
+    header = data.IPHeader.trusted(4, 5, 0, 20, 0, 0, 1, 2, 0, inaddr_str, multicast_addr)
+    assert header.version == 4 and header.src_addr == inaddr_str
+
+    entry = data.MFCEntry.trusted(ip_address(multicast_addr), ip_address(inaddr_str), 0, 1, 2, 0, oifs={1: 1})
+    assert entry == data.MFCEntry(multicast_addr, inaddr_str, 0, 1, 2, 0, {1: 1})
+    assert entry.table == data.MFCEntry(multicast_addr, inaddr_str, 0, 1, 2, 0, {1: 1}).table
+
+    with pytest.raises(TypeError):
+        data.MFCEntry.trusted(ip_address(multicast_addr))
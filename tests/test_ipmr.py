@@ -1,11 +1,15 @@
+import errno
+from array import array
+from ipaddress import ip_address
 from random import randint
 import pytest
 import socket
+import struct
 from scapy.all import *
 from scapy.all import IP, ICMP, sr1
 from time import sleep
 
-from pygmp import kernel, data
+from pygmp import kernel, data, _kernel
 
 
 @pytest.fixture
@@ -83,6 +87,144 @@ def test_ssm_route(raw_socket, packet, cleaned_igmp_sock):
     assert new_mr_cache[0].packets == 1
 
 
+def test_netlink_backend(cleaned_igmp_sock):
+    kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=[0, 1, 2]))
+    kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="20.0.0.1", mcastgroup="239.0.0.3", parent=1, ttls=[1]))
+
+    assert kernel.ip_mr_vif(data.MRTBackend.NETLINK) == kernel.ip_mr_vif(data.MRTBackend.PROC)
+    by_route = lambda entries: sorted(entries, key=lambda e: (e.group, e.origin))
+    assert by_route(kernel.ip_mr_cache(data.MRTBackend.NETLINK)) == by_route(kernel.ip_mr_cache(data.MRTBackend.PROC))
+
+
+def test_mfc_subscription(cleaned_igmp_sock):
+    with kernel.MFCSubscription() as subscription:
+        subscription.settimeout(5)
+        kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=[0, 1]))
+        kernel.del_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=[]))
+        events = subscription.read() + subscription.read()
+
+    assert [event.type for event in events] == [data.MFCEventType.ADD, data.MFCEventType.DELETE]
+    assert events[0].entry == data.MFCEntry("239.0.0.2", "10.0.0.1", 0, 0, 0, 0, {1: 1})
+
+
+def test_get_mfc_counts_array(raw_socket, packet, cleaned_igmp_sock):
+    pytest.importorskip("numpy")
+    kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=[0, 1, 0]))
+    kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.3", parent=0, ttls=[0, 0, 1]))
+
+    raw_socket.bind(("10.0.0.1", 0))
+    raw_socket.sendto(raw(_new_packet(packet, "10.0.0.1", "239.0.0.2")), ("239.0.0.2", 0))
+    sleep(1)
+
+    pairs = [("10.0.0.1", "239.0.0.2"), ("10.0.0.1", "239.0.0.3"), ("10.0.0.1", "239.0.0.9")]
+    counts = kernel.get_mfc_counts_array(cleaned_igmp_sock, pairs)
+    expected = kernel.get_mfc_counts(cleaned_igmp_sock, data.SGReq(src="10.0.0.1", grp="239.0.0.2"))
+    assert (counts[0]['packets'], counts[0]['bytes'], counts[0]['wrong_if']) == (expected.pktcnt, expected.bytecnt, expected.wrong_if)
+    assert counts[0]['packets'] == 1 and counts[1]['packets'] == 0
+    assert list(counts['error']) == [0, 0, errno.EADDRNOTAVAIL]
+
+
+def test_get_sg_counts_buffers(cleaned_igmp_sock):
+    with pytest.raises(ValueError):
+        _kernel.get_sg_counts(cleaned_igmp_sock, bytes(12), bytearray(_kernel.SG_COUNT_RECORD_SIZE * 2))
+    with pytest.raises(ValueError):
+        _kernel.get_sg_counts(cleaned_igmp_sock, bytes(16), bytearray(_kernel.SG_COUNT_RECORD_SIZE))
+    out = bytearray(_kernel.SG_COUNT_RECORD_SIZE)
+    assert _kernel.get_sg_counts(cleaned_igmp_sock, array("I", [int(ip_address("10.0.0.1")), int(ip_address("239.0.0.9"))]), out) == 1
+
+
+def test_get_vif_counts_array(raw_socket, packet, cleaned_igmp_sock):
+    pytest.importorskip("numpy")
+    kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=[0, 1, 0]))
+
+    raw_socket.bind(("10.0.0.1", 0))
+    raw_socket.sendto(raw(_new_packet(packet, "10.0.0.1", "239.0.0.2")), ("239.0.0.2", 0))
+    sleep(1)
+
+    counts = kernel.get_vif_counts_array(cleaned_igmp_sock)
+    assert len(counts) == _kernel.MAXVIFS
+    assert list(counts['vifi'][counts['error'] == 0]) == [0, 1, 2]
+    assert (counts["error"][3:] == errno.EINVAL).all()
+    assert counts[0]['icount'] == 1 and counts[1]['ocount'] == 1
+
+    expected = kernel.get_vif_counts(cleaned_igmp_sock, data.VifReq(vifi=1))
+    subset = kernel.get_vif_counts_array(cleaned_igmp_sock, [1])
+    assert (subset[0]['icount'], subset[0]['ocount'], subset[0]['ibytes'], subset[0]['obytes']) == \
+           (expected.icount, expected.ocount, expected.ibytes, expected.obytes)
+
+
+def test_add_mfc_many(cleaned_igmp_sock):
+    mfcctls = [data.MfcCtl(origin="10.0.0.1", mcastgroup=f"239.0.1.{i}", parent=0, ttls=[0, 1, 2]) for i in range(50)]
+    mfcctls.append(data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.2.1", parent=40, ttls=[0, 1]))  # no such vif
+
+    errors = kernel.add_mfc_many(cleaned_igmp_sock, mfcctls)
+    assert list(errors) == [0] * 50 + [errno.ENFILE]
+    entries = {str(entry.group): entry for entry in kernel.ip_mr_cache()}
+    assert len(entries) == 50
+    assert entries["239.0.1.7"] == data.MFCEntry("239.0.1.7", "10.0.0.1", 0, 0, 0, 0, {1: 1, 2: 2})
+
+    errors = kernel.del_mfc_many(cleaned_igmp_sock, mfcctls[:10] + mfcctls[:1])
+    assert list(errors) == [0] * 10 + [errno.ENOENT]
+    assert len(kernel.ip_mr_cache()) == 40
+
+
+def test_add_mfc_many_packed(cleaned_igmp_sock):
+    record = struct.Struct(data.MfcCtl.record_format)
+    records = record.pack(int(ip_address("10.0.0.1")), int(ip_address("239.0.0.2")), 0, bytes([0, 1]))
+    assert list(kernel.add_mfc_many(cleaned_igmp_sock, records)) == [0]
+    assert kernel.ip_mr_cache()[0].oifs == {1: 1}
+    with pytest.raises(ValueError):
+        kernel.add_mfc_many(cleaned_igmp_sock, records[:-1])
+
+
+@pytest.mark.parametrize("ttls", [bytes([0, 1, 2]), bytearray([0, 1, 2]), array("B", [0, 1, 2]),
+                                  memoryview(bytes([0, 1, 2] + [0] * 29))])
+def test_add_mfc_buffer_ttls(cleaned_igmp_sock, ttls):
+    kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=ttls))
+    assert kernel.ip_mr_cache()[0].oifs == {1: 1, 2: 2}
+
+
+def test_add_mfc_buffer_ttls_item_size(cleaned_igmp_sock):
+    with pytest.raises(TypeError):
+        kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0,
+                                                      ttls=array("H", [0, 1, 2])))
+
+
+@pytest.fixture
+def table_igmp_sock():
+    with kernel.igmp_socket(table=10) as sock:
+        kernel.flush(sock)
+        kernel.enable_mrt(sock)
+        yield sock
+        kernel.flush(sock)
+
+
+def test_mrt_table(cleaned_igmp_sock, table_igmp_sock):
+    kernel.add_vif(table_igmp_sock, data.VifCtl(vifi=0, lcl_addr="20.0.0.1", threshold=1))
+    kernel.add_vif(table_igmp_sock, data.VifCtl(vifi=1, lcl_addr="30.0.0.1", threshold=1))
+    kernel.add_mfc(table_igmp_sock, data.MfcCtl(origin="20.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=[0, 1]))
+
+    assert kernel.ip_mr_cache() == []
+    assert kernel.ip_mr_cache(table=10) == [data.MFCEntry("239.0.0.2", "20.0.0.1", 0, 0, 0, 0, {1: 1}, table=10)]
+    assert [vif.name for vif in kernel.ip_mr_vif(table=10)] == ["a2", "a3"]
+    assert len(kernel.ip_mr_vif()) == 3
+    with pytest.raises(ValueError):
+        kernel.ip_mr_cache(data.MRTBackend.PROC, table=10)
+
+
+def test_mfc_subscription_table(cleaned_igmp_sock, table_igmp_sock):
+    kernel.add_vif(table_igmp_sock, data.VifCtl(vifi=0, lcl_addr="20.0.0.1", threshold=1))
+    with kernel.MFCSubscription(table=10) as subscription:
+        subscription.settimeout(5)
+        kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin="10.0.0.1", mcastgroup="239.0.0.2", parent=0, ttls=[0, 1]))
+        kernel.add_mfc(table_igmp_sock, data.MfcCtl(origin="20.0.0.1", mcastgroup="239.0.0.3", parent=0, ttls=[]))
+        events = subscription.read()
+        while not events:
+            events = subscription.read()
+
+    assert [(str(event.entry.group), event.entry.table) for event in events] == [("239.0.0.3", 10)]
+
+
 def _get_vifs_map() -> dict[int, data.VIFTableEntry]:
     return {vif.index: vif for vif in kernel.ip_mr_vif()}
 
@@ -92,3 +234,18 @@ def _new_packet(packet, src: str, dst: str):
     packet.dst = dst
     return packet
 
+
+
+def test_int_addresses(cleaned_igmp_sock):
+    origin, group = int(ip_address("10.0.0.1")), int(ip_address("239.0.0.2"))
+    kernel.add_mfc(cleaned_igmp_sock, data.MfcCtl(origin=origin, mcastgroup=group, parent=0, ttls=[0, 1]))
+
+    for backend in data.MRTBackend:
+        entries = kernel.ip_mr_cache(backend, int_addresses=True)
+        assert entries == [data.MFCEntry.trusted(group, origin, 0, 0, 0, 0, {1: 1})]
+        assert kernel.ip_mr_cache(backend)[0].group == ip_address("239.0.0.2")
+
+    counts = kernel.get_mfc_counts(cleaned_igmp_sock, data.SGReq(src=origin, grp=group))
+    assert (counts.src, counts.grp, counts.pktcnt) == (origin, group, 0)
+    kernel.del_mfc(cleaned_igmp_sock, data.MfcCtl(origin=origin, mcastgroup=group, parent=0, ttls=[]))
+    assert kernel.ip_mr_cache(int_addresses=True) == []
@@ -1,7 +1,9 @@
 import pytest
 import socket
+import subprocess
+from ipaddress import ip_address
 
-from pygmp import data, kernel, _kernel
+from pygmp import data, kernel, utils, _kernel
 
 # TODO - get these from the system calls.
 # TODO - setup networking test structure
@@ -268,3 +270,254 @@ def test_parse_igmpv3_report():
 
 def test_network_interfaces():
     print(kernel.network_interfaces()) # TODO
+
+
+def test_interface_registry():
+    with kernel.InterfaceRegistry() as registry:
+        a1 = registry.by_name("a1")
+        assert registry.by_index(a1.index) is a1
+        assert registry.by_address("10.0.0.1") is a1
+        assert registry.by_address(ip_address("10.0.0.1")) is a1
+        assert registry.by_name("a9") is None
+        assert registry.interfaces().keys() == kernel.network_interfaces().keys()
+
+        subprocess.run(["ip", "addr", "add", "10.0.0.2/24", "dev", "a1"], check=True)
+        try:
+            assert registry.by_address("10.0.0.2").name == "a1"
+        finally:
+            subprocess.run(["ip", "addr", "del", "10.0.0.2/24", "dev", "a1"], check=True)
+        assert registry.by_address("10.0.0.2") is None
+
+
+_IP_MR_CACHE_HEADER = "Group    Origin   Iif     Pkts    Bytes    Wrong Oifs\n"
+_IP_MR_VIF_HEADER = "Interface      BytesIn  PktsIn  BytesOut PktsOut Flags Local    Remote\n"
+
+
+def _ip_mr_cache_line(group, origin, iif, pkts=0, nbytes=0, wrong=0, oifs=None):
+    line = f"{utils.ip_to_host_hex(group)} {utils.ip_to_host_hex(origin)} {iif:<3d} {pkts:8d} {nbytes:8d} {wrong:8d}"
+    for vifi, ttl in (oifs or {}).items():
+        line += f" {vifi:2d}:{ttl:<3d}"
+    return line + "\n"
+
+
+@pytest.fixture
+def ip_mr_cache_file(tmp_path, monkeypatch):
+    path = tmp_path / "ip_mr_cache"
+    path.write_text(_IP_MR_CACHE_HEADER
+                    + _ip_mr_cache_line("239.0.0.1", "10.0.0.1", 0, 10, 1000, 0, {1: 1, 2: 1})
+                    + _ip_mr_cache_line("239.0.0.2", "10.0.0.1", 0, 20, 2000, 1, {1: 1})
+                    + _ip_mr_cache_line("239.0.0.1", "20.0.0.1", 1)
+                    + _ip_mr_cache_line("239.0.0.3", "30.0.0.1", 2, 30, 3000, 0, {0: 2}))
+    monkeypatch.setattr(kernel, "IP_MR_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def ip_mr_vif_file(tmp_path, monkeypatch):
+    path = tmp_path / "ip_mr_vif"
+    path.write_text(_IP_MR_VIF_HEADER
+                    + " 0 a1               0       0         0       0 00000 0100000A 00000000\n"
+                    + " 1 a2             100       1       200       2 00008 00000003 00000000\n")
+    monkeypatch.setattr(kernel, "IP_MR_VIF_DIR", str(path))
+    return path
+
+
+def test_iter_ip_mr_cache(ip_mr_cache_file):
+    entries = list(kernel.iter_ip_mr_cache())
+    assert len(entries) == 4
+    assert entries[0] == data.MFCEntry("239.0.0.1", "10.0.0.1", 0, 10, 1000, 0, {1: 1, 2: 1})
+    assert entries[2].oifs == {}
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"iif": 0}, [("239.0.0.1", "10.0.0.1"), ("239.0.0.2", "10.0.0.1")]),
+    ({"group": "239.0.0.1"}, [("239.0.0.1", "10.0.0.1"), ("239.0.0.1", "20.0.0.1")]),
+    ({"origin": ip_address("30.0.0.1")}, [("239.0.0.3", "30.0.0.1")]),
+    ({"iif": 1, "group": "239.0.0.1", "origin": "20.0.0.1"}, [("239.0.0.1", "20.0.0.1")]),
+    ({"iif": 5}, []),
+])
+def test_iter_ip_mr_cache_filters(ip_mr_cache_file, filters, expected):
+    entries = kernel.iter_ip_mr_cache(**filters)
+    assert [(str(entry.group), str(entry.origin)) for entry in entries] == expected
+
+
+def test_iter_ip_mr_cache_malformed(ip_mr_cache_file):
+    ip_mr_cache_file.write_text(_IP_MR_CACHE_HEADER + "0100EFEF 0100000A 0\n")
+    with pytest.raises(ValueError):
+        list(kernel.iter_ip_mr_cache())
+
+
+def test_iter_ip_mr_vif(ip_mr_vif_file):
+    vifs = list(kernel.iter_ip_mr_vif())
+    assert [vif.name for vif in vifs] == ["a1", "a2"]
+    assert vifs[0].local_addr_or_interface == ip_address("10.0.0.1")
+    assert vifs[1].local_addr_or_interface == 3
+    assert vifs[1].bytes_out == 200
+
+
+def test_mfc_snapshot(ip_mr_cache_file):
+    snapshot = kernel.MFCSnapshot()
+    delta = snapshot.update()
+    assert len(delta.added) == 4 and not delta.removed and not delta.changed
+    assert len(snapshot) == 4
+
+    delta = snapshot.update()
+    assert not delta.added and not delta.removed and not delta.changed
+
+    ip_mr_cache_file.write_text(_IP_MR_CACHE_HEADER
+                                + _ip_mr_cache_line("239.0.0.1", "10.0.0.1", 0, 11, 1100, 0, {1: 1, 2: 1})
+                                + _ip_mr_cache_line("239.0.0.2", "10.0.0.1", 0, 20, 2000, 1, {1: 1})
+                                + _ip_mr_cache_line("239.0.0.3", "30.0.0.1", 2, 30, 3000, 0, {0: 2})
+                                + _ip_mr_cache_line("239.0.0.4", "30.0.0.1", 2))
+    delta = snapshot.update()
+    assert [(str(e.group), str(e.origin), e.iif) for e in delta.added] == [("239.0.0.4", "30.0.0.1", 2)]
+    assert [(str(e.group), str(e.origin), e.iif) for e in delta.removed] == [("239.0.0.1", "20.0.0.1", 1)]
+    assert [(e.packets, e.bytes) for e in delta.changed] == [(11, 1100)]
+    assert sorted(str(e.group) for e in snapshot.entries()) == ["239.0.0.1", "239.0.0.2", "239.0.0.3", "239.0.0.4"]
+
+
+def test_ip_mr_cache_array(ip_mr_cache_file):
+    np = pytest.importorskip("numpy")
+    table = kernel.ip_mr_cache_array()
+    assert len(table) == 4
+    assert [str(ip_address(int(group))) for group in table['group']] == ["239.0.0.1", "239.0.0.2", "239.0.0.1", "239.0.0.3"]
+    assert str(ip_address(int(table['origin'][3]))) == "30.0.0.1"
+    assert list(table['iif']) == [0, 0, 1, 2]
+    assert int(table['packets'].sum()) == 60 and int(table['bytes'][1]) == 2000 and int(table['wrong_if'][1]) == 1
+    assert table['oifs'].shape == (4, _kernel.MAXVIFS)
+    assert list(np.nonzero(table['oifs'][0])[0]) == [1, 2]
+    assert not table['oifs'][2].any()
+    assert table['oifs'][3, 0] == 2
+
+
+def test_ip_mr_cache_array_empty(ip_mr_cache_file):
+    pytest.importorskip("numpy")
+    ip_mr_cache_file.write_text(_IP_MR_CACHE_HEADER)
+    assert len(kernel.ip_mr_cache_array()) == 0
+
+
+def test_ip_mr_cache_native(ip_mr_cache_file):
+    records = kernel.ip_mr_cache_records()
+    assert records[0] == (int(ip_address("239.0.0.1")), int(ip_address("10.0.0.1")), 0, 10, 1000, 0, {1: 1, 2: 1})
+    kernel.ip_mr_cache.cache_clear()
+    assert kernel.ip_mr_cache(data.MRTBackend.PROC) == list(kernel.iter_ip_mr_cache())
+
+
+def test_ip_mr_vif_native(ip_mr_vif_file):
+    assert kernel.ip_mr_vif_records()[1] == (1, "a2", 100, 1, 200, 2, 8, 3, 0)
+    kernel.ip_mr_vif.cache_clear()
+    assert kernel.ip_mr_vif(data.MRTBackend.PROC) == list(kernel.iter_ip_mr_vif())
+
+
+def test_ip_mr_cache_file_cache(ip_mr_cache_file):
+    kernel.ip_mr_cache.cache_clear()
+    entries = kernel.ip_mr_cache(data.MRTBackend.PROC)
+    assert kernel.ip_mr_cache(data.MRTBackend.PROC) is entries
+    ints = kernel.ip_mr_cache(data.MRTBackend.PROC, int_addresses=True)
+    assert [(ip_address(entry.group), ip_address(entry.origin)) for entry in ints] == \
+           [(entry.group, entry.origin) for entry in entries]
+    assert kernel.ip_mr_cache.cache_info() == utils.CacheInfo(hits=2, misses=1, ttl=0.0)
+
+    kernel.ip_mr_cache.set_ttl(60)
+    try:
+        ip_mr_cache_file.write_text(_IP_MR_CACHE_HEADER)
+        assert kernel.ip_mr_cache(data.MRTBackend.PROC) is entries  # not re-read within the ttl
+    finally:
+        kernel.ip_mr_cache.set_ttl(0)
+    assert kernel.ip_mr_cache(data.MRTBackend.PROC) == []
+    assert kernel.ip_mr_cache.cache_info() == utils.CacheInfo(hits=3, misses=2, ttl=0.0)
+
+
+def test_ip_mr_cache_native_malformed(ip_mr_cache_file):
+    ip_mr_cache_file.write_text(_IP_MR_CACHE_HEADER + "0100EFEF 0100000A 0\n")
+    with pytest.raises(ValueError):
+        kernel.ip_mr_cache_records()
+    with pytest.raises(ValueError):
+        _kernel.pack_ip_mr_cache(ip_mr_cache_file.read_bytes())
+
+
+def test_parse_int_addresses(igmp_control_msg_bytes):
+    header = kernel.parse_ip_header(igmp_control_msg_bytes, int_addresses=True)
+    assert (header.src_addr, header.dst_addr) == (int(ip_address("10.0.0.1")), int(ip_address("239.0.0.4")))
+    assert header.protocol == data.IPProtocol.CONTROL
+    control = kernel.parse_igmp_control(igmp_control_msg_bytes, int_addresses=True)
+    assert (control.im_src, control.im_dst) == (header.src_addr, header.dst_addr)
+    assert kernel.parse_igmp_control(igmp_control_msg_bytes).im_src == ip_address("10.0.0.1")
+
+
+def test_classify_packet_control(igmp_control_msg_bytes):
+    info = kernel.classify_packet(igmp_control_msg_bytes)
+    assert info.kind == data.PacketKind.CONTROL
+    assert kernel.igmp_control(info) == kernel.parse_igmp_control(igmp_control_msg_bytes)
+
+
+def test_classify_packet_igmp(igmp_ip_packet):
+    info = kernel.classify_packet(memoryview(igmp_ip_packet))
+    assert info.kind == data.PacketKind.IGMP
+    igmp = kernel.parse_igmp(igmp_ip_packet[info.offset:])
+    assert (data.IGMPType(info.type), ip_address(info.group)) == (igmp.type, igmp.group)
+    header = kernel.parse_ip_header(igmp_ip_packet, int_addresses=True)
+    assert (info.src, info.dst, info.offset) == (header.src_addr, header.dst_addr, header.ihl * 4)
+
+
+@pytest.mark.parametrize("protocol, kind", [(103, data.PacketKind.PIM), (17, data.PacketKind.OTHER)])
+def test_classify_packet_protocols(igmp_ip_packet, protocol, kind):
+    packet = bytearray(igmp_ip_packet)
+    packet[9] = protocol
+    info = kernel.classify_packet(packet)
+    assert info.kind == kind
+    assert info.type == (packet[24] & 0x0f if kind == data.PacketKind.PIM else protocol)
+
+
+def test_classify_packet_too_short(igmp_control_msg_bytes, igmp_ip_packet):
+    assert [kind.value for kind in data.PacketKind] == [_kernel.PACKET_CONTROL, _kernel.PACKET_IGMP,
+                                                        _kernel.PACKET_PIM, _kernel.PACKET_OTHER,
+                                                        _kernel.PACKET_INVALID]
+    for buffer in (igmp_control_msg_bytes[:19], igmp_ip_packet[:23], igmp_ip_packet[:30]):
+        with pytest.raises(ValueError):
+            kernel.classify_packet(buffer)
+
+
+@pytest.fixture
+def datagram_pair():
+    sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    with sender, receiver:
+        yield sender, receiver
+
+
+def test_packet_ring_batch(datagram_pair, igmp_control_msg_bytes, igmp_ip_packet):
+    sender, receiver = datagram_pair
+    ring = kernel.PacketRing(receiver, batch_size=4, buffer_size=64)
+    for packet in (igmp_control_msg_bytes, igmp_ip_packet, igmp_control_msg_bytes[:19]):
+        sender.send(packet)
+
+    infos = ring.receive(timeout=1)
+    assert [info.kind for info in infos] == [data.PacketKind.CONTROL, data.PacketKind.IGMP, data.PacketKind.INVALID]
+    assert infos[:2] == [kernel.classify_packet(igmp_control_msg_bytes), kernel.classify_packet(igmp_ip_packet)]
+    assert ring.packet(1, infos[1]) == igmp_ip_packet
+    assert ring.receive(timeout=0) == []
+
+
+def test_packet_ring_batch_size(datagram_pair, igmp_control_msg_bytes, igmp_ip_packet):
+    sender, receiver = datagram_pair
+    ring = kernel.PacketRing(receiver, batch_size=2, buffer_size=24)
+    for _ in range(3):
+        sender.send(igmp_ip_packet)
+    sender.send(igmp_control_msg_bytes)
+
+    infos = ring.receive(timeout=1)
+    assert [info.length for info in infos] == [24, 24]  # truncated to the buffer size
+    assert [info.kind for info in infos] == [data.PacketKind.INVALID, data.PacketKind.INVALID]
+    truncated, control = ring.messages(timeout=1)
+    assert truncated.kind == data.PacketKind.INVALID
+    assert control == kernel.parse_igmp_control(igmp_control_msg_bytes)
+
+
+def test_packet_ring_closed(datagram_pair):
+    _, receiver = datagram_pair
+    ring = kernel.PacketRing(receiver)
+    receiver.close()
+    with pytest.raises(ValueError):
+        ring.receive(timeout=0)
+    with pytest.raises(ValueError):
+        kernel.PacketRing(receiver, batch_size=_kernel.RECV_BATCH_MAX + 1)
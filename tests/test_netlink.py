@@ -0,0 +1,77 @@
+from ipaddress import ip_address
+
+import pytest
+
+from pygmp import netlink, data, _kernel
+
+
+# Recorded from a network namespace with three VIFs (vif 1 added with VIFF_USE_IFINDEX) and two MFC entries:
+#   (10.0.0.1, 239.0.0.1) iif 0 oifs {1: 1, 2: 2}  and  (20.0.0.1, 239.0.0.2) iif 1 oifs {0: 3}
+_MFC_DUMP = bytes.fromhex(
+    "7800000018000200010000006a15000080202000fd1100050000000008000f00fd000000080002000a00000108000100ef000001"
+    "080003000200000014000900080000010300000008000002040000001c0011000000000000000000000000000000000000000000"
+    "000000000c00170000000000000000007000000018000200010000006a15000080202000fd1100050000000008000f00fd000000"
+    "080002001400000108000100ef00000208000300030000000c00090008000003020000001c001100000000000000000000000000"
+    "0000000000000000000000000c00170000000000000000001400000003000200010000006a15000000000000")
+_VIF_DUMP = bytes.fromhex(
+    "6c01000010000200010000006a150000800000000000000000000000000000004c011a0008000100fd0000000800020000000000"
+    "08000300ffffffff050004000000000005000500000000000500070000000000180106005c000100080001000200000008000200"
+    "0000000006000300000000000c00040000000000000000000c00050000000000000000000c00060000000000000000000c000700"
+    "0000000000000000080008000a00000108000900000000005c000100080001000300000008000200010000000600030008000000"
+    "0c00040000000000000000000c00050000000000000000000c00060000000000000000000c000700000000000000000008000800"
+    "0300000008000900000000005c0001000800010004000000080002000200000006000300000000000c0004000000000000000000"
+    "0c00050000000000000000000c00060000000000000000000c0007000000000000000000080008001e0000010800090000000000"
+    "1400000003000200010000006a15000000000000")
+_DONE = bytes.fromhex("1400000003000200010000006a15000000000000")
+
+
+def test_parse_mfc_dump():
+    entries = netlink.parse_mfc_dump(_MFC_DUMP, _VIF_DUMP)
+    assert [(str(e.group), str(e.origin), e.iif, e.oifs) for e in entries] == [
+        ("239.0.0.1", "10.0.0.1", 0, {1: 1, 2: 2}),
+        ("239.0.0.2", "20.0.0.1", 1, {0: 3}),
+    ]
+    assert all(e.table == _kernel.RT_TABLE_DEFAULT for e in entries)
+
+
+def test_parse_mfc_dump_other_table():
+    assert netlink.parse_mfc_dump(_MFC_DUMP, _VIF_DUMP, table=10) == []
+
+
+def test_parse_vif_dump():
+    vifs = netlink.parse_vif_dump(_VIF_DUMP)
+    assert [vif.index for vif in vifs] == [0, 1, 2]
+    assert vifs[0].local_addr_or_interface == ip_address("10.0.0.1")
+    assert vifs[1].flags == _kernel.VIFF_USE_IFINDEX and vifs[1].local_addr_or_interface == 3
+    assert vifs[2].local_addr_or_interface == ip_address("30.0.0.1")
+    assert vifs[0].remote_addr == ip_address("0.0.0.0")
+
+
+def test_messages_stops_at_error():
+    error = bytes.fromhex("2400000002000000010000006a150000" "ffffffff" "1400000012000103010000006a150000")
+    with pytest.raises(OSError):
+        list(netlink.messages(error))
+
+
+def test_messages_done():
+    assert list(netlink.messages(_DONE)) == [(netlink.NLMSG_DONE, bytes(4))]
+
+
+# RTM_NEWROUTE and RTM_DELROUTE notifications for (10.0.0.1, 239.0.0.1) iif 0 oifs {1: 1}, with a1 and a2 as ifindex 2 and 3
+_MFC_ADD_EVENT = bytes.fromhex(
+    "7000000018000000000000000000000080202000fd1100050000000008000f00fd000000080002000a00000108000100ef000001"
+    "08000300020000000c00090008000001030000001c0011000000000000000000000000000000000000000000000000000c001700"
+    "0000000000000000")
+_MFC_DELETE_EVENT = _MFC_ADD_EVENT[:4] + bytes([netlink.RTM_DELROUTE]) + _MFC_ADD_EVENT[5:]
+
+
+def test_parse_mfc_events():
+    events = netlink.parse_mfc_events(_MFC_ADD_EVENT + _MFC_DELETE_EVENT, {2: 0, 3: 1})
+    assert [event.type for event in events] == [data.MFCEventType.ADD, data.MFCEventType.DELETE]
+    assert events[0].entry == data.MFCEntry("239.0.0.1", "10.0.0.1", 0, 0, 0, 0, {1: 1})
+    assert netlink.parse_mfc_events(_MFC_ADD_EVENT, {2: 0, 3: 1}, table=10) == []
+
+
+def test_parse_mfc_events_unknown_interface():
+    events = netlink.parse_mfc_events(_MFC_ADD_EVENT, {})
+    assert events[0].entry.iif == -1
@@ -0,0 +1,63 @@
+import pytest
+
+from pygmp import data, kernel, packet, _kernel
+
+
+_IGMPMSG_BYTES = b'E\x00\x00\x1c\x00\x00@\x00\x01\x00\x00\x00\n\x00\x00\x01\xef\x00\x00\x04\x01\x00\x00\x00\x00\x00\x00\x00'
+_IGMP_IP_PACKET = b'F\xc0\x00 \x00\x00@\x00\x01\x02\xeb\x14\n\x00\x00\x01\xef\x00\x00\x02\x94\x04\x00\x00\x16\x00\xfa\xfc\xef\x00\x00\x02'
+
+
+@pytest.mark.parametrize("buffer", [_IGMPMSG_BYTES, _IGMP_IP_PACKET])
+def test_ip_header_view(buffer):
+    view = packet.IPHeaderView(buffer)
+    assert view.materialize() == kernel.parse_ip_header(buffer)
+
+
+def test_ip_header_view_payload():
+    view = packet.IPHeaderView(_IGMP_IP_PACKET)
+    assert view.ihl == 6
+    assert view.payload.obj is _IGMP_IP_PACKET  # not a copy
+    assert view.payload == _IGMP_IP_PACKET[24:]
+
+
+def test_view_control_message():
+    view = packet.view(_IGMPMSG_BYTES)
+    assert isinstance(view, packet.IGMPControlView)
+    assert view.msgtype == data.ControlMsgType.IGMPMSG_NOCACHE
+    assert view.materialize() == kernel.parse_igmp_control(_IGMPMSG_BYTES)
+
+
+def test_view_igmp():
+    view = packet.view(_IGMP_IP_PACKET)
+    assert isinstance(view, packet.IGMPView)
+    assert view.type == data.IGMPType.V2_MEMBERSHIP_REPORT
+    assert view.materialize() == kernel.parse_igmp(_IGMP_IP_PACKET[24:])
+    assert view.materialize() == data.IGMP(view.type, view.max_response_time, view.checksum, view.group)
+
+
+def test_view_other_protocol():
+    udp = bytearray(_IGMPMSG_BYTES)
+    udp[9] = 17
+    view = packet.view(udp)
+    assert type(view) is packet.IPHeaderView
+    assert "protocol=17" in repr(view)
+    assert view.protocol == 17
+    header = view.materialize()
+    assert (header.protocol, header.src_addr, header.dst_addr) == (17, view.src_addr, view.dst_addr)
+
+
+def test_view_with_info():
+    info = kernel.classify_packet(_IGMP_IP_PACKET)
+    view = packet.view(memoryview(_IGMP_IP_PACKET), info)
+    assert isinstance(view, packet.IGMPView)
+    assert view.buffer.obj is _IGMP_IP_PACKET  # not a copy
+    assert view.materialize() == kernel.parse_igmp(_IGMP_IP_PACKET[info.offset:])
+    with pytest.raises(ValueError):
+        packet.view(_IGMP_IP_PACKET, _kernel.PacketInfo((data.PacketKind.INVALID, *info[1:])))
+
+
+def test_view_too_short():
+    with pytest.raises(ValueError):
+        packet.view(_IGMPMSG_BYTES[:19])
+    with pytest.raises(ValueError):
+        packet.view(_IGMP_IP_PACKET[:26])
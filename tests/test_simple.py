@@ -1,6 +1,12 @@
+import asyncio
+import dataclasses
+import socket
+import threading
+import types
 import pytest
+from ipaddress import ip_address
 from pathlib import Path
-from pygmp import kernel
+from pygmp import data, kernel, _kernel
 from pygmp.daemons import config, simple
 
 
@@ -67,12 +73,54 @@ def test_vifmanager_vifi(vif_manager):
         vif_manager.vifi("a4")
 
 
+def test_vifmanager_remove_reuses_slot(vif_manager, example_config):
+    a1, a2, _ = example_config.phyint
+    vif_manager.remove_by_name("a2")
+    with pytest.raises(ValueError):
+        vif_manager.vifi("a2")
+    assert vif_manager.make_ttls_list({"a3": 1}) == [0, 0, 1]
+
+    vif_manager.add(a2)
+    assert vif_manager.vifi("a2") == 1
+    assert {entry.name: entry.index for entry in vif_manager.vifs().values()} == {"a1": 0, "a2": 1, "a3": 2}
+
+
+def test_vif_registry():
+    registry = simple.VifRegistry()
+    assert (registry.allocate(), registry.size) == (0, 0)
+    for vifi, name in enumerate(["a1", "a2", "a3"]):
+        registry.add(vifi, name)
+    registry.remove(1)
+    assert (registry.allocate(), registry.size, len(registry)) == (1, 3, 2)
+    assert "a2" not in registry and registry.name(2) == "a3"
+    registry.remove(2)
+    assert registry.size == 1
+    for vifi in range(_kernel.MAXVIFS):
+        registry.add(vifi, f"v{vifi}")
+    with pytest.raises(ValueError):
+        registry.allocate()
+
+
 
 def test_mfcmanager_init(mfc_manager):
     assert len(mfc_manager.static_mfc()) == 1
     assert len(mfc_manager.dynamic_mfc()) == 1
 
 
+def test_mfcmanager_shadow(mfc_manager, example_config):
+    _, static = example_config.mroute
+    (entry,) = mfc_manager.static_mfc()[mfc_manager.vif_manager.vifi(static.from_)]
+    assert mfc_manager.static_mfc() is mfc_manager.static_mfc()  # served from memory until the shadow changes
+
+    mfc_manager.reconcile()
+    (reconciled,) = kernel.ip_mr_cache()
+    assert mfc_manager.static_mfc() == {reconciled.iif: [reconciled]}
+    assert (reconciled.origin, reconciled.group, reconciled.oifs) == (entry.origin, entry.group, entry.oifs)
+
+    mfc_manager.remove(static)
+    assert mfc_manager.static_mfc() == {}
+
+
 def test_mfcmanager_add_duplicate(mfc_manager, example_config):
     mfc_manager.add(example_config.mroute[0])
     mfc_manager.add(example_config.mroute[1])
@@ -87,6 +135,151 @@ def test_mfcmanager_remove(mfc_manager, example_config):
     assert len(mfc_manager.dynamic_mfc()) == 0
 
 
+def test_mfcmanager_remove_ignores_ttls(mfc_manager, example_config):
+    dynamic = example_config.mroute[0]
+    mfc_manager.remove(dataclasses.replace(dynamic, to={}))
+    assert mfc_manager.dynamic_mfc() == {}
+    assert mfc_manager.match(mfc_manager.vif_manager.vifi(dynamic.from_), dynamic.group) is None
+    with pytest.raises(ValueError):
+        mfc_manager.remove(dynamic)
+
+
+def test_mfcmanager_ttls(mfc_manager, example_config):
+    mroute = example_config.mroute[1]
+    vifi = mfc_manager.vif_manager.vifi(mroute.from_)
+    ttls = mfc_manager.ttls(vifi, mroute)
+    assert ttls == bytes(mfc_manager.vif_manager.make_ttls_list(mroute.to))
+    assert mfc_manager.ttls(vifi, mroute) is ttls
+
+
+def test_mfcmanager_ttls_by_source(mfc_manager, example_config):
+    dynamic, _ = example_config.mroute
+    static = dataclasses.replace(dynamic, source=ip_address("10.1.1.1"), to={"a3": 1})
+    mfc_manager.add(static)
+    vifi = mfc_manager.vif_manager.vifi(dynamic.from_)
+    assert mfc_manager.ttls(vifi, mfc_manager.match(vifi, dynamic.group, "10.1.1.1")) == bytes([0, 0, 1])
+    assert mfc_manager.ttls(vifi, mfc_manager.match(vifi, dynamic.group, "10.2.2.2")) == bytes([0, 2, 0])
+
+
+def test_mfcmanager_ttls_vif_change(mfc_manager, example_config):
+    dynamic, _ = example_config.mroute
+    vifi = mfc_manager.vif_manager.vifi(dynamic.from_)
+    assert mfc_manager.ttls(vifi, dynamic) == bytes([0, 2, 0])
+    mfc_manager.vif_manager.remove_by_name("a3")
+    ttls = mfc_manager.ttls(vifi, dynamic)
+    assert ttls == bytes([0, 2])
+    mfc_manager.vif_manager.reconcile()  # unchanged, so the buffers are kept
+    assert mfc_manager.ttls(vifi, dynamic) is ttls
+
+
+def test_start_table(cleaned_igmp_sock, example_config):
+    mroutes = [dataclasses.replace(mroute, table=10) for mroute in example_config.mroute]
+    with kernel.igmp_socket(table=10) as sock:
+        vif_manager, mfc_manager, _ = simple.start_table(sock, example_config.phyint, mroutes, table=10)
+        try:
+            assert vif_manager.vifs().keys() == {"a1", "a2", "a3"}
+            assert len(mfc_manager.static_mfc()) == 1
+            assert all(entry.table == 10 for entry in kernel.ip_mr_cache(table=10))
+            assert kernel.ip_mr_cache() == []
+        finally:
+            kernel.flush(sock)
+
+
 def test_print(mfc_manager, example_config):
     print(mfc_manager.static_mfc())
-    print(mfc_manager.dynamic_mfc())
\ No newline at end of file
+    print(mfc_manager.dynamic_mfc())
+
+def test_mfcmanager_match(mfc_manager, example_config):
+    dynamic, static = example_config.mroute
+    vifi = mfc_manager.vif_manager.vifi(static.from_)
+    assert mfc_manager.match(vifi, ip_address(str(static.group)), ip_address(str(static.source))) is static
+    assert mfc_manager.match(vifi, str(dynamic.group)) is dynamic
+    assert mfc_manager.match(vifi, str(dynamic.group), "10.9.9.9") is dynamic  # (*,G) matches any source
+    assert mfc_manager.match(vifi, "239.9.9.9") is None
+
+    mfc_manager.remove(static)
+    assert mfc_manager.match(vifi, static.group, static.source) is None
+    replacement = dataclasses.replace(dynamic, to={})
+    mfc_manager.add(replacement)
+    assert mfc_manager.match(vifi, dynamic.group) is replacement
+    assert mfc_manager.dynamic_mfc()[vifi] == [replacement]
+
+
+def test_loop_listener():
+    control = b'E\x00\x00\x1c\x00\x00@\x00\x01\x00\x00\x00\n\x00\x00\x01\xef\x00\x00\x04\x01\x00\x00\x00\x00\x00\x00\x00'
+
+    class Handler:
+        def __init__(self):
+            self.messages = asyncio.Queue()
+
+        def process_control_message(self, message):
+            self.messages.put_nowait(message)
+            raise ValueError("errors are logged per message")
+
+    async def listen(sock, handler):
+        task = asyncio.create_task(simple._loop_listener(sock, handler))
+        try:
+            return [await asyncio.wait_for(handler.messages.get(), timeout=5) for _ in range(2)]
+        finally:
+            task.cancel()
+
+    sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    with sender, receiver:
+        sender.send(control)
+        sender.send(control)
+        messages = asyncio.run(listen(receiver, Handler()))
+    assert messages == [kernel.parse_igmp_control(control)] * 2
+
+
+def test_upcall_coalescer():
+    now = [0.0]
+    coalescer = simple.UpcallCoalescer(window=1.0, clock=lambda: now[0])
+    first, second = ("10.0.0.1", "239.0.0.1", 0), ("10.0.0.1", "239.0.0.2", 0)
+    assert coalescer.begin(first)
+    assert not coalescer.begin(first)
+    assert coalescer.begin(second)
+    coalescer.cancel(second)  # failed, so the next upcall retries
+    assert coalescer.begin(second)
+
+    now[0] = 1.5
+    assert coalescer.begin(first)  # the window expired
+    assert len(coalescer) == 1
+    assert coalescer.counters == simple.UpcallCounters(received=5, handled=4, suppressed=1, failed=1)
+
+
+def test_control_message_handler_coalesces(mfc_manager, example_config):
+    dynamic, _ = example_config.mroute
+    handler = simple.ControlMessageHandler(mfc_manager.sock, mfc_manager, mfc_manager.vif_manager)
+    vifi = mfc_manager.vif_manager.vifi(dynamic.from_)
+    message = data.IGMPControl(data.ControlMsgType.IGMPMSG_NOCACHE, 0, vifi, "10.9.9.9", str(dynamic.group))
+    for _ in range(3):
+        handler.process_control_message(message)
+
+    assert handler.coalescer.counters == simple.UpcallCounters(received=3, handled=1, suppressed=2)
+    assert [(e.origin, e.group) for e in kernel.ip_mr_cache() if e.iif == vifi and e.origin == message.im_src] == \
+        [(message.im_src, message.im_dst)]
+
+
+@pytest.mark.parametrize("single_loop", [False, True])
+def test_setup_app_threads(single_loop):
+    fastapi = pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    threads = {}
+
+    def record(name, result):
+        threads[name] = threading.current_thread()
+        return result
+
+    vif_manager = types.SimpleNamespace(vifs=lambda: record("vifs", {"a1": 0}))
+    mfc_manager = types.SimpleNamespace(static_mfc=lambda: record("static_mfc", {0: []}))
+    handler = types.SimpleNamespace(coalescer=simple.UpcallCoalescer())
+    app = simple.setup_app(fastapi.FastAPI(), vif_manager, mfc_manager, handler, single_loop=single_loop)
+
+    with TestClient(app) as client:
+        loop_thread = client.portal.call(threading.current_thread)
+        assert client.get("/vifs/a1").json() == 0
+        assert client.get("/static_mfc").json() == {"0": []}
+        assert client.get("/static_mfc/not-an-int").status_code == 422
+
+    assert threads["vifs"] is not loop_thread  # blocking routes never run on the loop
+    assert (threads["static_mfc"] is loop_thread) == single_loop
@@ -0,0 +1,92 @@
+from ipaddress import ip_address
+
+import pytest
+
+from pygmp import utils
+
+
+@pytest.fixture
+def cached_file(tmp_path):
+    path = tmp_path / "cached"
+    path.write_bytes(b"first")
+    return path
+
+
+@pytest.fixture
+def cached_reader(cached_file):
+    @utils.file_cache(str(cached_file))
+    def reader(content):
+        return bytes(content)
+    return reader
+
+
+def test_file_cache_hit(cached_reader):
+    assert cached_reader() == b"first"
+    assert cached_reader() == b"first"
+    assert cached_reader.cache_info() == utils.CacheInfo(hits=1, misses=1, ttl=0.0)
+
+
+def test_file_cache_miss_on_change(cached_reader, cached_file):
+    assert cached_reader() == b"first"
+    cached_file.write_bytes(b"second")
+    assert cached_reader() == b"second"
+    assert cached_reader.cache_info().misses == 2
+
+
+def test_file_cache_large_file(cached_reader, cached_file):
+    content = bytes(range(256)) * 1024
+    cached_file.write_bytes(content)
+    assert cached_reader() == content
+    cached_file.write_bytes(content[:-1] + b"\x00")
+    assert cached_reader() == content[:-1] + b"\x00"
+    assert cached_reader.cache_info().misses == 2
+
+
+def test_file_cache_ttl(cached_reader, cached_file):
+    cached_reader.set_ttl(60)
+    assert cached_reader() == b"first"
+    cached_file.write_bytes(b"second")
+    assert cached_reader() == b"first"  # not re-read within the ttl
+    assert cached_reader.cache_info() == utils.CacheInfo(hits=1, misses=1, ttl=60)
+
+    cached_reader.set_ttl(0)
+    assert cached_reader() == b"second"
+
+
+def test_file_cache_clear(cached_reader):
+    cached_reader()
+    cached_reader.cache_clear()
+    assert cached_reader.cache_info() == utils.CacheInfo(hits=0, misses=0, ttl=0.0)
+    cached_reader()
+    assert cached_reader.cache_info().misses == 1
+
+
+@pytest.mark.parametrize("address", ["239.0.0.1", "10.0.0.1", "255.255.255.255", "0.0.0.0"])
+def test_host_hex_round_trip(address):
+    assert utils.host_hex_to_ip(utils.ip_to_host_hex(address)) == ip_address(address)
+
+
+def test_intern_address():
+    address = utils.intern_address("10.0.0.1")
+    assert address == ip_address("10.0.0.1")
+    assert utils.intern_address(ip_address("10.0.0.1")) is address
+    assert utils.intern_address(int(address)) is address
+    assert utils.intern_address(b"\x0a\x00\x00\x01") is address
+    assert utils.host_hex_to_ip(utils.ip_to_host_hex(address)) is address
+    assert utils.intern_address("::1") == ip_address("::1")
+
+
+def test_address_pool_bounded():
+    utils.address_pool_clear()
+    for i in range(utils._ADDRESS_POOL_SIZE + 10):
+        utils.intern_address(i)
+    assert utils.address_pool_info().currsize == utils._ADDRESS_POOL_SIZE
+
+
+def test_address_pool_eviction():
+    utils.address_pool_clear()
+    utils.intern_address("10.0.0.1")
+    for i in range(utils._ADDRESS_POOL_SIZE):  # evicts 10.0.0.1 from the pool, but not its parsed string
+        utils.intern_address(i)
+    address = utils.intern_address(int(ip_address("10.0.0.1")))
+    assert utils.intern_address("10.0.0.1") is address